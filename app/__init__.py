@@ -2,14 +2,28 @@
 
 from flask import Flask
 from modules.database.db import db
+from modules.database.sqlite import init_sqlite
+from modules.database.routing import init_read_routing
 from modules.services import ma  # Marshmallow instance
+from modules.services.ledger_cache import init_ledger_cache
+from modules.services.account_directory import init_account_directory
+from modules.services.user_cache import init_user_cache, get_user_cache
+from modules.services.api_tokens import init_api_tokens, get_api_tokens
+from modules.services.jobs import init_jobs
+from modules.services.profiler import init_profiler
+from modules.services.event_bus import init_event_bus
+from modules.services.instrumentation import init_instrumentation
+from modules.services.query_budget import init_query_budget
+from modules.ml.models.registry import init_model_registry
+from modules.services.categorization import init_categorization
 from flask_migrate import Migrate
 from flask_login import LoginManager
 from app.views.main import bp as main_bp
 from app.views.auth import bp as auth_bp
 from app.views.accounts import bp as accounts_bp
 from app.views.transactions import bp as transactions_bp
-from app.api import api_bp  # Import the API blueprint
+from app.api import api_bp, api  # Import the API blueprint
+from app.commands import balances_cli, sqlite_cli, jobs_cli, models_cli
 from flask import make_response, jsonify, request, redirect, url_for
 import importlib
 import pkgutil
@@ -20,8 +34,19 @@ def create_app(config_object='config.DevelopmentConfig'):
 
     # Initialize extensions
     db.init_app(app)
+    init_sqlite(app)
+    init_read_routing(app, db)
     ma.init_app(app)  # Initialize Marshmallow
     migrate = Migrate(app, db)
+    init_ledger_cache(app)
+    init_account_directory(app)
+    init_user_cache(app)
+    init_api_tokens(app)
+    init_jobs(app)
+    init_profiler(app)
+    init_event_bus(app)
+    init_model_registry(app)
+    init_categorization(app)
 
     # Initialize Flask-Login
     login_manager = LoginManager()
@@ -31,7 +56,24 @@ def create_app(config_object='config.DevelopmentConfig'):
     @login_manager.user_loader
     def load_user(user_id):
         from modules.models.user import User
-        return User.query.get(int(user_id))
+        user_id = int(user_id)
+        cache = get_user_cache()
+        if cache is not None:
+            cached = cache.get(user_id)
+            if cached is not None:
+                return cached
+        user = db.session.get(User, user_id)
+        if user is None or cache is None:
+            return user
+        return cache.put(user)
+
+    @login_manager.request_loader
+    def load_user_from_request(request):
+        # Machine clients send a signed token instead of a session cookie
+        header = request.headers.get('Authorization', '')
+        if header.startswith('Bearer '):
+            return get_api_tokens().load(header[len('Bearer '):].strip())
+        return None
 
     @login_manager.unauthorized_handler
     def unauthorized():
@@ -47,17 +89,43 @@ def create_app(config_object='config.DevelopmentConfig'):
     app.register_blueprint(transactions_bp)
     app.register_blueprint(api_bp)  # Register the API blueprint
 
+    # Server-Timing header and /metrics; does nothing unless enabled
+    init_instrumentation(app, api)
+    # Per-request query budgets; does nothing unless QUERY_BUDGET_MODE is set
+    init_query_budget(app)
+
+    # Register CLI commands
+    app.cli.add_command(balances_cli)
+    app.cli.add_command(sqlite_cli)
+    app.cli.add_command(jobs_cli)
+    app.cli.add_command(models_cli)
+
     # Load Plugins
     load_plugins(app)
 
     return app
 
 def load_plugins(app):
-    from modules.plugins import PluginBase
+    from modules.plugins import PluginBase, LazyPlugin, read_manifest
     import modules.plugins
 
+    # Manifest plugins get a stub route now and are imported on first use,
+    # unless their entry says "lazy": false
+    lazy = app.config.get('PLUGINS_LAZY', True)
+    app.extensions['plugins'] = {}
+    for entry in read_manifest():
+        plugin = LazyPlugin(**entry)
+        app.extensions['plugins'][plugin.name] = plugin
+        if lazy and plugin.lazy:
+            plugin.register_stub(app)
+        else:
+            plugin.load(app)
+
+    # Any other plugin module is imported and registered at startup
+    listed = {plugin.module_name for plugin in app.extensions['plugins'].values()}
     for _, name, is_pkg in pkgutil.iter_modules(modules.plugins.__path__):
-        if not is_pkg:
+        if not is_pkg and f'modules.plugins.{name}' not in listed:
             module = importlib.import_module(f'modules.plugins.{name}')
             if hasattr(module, 'plugin') and isinstance(module.plugin, PluginBase):
                 module.plugin.register(app)
+                module.plugin.subscribe(app.extensions['event_bus'])
@@ -11,8 +11,16 @@ api = Api(api_bp, version='1.0', title='Bookkeeping API',
 from .accounts_api import accounts_ns
 from .transactions_api import transactions_ns
 from .auth_api import auth_ns
+from .reports_api import reports_ns
+from .jobs_api import jobs_ns
+from .profiles_api import profiles_ns
+from .events_api import events_ns
 
 # Add Namespaces to the API
 api.add_namespace(accounts_ns)
 api.add_namespace(transactions_ns)
-api.add_namespace(auth_ns)
\ No newline at end of file
+api.add_namespace(auth_ns)
+api.add_namespace(reports_ns)
+api.add_namespace(jobs_ns)
+api.add_namespace(profiles_ns)
+api.add_namespace(events_ns)
\ No newline at end of file
@@ -4,7 +4,13 @@ from flask import request
 from flask_restx import Namespace, Resource, fields
 from modules.models.account import Account
 from modules.database.db import db
+from modules.services import balances, ledger_version
+from modules.services.account_directory import get_account_directory
+from modules.services.decorators import etag
+from modules.services.query_budget import query_budget
+from modules.services.serializers import RowSerializer
 from flask_login import login_required
+from sqlalchemy.exc import IntegrityError
 from . import api
 
 accounts_ns = Namespace('accounts', description='Accounts related operations')
@@ -15,14 +21,38 @@ account_model = accounts_ns.model('Account', {
     'type': fields.String(required=True, description='Account type')
 })
 
+account_serializer = RowSerializer(account_model)
+
+def commit_account_change(duplicate_message):
+    """
+    Bump the ledger version and commit an account write. The directory's
+    name check can miss a name another worker has just taken; the unique
+    constraint then rejects the write with the same 400.
+    """
+    try:
+        # bump() flushes the account first, so it can raise the IntegrityError too
+        ledger_version.bump()
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        accounts_ns.abort(400, duplicate_message)
+    finally:
+        get_account_directory().invalidate()
+
+def account_list_etag(resource):
+    # One single-row read of the ledger version, the only query of a 304
+    return f'ledger-{ledger_version.current()}'
+
 @accounts_ns.route('/')
 class AccountList(Resource):
-    @accounts_ns.marshal_list_with(account_model)
+    @query_budget(max_queries=3)
+    @etag(account_list_etag)
+    @accounts_ns.response(200, 'Success', [account_model])
     @login_required
     def get(self):
         """List all accounts"""
-        accounts = Account.query.all()
-        return accounts, 200
+        rows = db.session.execute(db.select(*account_serializer.columns(Account)))
+        return account_serializer.serialize(rows), 200
 
     @accounts_ns.expect(account_model, validate=True)
     @accounts_ns.marshal_with(account_model, code=201)
@@ -30,13 +60,36 @@ class AccountList(Resource):
     def post(self):
         """Create a new account"""
         data = request.json
-        if db.session.execute(db.select(Account).filter_by(name=data['name'])).scalar():
+        if get_account_directory().id_for_name(data['name']) is not None:
             accounts_ns.abort(400, 'Account name already exists.')
         new_account = Account(name=data['name'], type=data['type'])
         db.session.add(new_account)
-        db.session.commit()
+        commit_account_change('Account name already exists.')
         return new_account, 201
 
+balance_model = accounts_ns.model('AccountBalance', {
+    'account_id': fields.Integer(readOnly=True, description='The account identifier'),
+    'debit_total': fields.Float(readOnly=True, description='Sum of all debits posted to the account'),
+    'credit_total': fields.Float(readOnly=True, description='Sum of all credits posted to the account'),
+    'balance': fields.Float(readOnly=True, description='Balance on the normal side for the account type')
+})
+
+directory_stats_model = accounts_ns.model('AccountDirectoryStats', {
+    'accounts': fields.Integer(readOnly=True, description='Accounts currently held in the directory'),
+    'hits': fields.Integer(readOnly=True, description='Lookups answered from memory'),
+    'misses': fields.Integer(readOnly=True, description='Lookups that had to load the directory'),
+    'hit_rate': fields.Float(readOnly=True, description='Share of lookups answered from memory'),
+    'loads': fields.Integer(readOnly=True, description='Number of times the directory was loaded')
+})
+
+@accounts_ns.route('/directory-stats')
+class AccountDirectoryStats(Resource):
+    @accounts_ns.marshal_with(directory_stats_model)
+    @login_required
+    def get(self):
+        """Hit rate and size of the account directory cache"""
+        return get_account_directory().stats(), 200
+
 @accounts_ns.route('/<int:id>')
 @accounts_ns.response(404, 'Account not found')
 @accounts_ns.param('id', 'The account identifier')
@@ -60,12 +113,12 @@ class AccountResource(Resource):
             accounts_ns.abort(404, 'Account not found')
         data = request.json
         if 'name' in data:
-            if db.session.execute(db.select(Account).filter(Account.name == data['name'], Account.id != id)).scalar():
+            if get_account_directory().id_for_name(data['name']) not in (None, id):
                 accounts_ns.abort(400, 'Another account with this name already exists.')
             account.name = data['name']
         if 'type' in data:
             account.type = data['type']
-        db.session.commit()
+        commit_account_change('Another account with this name already exists.')
         return account, 200
 
     @accounts_ns.response(204, 'Account deleted')
@@ -75,6 +128,22 @@ class AccountResource(Resource):
         account = db.session.get(Account, id)
         if not account:
             accounts_ns.abort(404, 'Account not found')
+        balances.forget_account(account.id)
         db.session.delete(account)
+        ledger_version.bump()
         db.session.commit()
+        get_account_directory().invalidate()
         return '', 204
+
+@accounts_ns.route('/<int:id>/balance')
+@accounts_ns.response(404, 'Account not found')
+@accounts_ns.param('id', 'The account identifier')
+class AccountBalanceResource(Resource):
+    @accounts_ns.marshal_with(balance_model)
+    @login_required
+    def get(self, id):
+        """Fetch the current balance of a given account"""
+        account = db.session.get(Account, id)
+        if not account:
+            accounts_ns.abort(404, 'Account not found')
+        return balances.get_balance(account), 200
@@ -6,6 +6,9 @@ from modules.database.db import db
 from werkzeug.security import check_password_hash
 from flask_login import login_user, logout_user, login_required, current_user
 from flask_restx import Namespace, Resource, fields
+from modules.services.user_cache import get_user_cache
+from modules.services.api_tokens import get_api_tokens
+from modules.services.decorators import roles_required
 from . import api
 
 auth_ns = Namespace('auth', description='Authentication related operations')
@@ -21,6 +24,21 @@ user_model = auth_ns.model('User', {
     'role': fields.String(required=True, description='User role')
 })
 
+token_model = auth_ns.model('Token', {
+    'token': fields.String(description='Signed bearer token'),
+    'token_type': fields.String(description='Always Bearer'),
+    'expires_in': fields.Integer(description='Seconds until the token expires')
+})
+
+user_cache_stats_model = auth_ns.model('UserCacheStats', {
+    'enabled': fields.Boolean(description='Whether the user cache is switched on'),
+    'size': fields.Integer(description='Users currently cached'),
+    'maxsize': fields.Integer(description='Maximum number of cached users'),
+    'hits': fields.Integer(description='Requests whose user was loaded from memory'),
+    'misses': fields.Integer(description='Requests whose user was loaded from the database'),
+    'hit_rate': fields.Float(description='Share of requests served from memory')
+})
+
 @auth_ns.route('/login')
 class Login(Resource):
     @auth_ns.expect(login_model, validate=True)
@@ -35,6 +53,37 @@ class Login(Resource):
         else:
             auth_ns.abort(400, 'Invalid username or password.')
 
+@auth_ns.route('/token')
+class Token(Resource):
+    @auth_ns.expect(login_model, validate=True)
+    @auth_ns.marshal_with(token_model)
+    def post(self):
+        """Exchange a username and password for a signed bearer token"""
+        data = request.json
+        user = db.session.execute(db.select(User).filter_by(username=data['username'])).scalar()
+        if user and check_password_hash(user.password_hash, data['password']):
+            tokens = get_api_tokens()
+            return {'token': tokens.issue(user), 'token_type': 'Bearer', 'expires_in': tokens.max_age}, 200
+        else:
+            auth_ns.abort(400, 'Invalid username or password.')
+
+@auth_ns.route('/token/revoke')
+class RevokeTokens(Resource):
+    @login_required
+    def post(self):
+        """Revoke every token issued to the current user"""
+        get_api_tokens().revoke_user(current_user.id)
+        return {'message': 'Tokens revoked.'}, 200
+
+@auth_ns.route('/token/revoke-all')
+class RevokeAllTokens(Resource):
+    @login_required
+    @roles_required('Admin')
+    def post(self):
+        """Revoke every token issued to any user"""
+        get_api_tokens().revoke_all()
+        return {'message': 'All tokens revoked.'}, 200
+
 @auth_ns.route('/logout')
 class Logout(Resource):
     @login_required
@@ -50,3 +99,14 @@ class CurrentUser(Resource):
     def get(self):
         """Get the current logged-in user's information"""
         return current_user, 200
+
+@auth_ns.route('/user-cache-stats')
+class UserCacheStats(Resource):
+    @login_required
+    @auth_ns.marshal_with(user_cache_stats_model)
+    def get(self):
+        """Hit and miss counters of the logged-in user cache"""
+        cache = get_user_cache()
+        if cache is None:
+            return {'enabled': False}, 200
+        return dict(cache.stats(), enabled=True), 200
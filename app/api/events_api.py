@@ -0,0 +1,28 @@
+# app/api/events_api.py
+
+from flask_login import login_required
+from flask_restx import Namespace, Resource, fields
+from modules.services.event_bus import get_event_bus
+
+events_ns = Namespace('events', description='Ledger event bus')
+
+subscriber_model = events_ns.model('EventSubscriber', {
+    'name': fields.String(description='Subscriber name'),
+    'policy': fields.String(description='What happens when its queue is full: drop_oldest, drop_newest or block'),
+    'queued': fields.Integer(description='Events waiting to be handled'),
+    'max_queue': fields.Integer(description='Queue capacity'),
+    'delivered': fields.Integer(description='Events handed to the subscriber'),
+    'dropped': fields.Integer(description='Events lost to a full queue'),
+    'batches': fields.Integer(description='Handler calls'),
+    'failed_batches': fields.Integer(description='Handler calls that raised'),
+    'lag_events': fields.Integer(description='Events committed since the last one the subscriber handled'),
+    'lag_seconds': fields.Float(description='Age of the oldest queued event')
+})
+
+@events_ns.route('/subscribers')
+class EventSubscribers(Resource):
+    @events_ns.marshal_list_with(subscriber_model)
+    @login_required
+    def get(self):
+        """Queue, delivery and lag figures of every ledger event subscriber"""
+        return get_event_bus().stats(), 200
@@ -0,0 +1,94 @@
+# app/api/jobs_api.py
+
+from flask import request, send_file, url_for
+from flask_login import login_required, current_user
+from flask_restx import Namespace, Resource, fields
+from modules.services.jobs import get_jobs, JOB_KINDS, SUCCEEDED
+from . import api
+
+jobs_ns = Namespace('jobs', description='Background report jobs')
+
+job_request_model = jobs_ns.model('JobRequest', {
+    'kind': fields.String(required=True, description='Job kind: ' + ', '.join(sorted(JOB_KINDS))),
+    'params': fields.Raw(description='Parameters of the job kind, e.g. {"as_of": "2024-12-31"}')
+})
+
+job_model = jobs_ns.model('Job', {
+    'id': fields.String(readOnly=True, description='The job identifier'),
+    'kind': fields.String(description='Job kind'),
+    'status': fields.String(description='queued, running, succeeded, failed or cancelled'),
+    'progress': fields.Float(description='Share of the work done, from 0 to 1'),
+    'error': fields.String(description='Why the job failed'),
+    'created_at': fields.DateTime(description='When the job was submitted'),
+    'started_at': fields.DateTime(description='When the job started running'),
+    'finished_at': fields.DateTime(description='When the job finished'),
+    'result_url': fields.String(description='Where to download the result once the job has succeeded')
+})
+
+def job_view(job):
+    view = dict(vars(job))
+    view['result_url'] = url_for('api.jobs_job_result', id=job.id) if job.status == SUCCEEDED else None
+    return view
+
+def find_job(job_id):
+    """The job, if it exists and belongs to the current user (admins see every job)."""
+    job = get_jobs().get(job_id)
+    if job is None or (job.user_id != current_user.id and current_user.role != 'Admin'):
+        jobs_ns.abort(404, 'Job not found')
+    return job
+
+@jobs_ns.route('/')
+class JobList(Resource):
+    @jobs_ns.expect(job_request_model, validate=True)
+    @jobs_ns.marshal_with(job_model, code=202)
+    @login_required
+    def post(self):
+        """Start a report job"""
+        data = request.json
+        if data.get('params') is not None and not isinstance(data['params'], dict):
+            jobs_ns.abort(400, 'params must be an object.')
+        try:
+            job = get_jobs().submit(data['kind'], data.get('params'), user_id=current_user.id)
+        except ValueError as e:
+            jobs_ns.abort(400, str(e))
+        return job_view(job), 202, {'Location': url_for('api.jobs_job_resource', id=job.id)}
+
+@jobs_ns.route('/<string:id>')
+@jobs_ns.response(404, 'Job not found')
+@jobs_ns.param('id', 'The job identifier')
+class JobResource(Resource):
+    @jobs_ns.marshal_with(job_model)
+    @login_required
+    def get(self, id):
+        """Status and progress of a job"""
+        return job_view(find_job(id)), 200
+
+    @jobs_ns.response(204, 'Job cancelled and deleted')
+    @login_required
+    def delete(self, id):
+        """Cancel a job if it is still running and delete its result"""
+        get_jobs().discard(find_job(id).id)
+        return '', 204
+
+@jobs_ns.route('/<string:id>/cancel')
+@jobs_ns.response(404, 'Job not found')
+@jobs_ns.param('id', 'The job identifier')
+class JobCancel(Resource):
+    @jobs_ns.marshal_with(job_model)
+    @login_required
+    def post(self, id):
+        """Ask a queued or running job to stop"""
+        return job_view(get_jobs().cancel(find_job(id).id)), 200
+
+@jobs_ns.route('/<string:id>/result')
+@jobs_ns.response(404, 'Job not found')
+@jobs_ns.response(409, 'Job has not succeeded')
+@jobs_ns.param('id', 'The job identifier')
+class JobResult(Resource):
+    @login_required
+    def get(self, id):
+        """Download the JSON result of a finished job"""
+        job = find_job(id)
+        if job.status != SUCCEEDED:
+            jobs_ns.abort(409, f'Job is {job.status}.')
+        return send_file(job.result_path, mimetype='application/json')
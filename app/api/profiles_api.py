@@ -0,0 +1,64 @@
+# app/api/profiles_api.py
+
+from flask import send_file
+from flask_login import login_required
+from flask_restx import Namespace, Resource, fields
+from modules.services.decorators import roles_required
+from modules.services.profiler import get_profiler
+
+profiles_ns = Namespace('profiles', description='Stored request profiles (admins only)')
+
+profile_model = profiles_ns.model('Profile', {
+    'id': fields.String(readOnly=True, description='The profile identifier'),
+    'endpoint': fields.String(description='Endpoint that handled the profiled request'),
+    'method': fields.String(description='HTTP method of the request'),
+    'path': fields.String(description='Path of the request'),
+    'status': fields.Integer(description='Response status code'),
+    'duration_ms': fields.Float(description='Time spent handling the request, in milliseconds'),
+    'started_at': fields.DateTime(description='When the request started'),
+    'trigger': fields.String(description='requested (X-Profile header or ?profile=1) or sampled'),
+    'user_id': fields.String(description='User who made the request')
+})
+
+profile_detail_model = profiles_ns.inherit('ProfileDetail', profile_model, {
+    'summary': fields.String(description='The most expensive functions, by cumulative time')
+})
+
+def find_profile(profile_id):
+    metadata = get_profiler().get(profile_id)
+    if metadata is None:
+        profiles_ns.abort(404, 'Profile not found')
+    return metadata
+
+@profiles_ns.route('/')
+class ProfileList(Resource):
+    @login_required
+    @roles_required('Admin')
+    @profiles_ns.marshal_list_with(profile_model)
+    def get(self):
+        """List the stored profiles, newest first"""
+        return get_profiler().profiles(), 200
+
+@profiles_ns.route('/<string:id>')
+@profiles_ns.response(404, 'Profile not found')
+@profiles_ns.param('id', 'The profile identifier')
+class ProfileResource(Resource):
+    @login_required
+    @roles_required('Admin')
+    @profiles_ns.marshal_with(profile_detail_model)
+    def get(self, id):
+        """Metadata and a text report of one profile"""
+        metadata = find_profile(id)
+        return dict(metadata, summary=get_profiler().summary(id)), 200
+
+@profiles_ns.route('/<string:id>/raw')
+@profiles_ns.response(404, 'Profile not found')
+@profiles_ns.param('id', 'The profile identifier')
+class ProfileRaw(Resource):
+    @login_required
+    @roles_required('Admin')
+    def get(self, id):
+        """Download a profile in pstats format (python -m pstats, snakeviz)"""
+        find_profile(id)
+        return send_file(get_profiler().stats_path(id), mimetype='application/octet-stream',
+                         as_attachment=True, download_name=f'{id}.prof')
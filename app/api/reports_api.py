@@ -0,0 +1,159 @@
+# app/api/reports_api.py
+
+from flask_restx import Namespace, Resource, fields, inputs
+from modules.services import reports
+from modules.services.ledger_cache import get_ledger_cache
+from flask_login import login_required
+from . import api
+
+reports_ns = Namespace('reports', description='Financial reports')
+
+trial_balance_account_model = reports_ns.model('TrialBalanceAccount', {
+    'account_id': fields.Integer(description='The account identifier'),
+    'name': fields.String(description='Account name'),
+    'type': fields.String(description='Account type'),
+    'debit_total': fields.Float(description='Debits posted up to the report date'),
+    'credit_total': fields.Float(description='Credits posted up to the report date'),
+    'balance': fields.Float(description='Balance on the normal side for the account type')
+})
+
+trial_balance_group_model = reports_ns.model('TrialBalanceGroup', {
+    'type': fields.String(description='Account type'),
+    'debit_total': fields.Float(description='Debits for all accounts of this type'),
+    'credit_total': fields.Float(description='Credits for all accounts of this type'),
+    'balance': fields.Float(description='Balance for all accounts of this type'),
+    'accounts': fields.List(fields.Nested(trial_balance_account_model))
+})
+
+trial_balance_model = reports_ns.model('TrialBalance', {
+    'as_of': fields.Date(description='Report date; all postings when omitted'),
+    'groups': fields.List(fields.Nested(trial_balance_group_model)),
+    'debit_total': fields.Float(description='Total debits across all accounts'),
+    'credit_total': fields.Float(description='Total credits across all accounts')
+})
+
+general_ledger_account_model = reports_ns.model('GeneralLedgerAccount', {
+    'account_id': fields.Integer(description='The account identifier'),
+    'name': fields.String(description='Account name'),
+    'type': fields.String(description='Account type'),
+    'opening_balance': fields.Float(description='Balance before the start of the period'),
+    'debit_total': fields.Float(description='Debits posted during the period'),
+    'credit_total': fields.Float(description='Credits posted during the period'),
+    'closing_balance': fields.Float(description='Balance at the end of the period')
+})
+
+general_ledger_group_model = reports_ns.model('GeneralLedgerGroup', {
+    'type': fields.String(description='Account type'),
+    'opening_balance': fields.Float(description='Opening balance for all accounts of this type'),
+    'debit_total': fields.Float(description='Period debits for all accounts of this type'),
+    'credit_total': fields.Float(description='Period credits for all accounts of this type'),
+    'closing_balance': fields.Float(description='Closing balance for all accounts of this type'),
+    'accounts': fields.List(fields.Nested(general_ledger_account_model))
+})
+
+general_ledger_model = reports_ns.model('GeneralLedger', {
+    'date_from': fields.Date(description='First day of the period'),
+    'date_to': fields.Date(description='Last day of the period'),
+    'groups': fields.List(fields.Nested(general_ledger_group_model))
+})
+
+period_total_model = reports_ns.model('PeriodTotal', {
+    'period': fields.String(description='Period label, e.g. 2024-01 for a month'),
+    'amount': fields.Float(description='Sum of transaction amounts in the period'),
+    'count': fields.Integer(description='Number of transactions in the period')
+})
+
+flow_model = reports_ns.model('Flow', {
+    'debit_account_id': fields.Integer(description='Debit account ID'),
+    'credit_account_id': fields.Integer(description='Credit account ID'),
+    'amount': fields.Float(description='Sum of amounts moved between the two accounts'),
+    'count': fields.Integer(description='Number of transactions between the two accounts')
+})
+
+ledger_cache_model = reports_ns.model('LedgerCacheStats', {
+    'enabled': fields.Boolean(description='Whether the cache is switched on'),
+    'loaded': fields.Boolean(description='Whether the ledger is currently held in memory'),
+    'rows': fields.Integer(description='Live transactions held'),
+    'capacity': fields.Integer(description='Rows allocated'),
+    'bytes': fields.Integer(description='Memory held by the arrays'),
+    'max_bytes': fields.Integer(description='Memory limit (LEDGER_CACHE_MAX_BYTES)'),
+    'over_budget': fields.Boolean(description='Whether the ledger was too large to cache'),
+    'version': fields.Integer(description='Change counter'),
+    'loads': fields.Integer(description='Number of full loads from the database')
+})
+
+trial_balance_parser = reports_ns.parser()
+trial_balance_parser.add_argument('as_of', type=inputs.date_from_iso8601, location='args',
+                                  help='Include postings up to and including this date (YYYY-MM-DD)')
+
+general_ledger_parser = reports_ns.parser()
+general_ledger_parser.add_argument('date_from', type=inputs.date_from_iso8601, location='args',
+                                   help='First day of the period (YYYY-MM-DD)')
+general_ledger_parser.add_argument('date_to', type=inputs.date_from_iso8601, location='args',
+                                   help='Last day of the period (YYYY-MM-DD)')
+general_ledger_parser.add_argument('account_id', type=int, location='args',
+                                   help='Only report this account')
+
+period_parser = reports_ns.parser()
+period_parser.add_argument('period', choices=('day', 'month', 'year'), default='month', location='args',
+                           help='Length of each period')
+period_parser.add_argument('date_from', type=inputs.date_from_iso8601, location='args',
+                           help='First day to include (YYYY-MM-DD)')
+period_parser.add_argument('date_to', type=inputs.date_from_iso8601, location='args',
+                           help='Last day to include (YYYY-MM-DD)')
+
+flows_parser = reports_ns.parser()
+flows_parser.add_argument('date_from', type=inputs.date_from_iso8601, location='args',
+                          help='First day to include (YYYY-MM-DD)')
+flows_parser.add_argument('date_to', type=inputs.date_from_iso8601, location='args',
+                          help='Last day to include (YYYY-MM-DD)')
+
+@reports_ns.route('/trial-balance')
+class TrialBalance(Resource):
+    @reports_ns.expect(trial_balance_parser)
+    @reports_ns.marshal_with(trial_balance_model)
+    @login_required
+    def get(self):
+        """Trial balance grouped by account type"""
+        args = trial_balance_parser.parse_args()
+        return reports.trial_balance(args['as_of']), 200
+
+@reports_ns.route('/general-ledger')
+class GeneralLedger(Resource):
+    @reports_ns.expect(general_ledger_parser)
+    @reports_ns.marshal_with(general_ledger_model)
+    @login_required
+    def get(self):
+        """Opening balance, period activity and closing balance per account"""
+        args = general_ledger_parser.parse_args()
+        if args['date_from'] and args['date_to'] and args['date_from'] > args['date_to']:
+            reports_ns.abort(400, 'date_from must not be after date_to.')
+        return reports.general_ledger(args['date_from'], args['date_to'], args['account_id']), 200
+
+@reports_ns.route('/period-totals')
+class PeriodTotals(Resource):
+    @reports_ns.expect(period_parser)
+    @reports_ns.marshal_list_with(period_total_model)
+    @login_required
+    def get(self):
+        """Transaction amounts and counts per day, month or year"""
+        args = period_parser.parse_args()
+        return reports.period_totals(args['period'], args['date_from'], args['date_to']), 200
+
+@reports_ns.route('/flows')
+class Flows(Resource):
+    @reports_ns.expect(flows_parser)
+    @reports_ns.marshal_list_with(flow_model)
+    @login_required
+    def get(self):
+        """Amounts moved between each pair of debit and credit accounts"""
+        args = flows_parser.parse_args()
+        return reports.flows(args['date_from'], args['date_to']), 200
+
+@reports_ns.route('/ledger-cache')
+class LedgerCacheStats(Resource):
+    @reports_ns.marshal_with(ledger_cache_model)
+    @login_required
+    def get(self):
+        """Size and state of the in-memory ledger cache"""
+        return get_ledger_cache().stats(), 200
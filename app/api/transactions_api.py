@@ -1,11 +1,24 @@
 # app/api/transactions_api.py
 
-from flask import request
-from flask_restx import Namespace, Resource, fields
+import json
+from datetime import date, datetime
+from flask import request, current_app, url_for
+from flask_restx import Namespace, Resource, fields, inputs
 from modules.models.transaction import Transaction
-from modules.models.account import Account
 from modules.database.db import db
+from modules.services.pagination import encode_cursor, decode_cursor
+from modules.services import balances, ledger_version, event_bus
+from modules.services.ledger_cache import get_ledger_cache
+from modules.services.account_directory import get_account_directory
+from modules.services.categorization import get_categorizer
+from modules.services.decorators import etag
+from modules.services.query_budget import query_budget, UNLIMITED
+from modules.services.serializers import RowSerializer
 from flask_login import login_required
+from sqlalchemy import tuple_
+from sqlalchemy.exc import SQLAlchemyError
+from jsonschema import Draft4Validator
+from jsonschema.exceptions import best_match
 from . import api
 from dateutil import parser
 
@@ -20,6 +33,17 @@ transaction_model = transactions_ns.model('Transaction', {
     'credit_account_id': fields.Integer(required=True, description='Credit account ID')
 })
 
+suggestion_model = transactions_ns.model('AccountSuggestion', {
+    'debit_account_id': fields.Integer(description='Suggested debit account ID'),
+    'credit_account_id': fields.Integer(description='Suggested credit account ID'),
+    'model_version': fields.Integer(description='Version of the categorizer model that made the suggestion')
+})
+
+created_transaction_model = transactions_ns.inherit('CreatedTransaction', transaction_model, {
+    'suggestion': fields.Nested(suggestion_model, allow_null=True,
+                                description='Accounts suggested by the categorizer model, if it is available')
+})
+
 transaction_update_model = transactions_ns.model('TransactionUpdate', {
     'date': fields.DateTime(description='Date of the transaction'),
     'amount': fields.Float(description='Amount of the transaction'),
@@ -28,17 +52,130 @@ transaction_update_model = transactions_ns.model('TransactionUpdate', {
     'credit_account_id': fields.Integer(description='Credit account ID')
 })
 
+batch_error_model = transactions_ns.model('TransactionBatchError', {
+    'index': fields.Integer(description='Zero-based position of the entry in the request body'),
+    'message': fields.String(description='Why the entry was rejected')
+})
+
+batch_result_model = transactions_ns.model('TransactionBatchResult', {
+    'created': fields.Integer(description='Number of transactions inserted'),
+    'failed': fields.Integer(description='Number of entries rejected'),
+    'errors': fields.List(fields.Nested(batch_error_model), description='Per-entry errors')
+})
+
+transaction_serializer = RowSerializer(transaction_model)
+
+# Validates batch entries against the same field rules as a single POST
+transaction_validator = Draft4Validator(transaction_model.__schema__)
+
+def parse_transaction_date(value):
+    """
+    Parse an ISO 8601 date or datetime to a date. Plain dates and the common
+    datetime forms go through the C-level fromisoformat parsers; anything
+    else falls back to dateutil.
+    """
+    if len(value) == 10:
+        return date.fromisoformat(value)
+    try:
+        return datetime.fromisoformat(value).date()
+    except ValueError:
+        return parser.isoparse(value).date()
+
+def read_batch_entries():
+    """
+    Read the entries of a batch request. Accepts a JSON array, or NDJSON
+    (one JSON object per line) when sent as application/x-ndjson. Lines that
+    are not valid JSON are returned as None so they can be reported per row.
+    """
+    if request.mimetype in ('application/x-ndjson', 'application/jsonlines'):
+        entries = []
+        for line in request.get_data(as_text=True).splitlines():
+            if not line.strip():
+                continue
+            try:
+                entries.append(json.loads(line))
+            except ValueError:
+                entries.append(None)
+        return entries
+    data = request.get_json(silent=True)
+    if not isinstance(data, list):
+        transactions_ns.abort(400, 'Request body must be a JSON array or NDJSON.')
+    return data
+
+transaction_list_parser = transactions_ns.parser()
+transaction_list_parser.add_argument('limit', type=inputs.positive, location='args',
+                                     help='Maximum number of transactions to return')
+transaction_list_parser.add_argument('after', type=str, location='args',
+                                     help='Cursor returned in the X-Next-Cursor header of the previous page')
+transaction_list_parser.add_argument('date_from', type=inputs.date_from_iso8601, location='args',
+                                     help='Only transactions on or after this date (YYYY-MM-DD)')
+transaction_list_parser.add_argument('date_to', type=inputs.date_from_iso8601, location='args',
+                                     help='Only transactions on or before this date (YYYY-MM-DD)')
+transaction_list_parser.add_argument('debit_account_id', type=int, location='args',
+                                     help='Only transactions debiting this account')
+transaction_list_parser.add_argument('credit_account_id', type=int, location='args',
+                                     help='Only transactions crediting this account')
+transaction_list_parser.add_argument('amount_min', type=float, location='args',
+                                     help='Only transactions with an amount of at least this value')
+transaction_list_parser.add_argument('amount_max', type=float, location='args',
+                                     help='Only transactions with an amount of at most this value')
+
+def filtered_transactions_query(args, *columns):
+    """
+    Build the keyset-ordered SELECT for the transaction list, with every
+    filter pushed into SQL. Selects `columns`, or whole Transaction objects
+    when none are given.
+    """
+    query = db.select(*(columns or [Transaction]))
+    if args.get('date_from') is not None:
+        query = query.filter(Transaction.date >= args['date_from'])
+    if args.get('date_to') is not None:
+        query = query.filter(Transaction.date <= args['date_to'])
+    if args.get('debit_account_id') is not None:
+        query = query.filter(Transaction.debit_account_id == args['debit_account_id'])
+    if args.get('credit_account_id') is not None:
+        query = query.filter(Transaction.credit_account_id == args['credit_account_id'])
+    if args.get('amount_min') is not None:
+        query = query.filter(Transaction.amount >= args['amount_min'])
+    if args.get('amount_max') is not None:
+        query = query.filter(Transaction.amount <= args['amount_max'])
+    if args.get('after'):
+        after_date, after_id = decode_cursor(args['after'])
+        query = query.filter(tuple_(Transaction.date, Transaction.id) > tuple_(after_date, after_id))
+    return query.order_by(Transaction.date, Transaction.id)
+
 @transactions_ns.route('/')
 class TransactionList(Resource):
-    @transactions_ns.marshal_list_with(transaction_model)
+    @query_budget(max_queries=3)
+    @transactions_ns.expect(transaction_list_parser)
+    @transactions_ns.response(200, 'Success', [transaction_model])
+    @transactions_ns.response(400, 'Invalid cursor')
     @login_required
     def get(self):
-        """List all transactions"""
-        transactions = Transaction.query.all()
-        return transactions, 200
+        """List transactions one page at a time, ordered by date and ID"""
+        args = transaction_list_parser.parse_args()
+        limit = min(args['limit'] or current_app.config['TRANSACTIONS_PAGE_SIZE'],
+                    current_app.config['TRANSACTIONS_PAGE_SIZE_MAX'])
+        try:
+            query = filtered_transactions_query(args, *transaction_serializer.columns(Transaction))
+        except ValueError:
+            transactions_ns.abort(400, 'Invalid cursor.')
+
+        # Fetch one extra row to learn whether another page follows
+        rows = db.session.execute(query.limit(limit + 1)).all()
+        headers = {}
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last = rows[-1]
+            next_cursor = encode_cursor(last.date, last.id)
+            next_args = {key: value for key, value in request.args.items() if key != 'after'}
+            next_url = url_for('api.transactions_transaction_list', after=next_cursor, **next_args)
+            headers['X-Next-Cursor'] = next_cursor
+            headers['Link'] = f'<{next_url}>; rel="next"'
+        return transaction_serializer.serialize(rows), 200, headers
 
     @transactions_ns.expect(transaction_model, validate=True)
-    @transactions_ns.marshal_with(transaction_model, code=201)
+    @transactions_ns.marshal_with(created_transaction_model, code=201)
     @login_required
     def post(self):
         """Create a new transaction"""
@@ -48,32 +185,120 @@ class TransactionList(Resource):
             transactions_ns.abort(400, 'All fields are required.')
 
         # Validate accounts exist
-        debit_account = db.session.get(Account, data['debit_account_id'])
-        credit_account = db.session.get(Account, data['credit_account_id'])
-        if not debit_account or not credit_account:
+        if get_account_directory().missing([data['debit_account_id'], data['credit_account_id']]):
             transactions_ns.abort(400, 'Invalid debit or credit account ID.')
 
         # Parse and validate date
         try:
-            date = parser.isoparse(data['date'])
+            transaction_date = parser.isoparse(data['date'])
         except (ValueError, TypeError):
             transactions_ns.abort(400, 'Invalid date format.')
 
+        # Scored on the categorizer thread while the transaction is written
+        categorizer = get_categorizer()
+        pending_suggestion = categorizer.submit(data['description'], data['amount'], transaction_date,
+                                                data['debit_account_id'], data['credit_account_id'])
+
         new_transaction = Transaction(
-            date=date,
+            date=transaction_date,
             amount=data['amount'],
             description=data['description'],
             debit_account_id=data['debit_account_id'],
             credit_account_id=data['credit_account_id']
         )
         db.session.add(new_transaction)
+        balances.post(new_transaction)
+        ledger_version.bump()
         db.session.commit()
+        get_ledger_cache().record_insert(new_transaction)
+        suggestion = categorizer.result(pending_suggestion)
+        # Not a column: only marshalled into this response
+        new_transaction.suggestion = suggestion._asdict() if suggestion else None
         return new_transaction, 201
 
+@transactions_ns.route('/batch')
+class TransactionBatch(Resource):
+    # Three statements per chunk of TRANSACTIONS_BATCH_CHUNK_SIZE entries
+    @query_budget(max_queries=UNLIMITED, max_repeats=UNLIMITED)
+    @transactions_ns.marshal_with(batch_result_model)
+    @transactions_ns.response(400, 'Malformed request body')
+    @login_required
+    def post(self):
+        """Create many transactions from a JSON array or NDJSON body"""
+        entries = read_batch_entries()
+        errors = []
+        rows = []
+
+        for index, entry in enumerate(entries):
+            if not isinstance(entry, dict):
+                errors.append({'index': index, 'message': 'Entry must be a JSON object.'})
+                continue
+            error = best_match(transaction_validator.iter_errors(entry))
+            if error is not None:
+                errors.append({'index': index, 'message': error.message})
+                continue
+            try:
+                entry_date = parse_transaction_date(entry['date'])
+            except (ValueError, TypeError, OverflowError):
+                errors.append({'index': index, 'message': 'Invalid date format.'})
+                continue
+            rows.append((index, {
+                'date': entry_date,
+                'amount': entry['amount'],
+                'description': entry['description'],
+                'debit_account_id': entry['debit_account_id'],
+                'credit_account_id': entry['credit_account_id']
+            }))
+
+        # Check every referenced account against the account directory at once
+        account_ids = {row['debit_account_id'] for _, row in rows} | {row['credit_account_id'] for _, row in rows}
+        missing_ids = get_account_directory().missing(account_ids)
+        valid_rows = []
+        for index, row in rows:
+            if row['debit_account_id'] in missing_ids or row['credit_account_id'] in missing_ids:
+                errors.append({'index': index, 'message': 'Invalid debit or credit account ID.'})
+            else:
+                valid_rows.append((index, row))
+
+        created = 0
+        chunk_size = current_app.config['TRANSACTIONS_BATCH_CHUNK_SIZE']
+        for start in range(0, len(valid_rows), chunk_size):
+            chunk = valid_rows[start:start + chunk_size]
+            try:
+                # The cache entries come back from RETURNING itself: asking for the
+                # rows in parameter order would make SQLite insert them one by one
+                inserted = db.session.execute(
+                    db.insert(Transaction).returning(
+                        Transaction.id, Transaction.date, Transaction.amount, Transaction.debit_account_id,
+                        Transaction.credit_account_id, Transaction.description, Transaction.version),
+                    [row for _, row in chunk]).mappings().all()
+                balances.post_entries([(row['debit_account_id'], row['credit_account_id'], row['amount'])
+                                       for _, row in chunk])
+                ledger_version.bump()
+                event_bus.record(db.session, 'transaction', event_bus.CREATED, inserted)
+                db.session.commit()
+                created += len(chunk)
+                get_ledger_cache().record_entries([
+                    (row['id'], row['date'], row['amount'], row['debit_account_id'], row['credit_account_id'])
+                    for row in inserted
+                ])
+            except SQLAlchemyError:
+                db.session.rollback()
+                errors.extend({'index': index, 'message': 'Database error.'} for index, _ in chunk)
+
+        errors.sort(key=lambda error: error['index'])
+        return {'created': created, 'failed': len(errors), 'errors': errors}, 200
+
+def transaction_etag(resource, id):
+    # One primary-key read of the version column, the only query of a 304
+    version = db.session.execute(db.select(Transaction.version).filter_by(id=id)).scalar()
+    return f'transaction-{id}-{version}' if version is not None else None
+
 @transactions_ns.route('/<int:id>')
 @transactions_ns.response(404, 'Transaction not found')
 @transactions_ns.param('id', 'The transaction identifier')
 class TransactionResource(Resource):
+    @etag(transaction_etag)
     @transactions_ns.marshal_with(transaction_model)
     @login_required
     def get(self, id):
@@ -92,6 +317,7 @@ class TransactionResource(Resource):
         if not transaction:
             transactions_ns.abort(404, 'Transaction not found')
         data = request.json
+        old_entry = (transaction.debit_account_id, transaction.credit_account_id, transaction.amount)
 
         if 'date' in data:
             try:
@@ -106,18 +332,19 @@ class TransactionResource(Resource):
             transaction.description = data['description']
 
         if 'debit_account_id' in data:
-            debit_account = db.session.get(Account, data['debit_account_id'])
-            if not debit_account:
+            if get_account_directory().missing([data['debit_account_id']]):
                 transactions_ns.abort(400, 'Invalid debit account ID.')
             transaction.debit_account_id = data['debit_account_id']
 
         if 'credit_account_id' in data:
-            credit_account = db.session.get(Account, data['credit_account_id'])
-            if not credit_account:
+            if get_account_directory().missing([data['credit_account_id']]):
                 transactions_ns.abort(400, 'Invalid credit account ID.')
             transaction.credit_account_id = data['credit_account_id']
 
+        balances.repost(old_entry, transaction)
+        ledger_version.bump()
         db.session.commit()
+        get_ledger_cache().record_update(transaction)
         return transaction, 200
 
     @transactions_ns.response(204, 'Transaction deleted')
@@ -127,6 +354,9 @@ class TransactionResource(Resource):
         transaction = db.session.get(Transaction, id)
         if not transaction:
             transactions_ns.abort(404, 'Transaction not found')
+        balances.unpost(transaction)
         db.session.delete(transaction)
+        ledger_version.bump()
         db.session.commit()
+        get_ledger_cache().record_delete(id)
         return '', 204
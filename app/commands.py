@@ -0,0 +1,107 @@
+# app/commands.py
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from modules.database.db import db
+from modules.database.sqlite import sqlite_settings, checkpoint, CHECKPOINT_MODES
+from modules.services import balances
+from modules.services.jobs import get_jobs
+from modules.ml.models.registry import get_model_registry, ModelNotFound
+
+balances_cli = AppGroup('balances', help='Maintain the account_balances table.')
+sqlite_cli = AppGroup('sqlite', help='Inspect and maintain the SQLite database.')
+jobs_cli = AppGroup('jobs', help='Maintain background job results.')
+models_cli = AppGroup('models', help='Inspect and activate model versions.')
+
+def _report_drift(drift):
+    for account_id, (have_debit, have_credit), (want_debit, want_credit) in drift:
+        click.echo(f'Account {account_id}: stored Dr {have_debit} Cr {have_credit}, '
+                   f'ledger Dr {want_debit} Cr {want_credit}')
+
+@balances_cli.command('check')
+def check_balances():
+    """Compare stored balances with the ledger and report any drift."""
+    drift = balances.find_drift()
+    _report_drift(drift)
+    if drift:
+        raise click.ClickException(f'{len(drift)} account balance(s) have drifted from the ledger.')
+    click.echo('Account balances match the ledger.')
+
+@balances_cli.command('rebuild')
+def rebuild_balances():
+    """Recompute every account balance from the ledger."""
+    drift = balances.find_drift()
+    _report_drift(drift)
+    balances.rebuild()
+    db.session.commit()
+    click.echo(f'Rebuilt account balances ({len(drift)} drifted account(s) corrected).')
+
+@sqlite_cli.command('status')
+def sqlite_status():
+    """Show the SQLite settings active on a pooled connection."""
+    for name, value in sqlite_settings().items():
+        click.echo(f'{name}: {value}')
+
+@sqlite_cli.command('checkpoint')
+@click.option('--mode', type=click.Choice(CHECKPOINT_MODES, case_sensitive=False), default='PASSIVE',
+              show_default=True, help='SQLite checkpoint mode; TRUNCATE also empties the WAL file.')
+def sqlite_checkpoint(mode):
+    """Copy the write-ahead log back into the database file."""
+    busy, wal_frames, checkpointed = checkpoint(mode.upper())
+    click.echo(f'Checkpoint {mode.upper()}: {checkpointed} of {wal_frames} WAL frames copied'
+               + (' (blocked by an active reader or writer)' if busy else '') + '.')
+
+@jobs_cli.command('cleanup')
+@click.option('--max-age', type=int, default=None,
+              help='Delete results older than this many seconds (default: JOBS_RESULT_TTL).')
+def jobs_cleanup(max_age):
+    """Delete old job results from the result directory."""
+    removed = get_jobs().cleanup(max_age)
+    click.echo(f'Removed {removed} job result(s).')
+
+@models_cli.command('list')
+def models_list():
+    """List the published models and their versions."""
+    registry = get_model_registry()
+    for name in registry.models():
+        current = registry.current_version(name)
+        versions = ', '.join(f'{v}*' if v == current else str(v) for v in registry.versions(name))
+        click.echo(f'{name}: {versions}')
+
+@models_cli.command('train')
+@click.option('--name', default=None, help='Registry name of the model (default: categorizer).')
+@click.option('--chunk-size', type=int, default=None,
+              help='Transactions per chunk (default: ML_TRAINING_CHUNK_SIZE).')
+@click.option('--workers', type=int, default=None,
+              help='Feature worker processes (default: ML_TRAINING_WORKERS).')
+@click.option('--no-activate', is_flag=True, help='Publish the version without serving it.')
+def models_train(name, chunk_size, workers, no_activate):
+    """Train the account categorizer on the ledger and publish it to the registry."""
+    # Imported here: the training code loads NumPy, which the CLI does not need otherwise
+    from modules.ml.training.categorizer import train_categorizer, CATEGORIZER_MODEL
+    config = current_app.config
+    registry = get_model_registry()
+    name = name or CATEGORIZER_MODEL
+    version = train_categorizer(
+        registry, name,
+        chunk_size=chunk_size or config.get('ML_TRAINING_CHUNK_SIZE', 5000),
+        workers=workers if workers is not None else config.get('ML_TRAINING_WORKERS'),
+        activate=not no_activate
+    )
+    if version is None:
+        raise click.ClickException('There are no transactions to train on.')
+    model = registry.get(name, version)
+    click.echo(f"Published {name} version {version}: {model.metadata['trained_rows']} transaction(s), "
+               f"{model.metadata['classes']} account pair(s), {model.metadata['training_seconds']} s.")
+
+@models_cli.command('activate')
+@click.argument('name')
+@click.argument('version', type=int)
+def models_activate(name, version):
+    """Serve VERSION of model NAME by default; running workers switch on their next request."""
+    try:
+        get_model_registry().activate(name, version)
+    except ModelNotFound as e:
+        raise click.ClickException(str(e))
+    click.echo(f'Model {name} now serves version {version}.')
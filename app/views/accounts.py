@@ -4,10 +4,31 @@ from flask import Blueprint, render_template, redirect, url_for, flash, request,
 from modules.forms.account_form import AccountForm
 from modules.models.account import Account
 from modules.database.db import db
+from modules.services import balances, ledger_version
+from modules.services.account_directory import get_account_directory
 from flask_login import login_required
+from sqlalchemy.exc import IntegrityError
 
 bp = Blueprint('accounts', __name__, url_prefix='/accounts')
 
+def commit_account_change(form):
+    """
+    Bump the ledger version and commit an account write. False when
+    another worker took the name after the form's directory check; the
+    error is then on the form.
+    """
+    try:
+        # bump() flushes the account first, so it can raise the IntegrityError too
+        ledger_version.bump()
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        form.name.errors.append('Account name already exists.')
+        return False
+    finally:
+        get_account_directory().invalidate()
+    return True
+
 @bp.route('/', methods=['GET'])
 @login_required
 def list_accounts():
@@ -24,9 +45,9 @@ def new_account():
             type=form.type.data
         )
         db.session.add(account)
-        db.session.commit()
-        flash('Account created successfully.', 'success')
-        return redirect(url_for('accounts.list_accounts'))
+        if commit_account_change(form):
+            flash('Account created successfully.', 'success')
+            return redirect(url_for('accounts.list_accounts'))
     return render_template('account_form.html', form=form, title='Create Account')
 
 @bp.route('/<int:account_id>/edit', methods=['GET', 'POST'])
@@ -38,14 +59,14 @@ def edit_account(account_id):
         abort(404)
     form = AccountForm(obj=account)
     if form.validate_on_submit():
-        if Account.query.filter(Account.name == form.name.data, Account.id != account.id).first():
+        if get_account_directory().id_for_name(form.name.data) not in (None, account.id):
             form.name.errors.append('Account name already exists.')
         else:
             account.name = form.name.data
             account.type = form.type.data
-            db.session.commit()
-            flash('Account updated successfully.', 'success')
-            return redirect(url_for('accounts.list_accounts'))
+            if commit_account_change(form):
+                flash('Account updated successfully.', 'success')
+                return redirect(url_for('accounts.list_accounts'))
     return render_template('account_form.html', form=form, title='Edit Account')
 
 @bp.route('/<int:account_id>/delete', methods=['GET', 'POST'])
@@ -56,8 +77,11 @@ def delete_account(account_id):
     if not account:
         abort(404)
     if request.method == 'POST':
+        balances.forget_account(account.id)
         db.session.delete(account)
+        ledger_version.bump()
         db.session.commit()
+        get_account_directory().invalidate()
         flash('Account deleted successfully.', 'success')
         return redirect(url_for('accounts.list_accounts'))
     return render_template('account_confirm_delete.html', account=account)
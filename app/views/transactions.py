@@ -3,22 +3,39 @@
 from flask import Blueprint, render_template, redirect, url_for, flash, request
 from modules.forms.transaction_form import TransactionForm
 from modules.models.transaction import Transaction
-from modules.models.account import Account
 from modules.database.db import db
+from modules.services import balances, ledger_version
+from modules.services.ledger_cache import get_ledger_cache
+from modules.services.account_directory import get_account_directory
+from modules.services.categorization import get_categorizer
+from modules.services.query_budget import query_budget
 from sqlalchemy.exc import IntegrityError
 from flask_login import login_required
 
 bp = Blueprint('transactions', __name__, url_prefix='/transactions')
 
+def suggestion_message(suggestion):
+    directory = get_account_directory()
+    debit = directory.get(suggestion.debit_account_id)
+    credit = directory.get(suggestion.credit_account_id)
+    names = [entry[0] if entry else f'#{account_id}' for entry, account_id in
+             ((debit, suggestion.debit_account_id), (credit, suggestion.credit_account_id))]
+    return f'Transactions like this one are usually booked to debit {names[0]} and credit {names[1]}.'
+
 @bp.route('/new', methods=['GET', 'POST'])
 @login_required
 def new_transaction():
     form = TransactionForm()
     # Populate account choices
-    form.debit_account.choices = [(account.id, account.name) for account in Account.query.all()]
-    form.credit_account.choices = [(account.id, account.name) for account in Account.query.all()]
+    choices = get_account_directory().choices()
+    form.debit_account.choices = list(choices)
+    form.credit_account.choices = list(choices)
     
     if form.validate_on_submit():
+        # Scored on the categorizer thread while the transaction is written
+        categorizer = get_categorizer()
+        pending_suggestion = categorizer.submit(form.description.data, form.amount.data, form.date.data,
+                                                form.debit_account.data, form.credit_account.data)
         transaction = Transaction(
             date=form.date.data,
             amount=form.amount.data,
@@ -28,8 +45,15 @@ def new_transaction():
         )
         db.session.add(transaction)
         try:
+            balances.post(transaction)
+            ledger_version.bump()
             db.session.commit()
+            get_ledger_cache().record_insert(transaction)
             flash('Transaction created successfully.', 'success')
+            suggestion = categorizer.result(pending_suggestion)
+            if suggestion and (suggestion.debit_account_id, suggestion.credit_account_id) != \
+                    (transaction.debit_account_id, transaction.credit_account_id):
+                flash(suggestion_message(suggestion), 'info')
             return redirect(url_for('transactions.list_transactions'))
         except IntegrityError:
             db.session.rollback()
@@ -39,6 +63,7 @@ def new_transaction():
 
 @bp.route('/', methods=['GET'])
 @login_required
+@query_budget(max_queries=2)
 def list_transactions():
     transactions = Transaction.query.all()
     return render_template('transaction_list.html', transactions=transactions)
@@ -10,13 +10,124 @@ class Config:
     
     SQLALCHEMY_TRACK_MODIFICATIONS = False
 
+    # Page sizes for keyset-paginated list endpoints
+    TRANSACTIONS_PAGE_SIZE = 100
+    TRANSACTIONS_PAGE_SIZE_MAX = 1000
+
+    # Rows inserted and committed together by POST /api/transactions/batch
+    TRANSACTIONS_BATCH_CHUNK_SIZE = 1000
+
+    # In-memory columnar ledger used by the analytics reports
+    LEDGER_CACHE_ENABLED = True
+    LEDGER_CACHE_MAX_BYTES = 256 * 1024 * 1024
+
+    # Seconds before the account directory reloads changes made by other workers
+    ACCOUNT_DIRECTORY_TTL = 60
+
+    # Identities of logged-in users kept in memory between requests
+    USER_CACHE_ENABLED = True
+    USER_CACHE_SIZE = 1024
+    USER_CACHE_TTL = 300
+
+    # Lifetime in seconds of bearer tokens issued by /api/auth/token
+    API_TOKEN_MAX_AGE = 3600
+
+    # PRAGMA name -> value applied to every new SQLite connection
+    SQLITE_PRAGMAS = {}
+
+    # Serve GET requests from a read-only connection (the primary file opened
+    # with mode=ro, or SQLALCHEMY_READ_DATABASE_URI such as a replica file)
+    READ_ROUTING = True
+    SQLALCHEMY_READ_DATABASE_URI = None
+
+    # Background report jobs: worker threads, where results are written and
+    # seconds before finished jobs and their results are cleaned up
+    JOBS_MAX_WORKERS = 2
+    JOBS_RESULT_DIR = os.path.join(basedir, 'data', 'jobs')
+    JOBS_RESULT_TTL = 24 * 3600
+
+    # Per-request SQL and timing figures: a Server-Timing header on every
+    # response and per-endpoint histograms at /metrics (Prometheus text format).
+    # /metrics is served to admins, and to scrapers sending this token as
+    # "Authorization: Bearer <token>" when it is set
+    INSTRUMENTATION_ENABLED = False
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+
+    # Query budget checked on every request: None (off), 'warn' (log a
+    # warning, for staging) or 'raise' (fail the request, for tests). Views
+    # declare their own limits with @query_budget; these are the defaults
+    QUERY_BUDGET_MODE = None
+    QUERY_BUDGET_MAX_QUERIES = 10
+    QUERY_BUDGET_MAX_REPEATS = 3
+
+    # Request profiler: admins profile a request with the X-Profile header or
+    # ?profile=1; PROFILER_EVERY_N_REQUESTS = N also fully profiles every Nth
+    # request (0 = never). The newest PROFILER_MAX_PROFILES profiles are kept
+    PROFILER_ENABLED = True
+    PROFILER_EVERY_N_REQUESTS = 0
+    PROFILER_DIR = os.path.join(basedir, 'data', 'profiles')
+    PROFILER_MAX_PROFILES = 200
+
+    # Import the plugins listed in modules/plugins/manifest.json on their
+    # first request instead of at startup
+    PLUGINS_LAZY = True
+
+    # Ledger event bus: worker threads calling subscribers, events queued per
+    # subscriber, events per handler call and seconds a batch waits to fill,
+    # and how long a commit waits for room under the "block" policy
+    EVENT_BUS_MAX_WORKERS = 2
+    EVENT_BUS_MAX_QUEUE = 10000
+    EVENT_BUS_BATCH_SIZE = 100
+    EVENT_BUS_BATCH_WAIT = 0.01
+    EVENT_BUS_BLOCK_TIMEOUT = 0.1
+
+    # Model registry: versioned artifacts with memory-mapped weights, and the
+    # bytes of weights a process keeps mapped before dropping the least
+    # recently used model
+    ML_MODELS_DIR = os.path.join(basedir, 'data', 'models')
+    ML_MODELS_MAX_BYTES = 512 * 1024 * 1024
+
+    # `flask models train`: transactions read and featurized per chunk, and
+    # feature worker processes (None = one per CPU, 0 = in the CLI process)
+    ML_TRAINING_CHUNK_SIZE = 5000
+    ML_TRAINING_WORKERS = None
+
+    # Account suggestions for new transactions from the CATEGORIZER_MODEL
+    # registry model. Concurrent requests share one model call: a batch is
+    # scored after CATEGORIZER_MAX_WAIT seconds or once it holds
+    # CATEGORIZER_MAX_BATCH transactions (a longer wait trades latency for
+    # bigger batches). A request waits at most CATEGORIZER_TIMEOUT seconds
+    # and goes without a suggestion when the model is missing or slow
+    CATEGORIZER_ENABLED = True
+    CATEGORIZER_MODEL = 'categorizer'
+    CATEGORIZER_MAX_BATCH = 64
+    CATEGORIZER_MAX_WAIT = 0.005
+    CATEGORIZER_TIMEOUT = 0.25
+
 class DevelopmentConfig(Config):
     DEBUG = True
 
 class ProductionConfig(Config):
     DEBUG = False
 
+    # WAL lets readers run alongside the single writer; writers wait up to
+    # busy_timeout ms for the lock instead of failing with "database is locked"
+    SQLITE_PRAGMAS = {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'mmap_size': 256 * 1024 * 1024,
+        'cache_size': -64 * 1024,  # Negative values are KiB: 64 MiB per connection
+        'busy_timeout': 5000,
+        'temp_store': 'MEMORY',
+    }
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        'pool_size': 8,
+        'max_overflow': 8,
+        'pool_timeout': 10,
+    }
+
 class TestingConfig(Config):
     TESTING = True
     SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'  # In-memory DB for testing
     WTF_CSRF_ENABLED = False  # Disable CSRF for testing
+    QUERY_BUDGET_MODE = 'raise'  # Fails any test whose requests exceed their query budget
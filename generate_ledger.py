@@ -0,0 +1,57 @@
+# generate_ledger.py
+
+import argparse
+import time
+from datetime import date
+import config
+from app import create_app
+from modules.database.db import db
+from modules.services.ledger_generator import generate_ledger, DATE_DISTRIBUTIONS
+
+parser = argparse.ArgumentParser(description='Seed a database with a generated, balanced ledger.')
+parser.add_argument('--transactions', type=int, default=1000000, help='Number of transactions to add')
+parser.add_argument('--accounts', type=int, default=25, help='Size of the chart of accounts')
+parser.add_argument('--seed', type=int, default=0, help='Random seed; the same seed gives the same ledger')
+parser.add_argument('--start', type=date.fromisoformat, default=date(2021, 1, 1), help='First date (YYYY-MM-DD)')
+parser.add_argument('--end', type=date.fromisoformat, default=date(2024, 12, 31), help='Last date (YYYY-MM-DD)')
+parser.add_argument('--date-distribution', choices=DATE_DISTRIBUTIONS, default='uniform',
+                    help='How transactions spread over the date range')
+parser.add_argument('--amount-median', type=float, default=120.0, help='Median transaction amount')
+parser.add_argument('--amount-skew', type=float, default=1.0,
+                    help='Spread of the log-normal amounts; larger values give a longer tail of big amounts')
+parser.add_argument('--vocabulary', type=argparse.FileType('r'),
+                    help='File with one description word per line, most frequent first')
+parser.add_argument('--uri', help='Target database URI (default: the app database, data/app.db)')
+args = parser.parse_args()
+
+class GeneratorConfig(config.Config):
+    if args.uri:
+        SQLALCHEMY_DATABASE_URI = args.uri
+
+app = create_app(GeneratorConfig)
+
+with app.app_context():
+    # Creates the tables of an empty target; existing tables are left alone
+    db.create_all()
+    vocabulary = [line.strip() for line in args.vocabulary if line.strip()] if args.vocabulary else None
+    started = time.perf_counter()
+
+    def report(done, total):
+        elapsed = time.perf_counter() - started
+        print(f'{done}/{total} transactions ({done / elapsed:,.0f} rows/s)', end='\r', flush=True)
+
+    generate_ledger(
+        args.transactions,
+        accounts=args.accounts,
+        seed=args.seed,
+        start=args.start,
+        end=args.end,
+        date_distribution=args.date_distribution,
+        amount_median=args.amount_median,
+        amount_skew=args.amount_skew,
+        vocabulary=vocabulary,
+        progress=report
+    )
+    elapsed = time.perf_counter() - started
+    print(f'\nGenerated {args.transactions} transactions over {args.accounts} accounts '
+          f'in {elapsed:.1f} s ({args.transactions / elapsed:,.0f} rows/s).')
@@ -0,0 +1,39 @@
+"""Add account_balances table
+
+Revision ID: 9c1d2e7f4a10
+Revises: 4754bb485e92
+Create Date: 2026-10-18 09:12:40.118325
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9c1d2e7f4a10'
+down_revision = '4754bb485e92'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('account_balances',
+    sa.Column('account_id', sa.Integer(), nullable=False),
+    sa.Column('debit_total', sa.Float(), nullable=False),
+    sa.Column('credit_total', sa.Float(), nullable=False),
+    sa.ForeignKeyConstraint(['account_id'], ['accounts.id'], ),
+    sa.PrimaryKeyConstraint('account_id')
+    )
+    # Backfill from the existing ledger in one aggregate pass
+    op.execute("""
+        INSERT INTO account_balances (account_id, debit_total, credit_total)
+        SELECT account_id, SUM(debit), SUM(credit) FROM (
+            SELECT debit_account_id AS account_id, amount AS debit, 0.0 AS credit FROM transactions
+            UNION ALL
+            SELECT credit_account_id AS account_id, 0.0 AS debit, amount AS credit FROM transactions
+        ) GROUP BY account_id
+    """)
+
+
+def downgrade():
+    op.drop_table('account_balances')
@@ -0,0 +1,29 @@
+"""Add transaction indexes
+
+Revision ID: b7e3f1a9c2d4
+Revises: 9c1d2e7f4a10
+Create Date: 2026-10-18 11:40:03.527914
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7e3f1a9c2d4'
+down_revision = '9c1d2e7f4a10'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('transactions', schema=None) as batch_op:
+        batch_op.create_index('ix_transactions_debit_account_id_date', ['debit_account_id', 'date', 'id', 'amount'], unique=False)
+        batch_op.create_index('ix_transactions_credit_account_id_date', ['credit_account_id', 'date', 'id', 'amount'], unique=False)
+        batch_op.create_index('ix_transactions_date_id', ['date', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('transactions', schema=None) as batch_op:
+        batch_op.drop_index('ix_transactions_date_id')
+        batch_op.drop_index('ix_transactions_credit_account_id_date')
+        batch_op.drop_index('ix_transactions_debit_account_id_date')
@@ -0,0 +1,39 @@
+"""Add ledger version counter and row versions
+
+Revision ID: d4a8c6e2f1b3
+Revises: b7e3f1a9c2d4
+Create Date: 2026-10-18 14:05:22.640197
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd4a8c6e2f1b3'
+down_revision = 'b7e3f1a9c2d4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('ledger_version',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('accounts', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+
+    with op.batch_alter_table('transactions', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade():
+    with op.batch_alter_table('transactions', schema=None) as batch_op:
+        batch_op.drop_column('version')
+
+    with op.batch_alter_table('accounts', schema=None) as batch_op:
+        batch_op.drop_column('version')
+
+    op.drop_table('ledger_version')
@@ -0,0 +1,25 @@
+"""Add transaction amount index
+
+Revision ID: e5f1b2c3d4a6
+Revises: d4a8c6e2f1b3
+Create Date: 2026-10-18 16:05:12.418306
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'e5f1b2c3d4a6'
+down_revision = 'd4a8c6e2f1b3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('transactions', schema=None) as batch_op:
+        batch_op.create_index('ix_transactions_amount_date_id', ['amount', 'date', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('transactions', schema=None) as batch_op:
+        batch_op.drop_index('ix_transactions_amount_date_id')
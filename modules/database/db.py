@@ -1,4 +1,5 @@
 # modules/database/db.py
 from flask_sqlalchemy import SQLAlchemy
+from modules.database.routing import RoutingSession
 
-db = SQLAlchemy()
\ No newline at end of file
+db = SQLAlchemy(session_options={'class_': RoutingSession})
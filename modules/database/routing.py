@@ -0,0 +1,79 @@
+# modules/database/routing.py
+
+from contextlib import contextmanager
+from flask import current_app, has_app_context, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+
+# HTTP methods whose requests run on the read-only engine
+READ_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+class RoutingSession(Session):
+    """
+    Session that sends every statement to the read-only engine while its
+    info['read_only'] flag is set, and to the primary engine otherwise.
+    Writes attempted while the flag is set fail in SQLite with "attempt to
+    write a readonly database".
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and self.info.get('read_only') and has_app_context():
+            engine = current_app.extensions.get('read_engine')
+            if engine is not None:
+                return engine
+        return super().get_bind(mapper, clause, bind, **kwargs)
+
+def read_database_uri(app):
+    """
+    The URI of the read-only database: SQLALCHEMY_READ_DATABASE_URI when set
+    (e.g. a replica file), otherwise the primary SQLite file opened with
+    mode=ro. None for in-memory databases, which cannot be shared.
+    """
+    if app.config.get('SQLALCHEMY_READ_DATABASE_URI'):
+        return app.config['SQLALCHEMY_READ_DATABASE_URI']
+    url = make_url(app.config['SQLALCHEMY_DATABASE_URI'])
+    if url.get_backend_name() != 'sqlite' or url.database in (None, '', ':memory:') \
+            or url.database.startswith('file:'):
+        return None
+    return f'sqlite:///file:{url.database}?mode=ro&uri=true'
+
+def init_read_routing(app, db):
+    """
+    Create the read-only engine and route GET/HEAD/OPTIONS requests to it
+    when READ_ROUTING is on and the database can be opened twice.
+    """
+    from modules.database.sqlite import apply_pragmas
+
+    app.extensions['read_engine'] = None
+    uri = read_database_uri(app) if app.config.get('READ_ROUTING') else None
+    if uri is None:
+        return
+    engine = create_engine(uri, **app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {}))
+    # The journal mode belongs to the database file and is set by the writer
+    pragmas = {name: value for name, value in app.config.get('SQLITE_PRAGMAS', {}).items()
+               if name != 'journal_mode'}
+    apply_pragmas(engine, pragmas)
+    app.extensions['read_engine'] = engine
+
+    @app.before_request
+    def route_reads():
+        if request.method in READ_METHODS:
+            db.session.info['read_only'] = True
+
+    @app.teardown_request
+    def end_read_routing(exc):
+        db.session.info.pop('read_only', None)
+
+@contextmanager
+def read_only(session):
+    """Run the enclosed queries of a session on the read-only engine."""
+    previous = session.info.get('read_only')
+    session.info['read_only'] = True
+    try:
+        yield session
+    finally:
+        if previous is None:
+            session.info.pop('read_only', None)
+        else:
+            session.info['read_only'] = previous
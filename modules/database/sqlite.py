@@ -0,0 +1,54 @@
+# modules/database/sqlite.py
+
+from functools import partial
+from sqlalchemy import event
+from modules.database.db import db
+
+# Settings reported by `flask sqlite status`
+REPORTED_PRAGMAS = ('journal_mode', 'synchronous', 'mmap_size', 'cache_size',
+                    'busy_timeout', 'page_size', 'wal_autocheckpoint', 'foreign_keys')
+
+CHECKPOINT_MODES = ('PASSIVE', 'FULL', 'RESTART', 'TRUNCATE')
+
+def _apply_pragmas(pragmas, dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    for name, value in pragmas.items():
+        cursor.execute(f'PRAGMA {name}={value}')
+    cursor.close()
+
+def apply_pragmas(engine, pragmas):
+    """Run PRAGMA name=value for each pragma on every new connection of an SQLite engine."""
+    if pragmas and engine.dialect.name == 'sqlite':
+        event.listen(engine, 'connect', partial(_apply_pragmas, pragmas))
+
+def init_sqlite(app):
+    """
+    Apply the SQLITE_PRAGMAS config to every new connection of the app's
+    SQLite engines.
+    """
+    with app.app_context():
+        engines = list(db.engines.values())
+    for engine in engines:
+        apply_pragmas(engine, app.config.get('SQLITE_PRAGMAS'))
+
+def sqlite_settings(engine=None):
+    """The pragma values and pool state seen by a connection of the engine."""
+    engine = engine or db.engine
+    with engine.connect() as connection:
+        settings = {
+            name: connection.exec_driver_sql(f'PRAGMA {name}').scalar()
+            for name in REPORTED_PRAGMAS
+        }
+    settings['pool'] = engine.pool.status()
+    return settings
+
+def checkpoint(mode='PASSIVE', engine=None):
+    """
+    Run a WAL checkpoint. Returns (busy, wal_frames, checkpointed_frames) as
+    reported by SQLite.
+    """
+    if mode not in CHECKPOINT_MODES:
+        raise ValueError(f'Unknown checkpoint mode {mode}.')
+    engine = engine or db.engine
+    with engine.connect() as connection:
+        return tuple(connection.exec_driver_sql(f'PRAGMA wal_checkpoint({mode})').one())
@@ -3,16 +3,13 @@
 from flask_wtf import FlaskForm
 from wtforms import StringField, SelectField, SubmitField
 from wtforms.validators import DataRequired, ValidationError
-from modules.models.account import Account
+from modules.models.account import ACCOUNT_TYPES
+from modules.services.account_directory import get_account_directory
 
 class AccountForm(FlaskForm):
     name = StringField('Account Name', validators=[DataRequired()])
     type = SelectField('Account Type', choices=[
-        ('Asset', 'Asset'),
-        ('Liability', 'Liability'),
-        ('Equity', 'Equity'),
-        ('Revenue', 'Revenue'),
-        ('Expense', 'Expense')
+        (account_type, account_type) for account_type in ACCOUNT_TYPES
     ], validators=[DataRequired()])
     submit = SubmitField('Submit')
 
@@ -21,6 +18,6 @@ class AccountForm(FlaskForm):
         self._account_id = kwargs.get('obj').id if 'obj' in kwargs and kwargs.get('obj') else None
 
     def validate_name(self, field):
-        account = Account.query.filter_by(name=field.data).first()
-        if account and (self._account_id is None or account.id != self._account_id):
+        account_id = get_account_directory().id_for_name(field.data)
+        if account_id is not None and (self._account_id is None or account_id != self._account_id):
             raise ValidationError('Account name already exists.')
@@ -0,0 +1,253 @@
+# modules/ml/models/registry.py
+
+import json
+import os
+import re
+import shutil
+import tempfile
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+from flask import current_app
+
+# NumPy is imported inside the functions that read or write weights, so a
+# worker that never scores anything never loads it
+
+# Model and array names are file names in the registry; nothing else is accepted
+NAME = re.compile(r'^[A-Za-z0-9][A-Za-z0-9_.-]{0,63}$')
+
+METADATA_FILE = 'model.json'
+
+# Holds the version served when a caller names no version
+CURRENT_FILE = 'CURRENT'
+
+class ModelNotFound(LookupError):
+    """No artifact exists for the requested model name and version."""
+
+class Model:
+    """
+    One version of a model: its metadata and its arrays, memory-mapped
+    read-only from the artifact's .npy files.
+
+    Models are linear: predict(matrix) returns matrix @ weights + bias,
+    a 1-D array when weights is a vector and one column per output when it
+    is a matrix. Other arrays (e.g. labels) are kept for the model's users.
+    """
+
+    def __init__(self, name, version, metadata, arrays):
+        self.name = name
+        self.version = version
+        self.metadata = metadata
+        self.arrays = arrays
+
+    @property
+    def nbytes(self):
+        return sum(array.nbytes for array in self.arrays.values())
+
+    @property
+    def n_features(self):
+        return self.arrays['weights'].shape[0]
+
+    def predict(self, matrix):
+        if matrix.ndim != 2 or matrix.shape[1] != self.n_features:
+            raise ValueError(f'Model {self.name} version {self.version} expects '
+                             f'{self.n_features} input column(s).')
+        result = matrix @ self.arrays['weights']
+        bias = self.arrays.get('bias')
+        return result + bias if bias is not None else result
+
+    def describe(self):
+        return dict(self.metadata, name=self.name, version=self.version,
+                    n_features=int(self.n_features), bytes=int(self.nbytes))
+
+def load_model(path, name, version):
+    """Read an artifact directory; the arrays are mapped, not read into memory."""
+    import numpy as np
+    with open(os.path.join(path, METADATA_FILE)) as f:
+        metadata = json.load(f)
+    arrays = {key: np.load(os.path.join(path, f'{key}.npy'), mmap_mode='r', allow_pickle=False)
+              for key in metadata['arrays']}
+    return Model(name, version, metadata, arrays)
+
+class ModelRegistry:
+    """
+    Versioned model artifacts under `directory`:
+
+        <name>/CURRENT                 the version served by default
+        <name>/<version>/model.json    metadata, including the array names
+        <name>/<version>/<array>.npy   one file per array, e.g. weights.npy
+
+    Versions are numbered 1, 2, ... and never change once published. Each
+    model version is loaded once per process with its arrays memory-mapped
+    read-only, so every worker reading the same files shares one copy in
+    the page cache (and a model loaded before the server forks is shared
+    outright). Loaded models stay resident, least recently used first out,
+    while their arrays add up to at most max_bytes.
+
+    Publishing a version or activating an older one rewrites CURRENT
+    atomically. Every process notices on its next lookup and switches
+    without a restart; requests already holding the previous version
+    finish with it.
+    """
+
+    def __init__(self, directory, max_bytes=None):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.RLock()
+        self._resident = OrderedDict()
+        self._bytes = 0
+        # name -> ((inode, mtime) of CURRENT, version it holds)
+        self._current = {}
+        self.loads = 0
+        self.hits = 0
+        self.evictions = 0
+
+    def _path(self, name, version=None):
+        if not isinstance(name, str) or not NAME.match(name):
+            raise ModelNotFound(f'Unknown model {name}.')
+        path = os.path.join(self.directory, name)
+        return path if version is None else os.path.join(path, str(version))
+
+    # Reading
+
+    def models(self):
+        """Names of the published models."""
+        try:
+            entries = sorted(os.listdir(self.directory))
+        except FileNotFoundError:
+            return []
+        return [name for name in entries if NAME.match(name) and self.versions(name)]
+
+    def versions(self, name):
+        """Published versions of a model, oldest first."""
+        path = self._path(name)
+        try:
+            entries = os.listdir(path)
+        except FileNotFoundError:
+            return []
+        return sorted(int(entry) for entry in entries
+                      if entry.isdigit() and os.path.exists(os.path.join(path, entry, METADATA_FILE)))
+
+    def current_version(self, name):
+        """The version served when none is named: CURRENT, else the newest one."""
+        path = os.path.join(self._path(name), CURRENT_FILE)
+        try:
+            status = os.stat(path)
+        except FileNotFoundError:
+            versions = self.versions(name)
+            if not versions:
+                raise ModelNotFound(f'Unknown model {name}.')
+            return versions[-1]
+        # CURRENT is replaced, never rewritten in place, so a new inode means a new version
+        key = (status.st_ino, status.st_mtime_ns)
+        cached = self._current.get(name)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+        with open(path) as f:
+            version = int(f.read().strip())
+        self._current[name] = (key, version)
+        return version
+
+    def get(self, name, version=None):
+        """The model `name` at `version` (default: the current version)."""
+        if version is None:
+            version = self.current_version(name)
+        else:
+            try:
+                version = int(version)
+            except (TypeError, ValueError):
+                raise ModelNotFound(f'Unknown version {version} of model {name}.')
+        key = (name, version)
+        with self._lock:
+            model = self._resident.get(key)
+            if model is not None:
+                self._resident.move_to_end(key)
+                self.hits += 1
+                return model
+            path = self._path(name, version)
+            if not os.path.exists(os.path.join(path, METADATA_FILE)):
+                raise ModelNotFound(f'Unknown version {version} of model {name}.')
+            model = load_model(path, name, version)
+            self._resident[key] = model
+            self._bytes += model.nbytes
+            self.loads += 1
+            # The model just loaded is the newest entry and is never evicted itself
+            while self.max_bytes is not None and self._bytes > self.max_bytes and len(self._resident) > 1:
+                _, evicted = self._resident.popitem(last=False)
+                self._bytes -= evicted.nbytes
+                self.evictions += 1
+            return model
+
+    def stats(self):
+        """Resident models, their memory use and the cache counters."""
+        with self._lock:
+            return {
+                'resident': [f'{name}/{version}' for name, version in self._resident],
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'loads': self.loads,
+                'hits': self.hits,
+                'evictions': self.evictions
+            }
+
+    # Writing
+
+    def publish(self, name, arrays, metadata=None, activate=True):
+        """
+        Store arrays (name -> array; 'weights' is required) as the next
+        version of model `name` and return the version. The version is
+        written to a staging directory and renamed into place, so readers
+        never see a partial artifact. activate=True also makes it current.
+        """
+        import numpy as np
+        if 'weights' not in arrays:
+            raise ValueError('A model needs a weights array.')
+        for key in arrays:
+            if not NAME.match(key):
+                raise ValueError(f'Invalid array name {key}.')
+        path = self._path(name)
+        os.makedirs(path, exist_ok=True)
+        staging = tempfile.mkdtemp(prefix='.staging-', dir=path)
+        try:
+            for key, array in arrays.items():
+                np.save(os.path.join(staging, f'{key}.npy'), np.ascontiguousarray(array), allow_pickle=False)
+            with open(os.path.join(staging, METADATA_FILE), 'w') as f:
+                json.dump(dict(metadata or {}, arrays=sorted(arrays),
+                               created_at=datetime.now(timezone.utc).isoformat()), f, indent=2)
+            while True:
+                version = (self.versions(name) or [0])[-1] + 1
+                try:
+                    # Fails when another writer has just taken this number
+                    os.rename(staging, os.path.join(path, str(version)))
+                    break
+                except OSError:
+                    if not os.path.exists(os.path.join(path, str(version))):
+                        raise
+        except BaseException:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+        if activate:
+            self.activate(name, version)
+        return version
+
+    def activate(self, name, version):
+        """Serve `version` of model `name` by default from now on, in every process."""
+        version = int(version)
+        path = self._path(name)
+        if not os.path.exists(os.path.join(path, str(version), METADATA_FILE)):
+            raise ModelNotFound(f'Unknown version {version} of model {name}.')
+        fd, staging = tempfile.mkstemp(prefix='.current-', dir=path)
+        with os.fdopen(fd, 'w') as f:
+            f.write(f'{version}\n')
+        os.replace(staging, os.path.join(path, CURRENT_FILE))
+
+def init_model_registry(app):
+    """Create the model registry of an application; nothing is loaded until first use."""
+    app.extensions['model_registry'] = ModelRegistry(
+        app.config.get('ML_MODELS_DIR'),
+        max_bytes=app.config.get('ML_MODELS_MAX_BYTES')
+    )
+
+def get_model_registry():
+    """The model registry of the current application."""
+    return current_app.extensions['model_registry']
@@ -0,0 +1,144 @@
+# modules/ml/training/categorizer.py
+
+import multiprocessing
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from sqlalchemy.orm import aliased
+from modules.database.db import db
+from modules.database.routing import read_only
+from modules.models.account import Account, ACCOUNT_TYPES
+from modules.models.transaction import Transaction
+from modules.ml.training.features import Chunk, HASH_WIDTH, AMOUNT_SCALE, chunk_statistics, feature_count
+
+# Registry name of the model suggesting a transaction's accounts
+CATEGORIZER_MODEL = 'categorizer'
+
+CHUNK_SIZE = 5000
+
+def stream_chunks(chunk_size=CHUNK_SIZE):
+    """
+    Every transaction joined with its two accounts, in id order, as Chunks
+    of at most chunk_size rows. Rows are fetched chunk by chunk with
+    yield_per, so only one chunk is held at a time.
+    """
+    debit = aliased(Account)
+    credit = aliased(Account)
+    query = db.select(
+        Transaction.description, Transaction.amount, Transaction.date, debit.type, credit.type,
+        Transaction.debit_account_id, Transaction.credit_account_id
+    ).join(debit, debit.id == Transaction.debit_account_id).join(
+        credit, credit.id == Transaction.credit_account_id
+    ).order_by(Transaction.id).execution_options(yield_per=chunk_size)
+    type_index = {name: index for index, name in enumerate(ACCOUNT_TYPES)}
+    for partition in db.session.execute(query).partitions():
+        descriptions, amounts, dates, debit_types, credit_types, debit_ids, credit_ids = zip(*partition)
+        yield Chunk(
+            list(descriptions),
+            list(amounts),
+            [d.toordinal() for d in dates],
+            [type_index.get(t, -1) for t in debit_types],
+            [type_index.get(t, -1) for t in credit_types],
+            list(debit_ids),
+            list(credit_ids)
+        )
+
+def chunk_results(chunks, hash_width=HASH_WIDTH, workers=None):
+    """
+    chunk_statistics of every chunk, in order. With workers > 1 the chunks
+    are featurized on a process pool, at most two per worker in flight so
+    reading never runs ahead of the workers; workers=0 or 1 works in
+    this process.
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers <= 1:
+        for chunk in chunks:
+            yield chunk_statistics(chunk, hash_width)
+        return
+    # Spawned workers import NumPy and the feature code, which takes its
+    # account types from a module without imports rather than the models,
+    # so no database code; they inherit none of this process's threads,
+    # locks or database connections
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) as pool:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(pool.submit(chunk_statistics, chunk, hash_width))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+class CentroidAccumulator:
+    """
+    Running feature sums and row counts per (debit, credit) account pair.
+    Its size depends on the number of distinct pairs, not on the number of
+    transactions.
+    """
+
+    def __init__(self, n_features):
+        self.index = {}
+        self.labels = np.zeros((0, 2), dtype=np.int64)
+        self.sums = np.zeros((0, n_features), dtype=np.float64)
+        self.counts = np.zeros(0, dtype=np.int64)
+
+    def add(self, labels, sums, counts):
+        rows = np.array([self.index.setdefault(pair, len(self.index)) for pair in map(tuple, labels.tolist())],
+                        dtype=np.int64)
+        size = len(self.index)
+        if size > len(self.counts):
+            capacity = max(size, 2 * len(self.counts))
+            grow = capacity - len(self.counts)
+            self.labels = np.vstack([self.labels, np.zeros((grow, 2), dtype=np.int64)])
+            self.sums = np.vstack([self.sums, np.zeros((grow, self.sums.shape[1]))])
+            self.counts = np.concatenate([self.counts, np.zeros(grow, dtype=np.int64)])
+        # Pairs are distinct within a chunk, so plain fancy-index addition is safe
+        self.labels[rows] = labels
+        self.sums[rows] += sums
+        self.counts[rows] += counts
+
+    def model_arrays(self):
+        """
+        Nearest-centroid classifier as a linear model: the score of pair c
+        is x . mu_c - |mu_c|^2 / 2, highest for the closest centroid mu_c.
+        """
+        size = len(self.index)
+        centroids = self.sums[:size] / self.counts[:size, None]
+        return {
+            'weights': centroids.T.astype(np.float32),
+            'bias': (-0.5 * np.einsum('ij,ij->i', centroids, centroids)).astype(np.float32),
+            'labels': self.labels[:size],
+            'support': self.counts[:size]
+        }
+
+def train_categorizer(registry, name=CATEGORIZER_MODEL, chunk_size=CHUNK_SIZE, workers=None,
+                      hash_width=HASH_WIDTH, activate=True):
+    """
+    Train the account categorizer on the whole ledger and publish it to
+    `registry` as the next version of `name`. Returns the version, or None
+    when there are no transactions to learn from.
+    """
+    started = time.perf_counter()
+    accumulator = CentroidAccumulator(feature_count(hash_width))
+    rows = 0
+    with read_only(db.session):
+        for labels, sums, counts in chunk_results(stream_chunks(chunk_size), hash_width, workers):
+            accumulator.add(labels, sums, counts)
+            rows += int(counts.sum())
+    if not rows:
+        return None
+    metadata = {
+        'kind': 'nearest_centroid',
+        'task': 'account_pair',
+        'features': {
+            'hash_width': hash_width,
+            'amount_scale': AMOUNT_SCALE,
+            'account_types': ACCOUNT_TYPES
+        },
+        'trained_rows': rows,
+        'classes': len(accumulator.index),
+        'training_seconds': round(time.perf_counter() - started, 3)
+    }
+    return registry.publish(name, accumulator.model_arrays(), metadata, activate=activate)
@@ -0,0 +1,92 @@
+# modules/ml/training/features.py
+
+import re
+import zlib
+from typing import NamedTuple
+import numpy as np
+from modules.models.account_types import ACCOUNT_TYPES
+
+# Description tokens are hashed into this many columns unless a model says otherwise
+HASH_WIDTH = 256
+
+# log1p(|amount|) is divided by this to keep it in the range of the other features
+AMOUNT_SCALE = 10.0
+
+TOKEN = re.compile(r'[a-z0-9]+')
+
+class Chunk(NamedTuple):
+    """
+    Raw columns of a batch of transactions, as plain lists so a chunk is
+    cheap to send to a worker process. Account types are indexes into
+    ACCOUNT_TYPES (-1 when unknown); dates are proleptic ordinals.
+    """
+    descriptions: list
+    amounts: list
+    dates: list
+    debit_types: list
+    credit_types: list
+    debit_account_ids: list
+    credit_account_ids: list
+
+def feature_count(hash_width=HASH_WIDTH):
+    return hash_width + 1 + 7 + 2 * len(ACCOUNT_TYPES)
+
+def hashed_tokens(descriptions, hash_width=HASH_WIDTH):
+    """
+    Token counts of each description hashed into hash_width columns, each
+    row scaled to unit length. crc32 rather than hash() so every process
+    hashes a token to the same column.
+    """
+    rows, columns = [], []
+    for row, text in enumerate(descriptions):
+        for token in TOKEN.findall((text or '').lower()):
+            rows.append(row)
+            columns.append(zlib.crc32(token.encode()) % hash_width)
+    cells = np.asarray(rows, dtype=np.int64) * hash_width + np.asarray(columns, dtype=np.int64)
+    counts = np.bincount(cells, minlength=len(descriptions) * hash_width).astype(np.float32)
+    counts = counts.reshape(len(descriptions), hash_width)
+    norms = np.linalg.norm(counts, axis=1, keepdims=True)
+    np.divide(counts, norms, out=counts, where=norms > 0)
+    return counts
+
+def one_hot(indexes, width):
+    """Rows of `width` zeros with a one at each index; -1 leaves the row empty."""
+    indexes = np.asarray(indexes, dtype=np.int64)
+    matrix = np.zeros((len(indexes), width), dtype=np.float32)
+    known = indexes >= 0
+    matrix[np.flatnonzero(known), indexes[known]] = 1.0
+    return matrix
+
+def featurize(descriptions, amounts, dates, debit_types, credit_types, hash_width=HASH_WIDTH):
+    """
+    The float32 feature matrix of a batch of transactions, one row each:
+    hashed description tokens, scaled log amount, weekday (one-hot) and the
+    debit and credit account types (one-hot, empty when unknown).
+    """
+    amounts = np.asarray(amounts, dtype=np.float64)
+    # Ordinal 1 (0001-01-01) was a Monday
+    weekdays = (np.asarray(dates, dtype=np.int64) - 1) % 7
+    return np.hstack([
+        hashed_tokens(descriptions, hash_width),
+        (np.log1p(np.abs(amounts)) / AMOUNT_SCALE).astype(np.float32)[:, None],
+        one_hot(weekdays, 7),
+        one_hot(debit_types, len(ACCOUNT_TYPES)),
+        one_hot(credit_types, len(ACCOUNT_TYPES))
+    ])
+
+def chunk_statistics(chunk, hash_width=HASH_WIDTH):
+    """
+    Featurize a chunk and reduce it to per-label sums: the distinct
+    (debit, credit) account pairs, the sum of their feature rows and their
+    row counts. Runs in the worker processes; only the sums travel back.
+    """
+    features = featurize(chunk.descriptions, chunk.amounts, chunk.dates, chunk.debit_types,
+                         chunk.credit_types, hash_width)
+    pairs = np.column_stack([np.asarray(chunk.debit_account_ids, dtype=np.int64),
+                             np.asarray(chunk.credit_account_ids, dtype=np.int64)])
+    labels, inverse, counts = np.unique(pairs, axis=0, return_inverse=True, return_counts=True)
+    # Rows grouped by label, then one reduceat sums every group
+    order = np.argsort(inverse.ravel(), kind='stable')
+    starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+    sums = np.add.reduceat(features[order].astype(np.float64), starts, axis=0)
+    return labels, sums, counts
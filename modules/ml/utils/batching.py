@@ -0,0 +1,90 @@
+# modules/ml/utils/batching.py
+
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+class MicroBatcher:
+    """
+    Collects items submitted by concurrent callers and runs them through
+    handler(items) -> results in batches, on one background thread.
+
+    A batch goes out when it holds max_batch items or max_wait seconds
+    after its first item arrived, whichever comes first: max_wait is the
+    latency a lone caller pays for the chance to share a call with others.
+    Items that arrive while the handler runs wait for the next batch, so
+    under load batches fill up even with max_wait = 0. Each caller gets a
+    Future that receives its own result, or the handler's exception.
+    """
+
+    def __init__(self, handler, max_batch=64, max_wait=0.005, name='micro-batcher'):
+        self.handler = handler
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.name = name
+        self._condition = threading.Condition()
+        self._pending = deque()
+        self._thread = None
+        self._closed = False
+        self.batches = 0
+        self.items = 0
+        self.largest_batch = 0
+
+    def submit(self, item):
+        """Queue one item; returns the Future of its result."""
+        future = Future()
+        with self._condition:
+            if self._closed:
+                raise RuntimeError(f'{self.name} is closed.')
+            self._pending.append((time.monotonic(), item, future))
+            # Started on first use, so a worker forked after startup gets its own thread
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+            self._condition.notify()
+        return future
+
+    def stats(self):
+        with self._condition:
+            return {
+                'queued': len(self._pending),
+                'batches': self.batches,
+                'items': self.items,
+                'largest_batch': self.largest_batch,
+                'mean_batch': round(self.items / self.batches, 2) if self.batches else 0.0
+            }
+
+    def close(self):
+        """Stop the thread once the queued items are handled."""
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self):
+        pending = self._pending
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: pending or self._closed)
+                if not pending:
+                    return
+                deadline = pending[0][0] + self.max_wait
+                self._condition.wait_for(lambda: len(pending) >= self.max_batch or self._closed,
+                                         max(deadline - time.monotonic(), 0))
+                batch = [pending.popleft() for _ in range(min(len(pending), self.max_batch))]
+                self.batches += 1
+                self.items += len(batch)
+                self.largest_batch = max(self.largest_batch, len(batch))
+            futures = [future for _, _, future in batch]
+            try:
+                results = self.handler([item for _, item, _ in batch])
+                if len(results) != len(batch):
+                    raise ValueError(f'{self.name} handler returned {len(results)} results for {len(batch)} items.')
+            except Exception as e:
+                for future in futures:
+                    future.set_exception(e)
+            else:
+                for future, result in zip(futures, results):
+                    future.set_result(result)
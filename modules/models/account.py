@@ -1,12 +1,17 @@
 # modules/models/account.py
 
 from modules.database.db import db
+from modules.models.account_types import ACCOUNT_TYPES
 
 class Account(db.Model):
     __tablename__ = 'accounts'
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(150), unique=True, nullable=False)
     type = db.Column(db.String(50), nullable=False)
+    # Bumped by every ORM update of the row
+    version = db.Column(db.Integer, nullable=False, default=1, server_default='1')
+
+    __mapper_args__ = {'version_id_col': version}
 
     def __repr__(self):
         return f"<Account {self.name}>"
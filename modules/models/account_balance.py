@@ -0,0 +1,16 @@
+# modules/models/account_balance.py
+
+from modules.database.db import db
+
+class AccountBalance(db.Model):
+    """
+    Running debit and credit totals per account, maintained alongside every
+    transaction write so a balance can be read without scanning the ledger.
+    """
+    __tablename__ = 'account_balances'
+    account_id = db.Column(db.Integer, db.ForeignKey('accounts.id'), primary_key=True)
+    debit_total = db.Column(db.Float, nullable=False, default=0.0)
+    credit_total = db.Column(db.Float, nullable=False, default=0.0)
+
+    def __repr__(self):
+        return f"<AccountBalance {self.account_id} Dr {self.debit_total} Cr {self.credit_total}>"
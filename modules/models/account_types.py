@@ -0,0 +1,5 @@
+# modules/models/account_types.py
+
+# Account types offered in AccountForm, in reporting order. Kept free of
+# imports so the training worker processes can use it without the database
+ACCOUNT_TYPES = ['Asset', 'Liability', 'Equity', 'Revenue', 'Expense']
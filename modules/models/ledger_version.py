@@ -0,0 +1,16 @@
+# modules/models/ledger_version.py
+
+from modules.database.db import db
+
+class LedgerVersion(db.Model):
+    """
+    Single-row counter that every committed write to accounts or
+    transactions moves forward; clients use it to tell whether anything in
+    the ledger changed since their last read.
+    """
+    __tablename__ = 'ledger_version'
+    id = db.Column(db.Integer, primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<LedgerVersion {self.version}>"
@@ -5,12 +5,25 @@ from modules.models.account import Account
 
 class Transaction(db.Model):
     __tablename__ = 'transactions'
+    __table_args__ = (
+        # Account lookups in date order; id and amount make the per-side report aggregates index-only
+        db.Index('ix_transactions_debit_account_id_date', 'debit_account_id', 'date', 'id', 'amount'),
+        db.Index('ix_transactions_credit_account_id_date', 'credit_account_id', 'date', 'id', 'amount'),
+        # Keyset pagination order for the transaction list
+        db.Index('ix_transactions_date_id', 'date', 'id'),
+        # Amount-range filters of the transaction list
+        db.Index('ix_transactions_amount_date_id', 'amount', 'date', 'id'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     date = db.Column(db.Date, nullable=False)  # Changed from db.DateTime to db.Date
     amount = db.Column(db.Float, nullable=False)
     description = db.Column(db.String(255), nullable=False)
     debit_account_id = db.Column(db.Integer, db.ForeignKey('accounts.id'), nullable=False)
     credit_account_id = db.Column(db.Integer, db.ForeignKey('accounts.id'), nullable=False)
+    # Bumped by every ORM update of the row
+    version = db.Column(db.Integer, nullable=False, default=1, server_default='1')
+
+    __mapper_args__ = {'version_id_col': version}
 
     debit_account = db.relationship('Account', foreign_keys=[debit_account_id])
     credit_account = db.relationship('Account', foreign_keys=[credit_account_id])
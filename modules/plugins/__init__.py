@@ -1,5 +1,18 @@
 # modules/plugins/__init__.py
 
+import importlib
+import json
+import os
+import threading
+from flask import Flask, current_app, request
+from werkzeug.routing import BaseConverter
+
+# Plugins listed here are imported on their first request rather than at startup
+MANIFEST_PATH = os.path.join(os.path.dirname(__file__), 'manifest.json')
+
+# Every method a plugin route might accept; the real routes narrow it down
+STUB_METHODS = ['GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS']
+
 class PluginBase:
     def register(self, app):
         """
@@ -7,3 +20,93 @@ class PluginBase:
         Must be implemented by all plugins.
         """
         raise NotImplementedError("Plugins must implement the 'register' method.")
+
+    def subscribe(self, bus):
+        """
+        Optional: subscribe to committed ledger events with
+        bus.subscribe(name, handler, ...) (see modules.services.event_bus).
+        Called right after register(); a lazily loaded plugin only sees the
+        events committed after its first request.
+        """
+
+def read_manifest(path=MANIFEST_PATH):
+    """
+    The plugin entries of the manifest: name, url_prefix, entry_point
+    ("module:attribute") and optionally lazy (default true).
+    """
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return json.load(f)
+
+class PluginPathConverter(BaseConverter):
+    """Matches nothing or anything starting with a slash, i.e. everything under a URL prefix."""
+    regex = r'(?:/.*)?'
+    part_isolating = False
+
+class LazyPlugin:
+    """
+    A manifest entry whose module is imported on the first request under
+    its URL prefix. The app only ever holds a stub route catching the whole
+    prefix: routes cannot be added to a serving app's url_map safely, as
+    other threads may be matching against it. On its first request the stub
+    imports the plugin and lets it register with a private Flask app of its
+    own; every request under the prefix is then matched against that app's
+    url_map and its view is called in the main app's request context.
+
+    Only the plugin's URL rules and views are used this way: request hooks
+    or error handlers it registers do not run, and url_for() in the main app
+    does not know its endpoints. With lazy=False (or PLUGINS_LAZY = False)
+    the plugin registers with the main app at startup instead.
+    """
+
+    def __init__(self, name, url_prefix, entry_point, lazy=True):
+        self.name = name
+        self.url_prefix = url_prefix.rstrip('/')
+        self.entry_point = entry_point
+        self.lazy = lazy
+        self.loaded = False
+        # The app holding the plugin's routes once a lazy plugin is loaded
+        self.app = None
+        self._lock = threading.Lock()
+
+    @property
+    def module_name(self):
+        return self.entry_point.partition(':')[0]
+
+    @property
+    def stub_endpoint(self):
+        return f'{self.name}_stub'
+
+    def register_stub(self, app):
+        app.url_map.converters.setdefault('plugin_path', PluginPathConverter)
+        app.add_url_rule(f'{self.url_prefix}<plugin_path:path>', endpoint=self.stub_endpoint,
+                         view_func=self.dispatch, methods=STUB_METHODS)
+
+    def load(self, app, target=None):
+        """Import the plugin and register it with target (default: the app), once."""
+        with self._lock:
+            if self.loaded:
+                return
+            module_name, _, attribute = self.entry_point.partition(':')
+            plugin = getattr(importlib.import_module(module_name), attribute or 'plugin')
+            plugin.register(app if target is None else target)
+            plugin.subscribe(app.extensions['event_bus'])
+            self.app = target
+            self.loaded = True
+
+    def _plugin_app(self, app):
+        """The private app the plugin registers with, sharing the main app's config and extensions."""
+        if not self.loaded:
+            target = Flask(self.module_name, static_folder=None)
+            target.config.update(app.config)
+            target.extensions = app.extensions
+            self.load(app, target)
+        return self.app
+
+    def dispatch(self, path):
+        plugin_app = self._plugin_app(current_app._get_current_object())
+        # NotFound, MethodNotAllowed and slash redirects surface as HTTP errors
+        rule, view_args = plugin_app.url_map.bind_to_environ(request.environ).match(return_rule=True)
+        request.url_rule, request.view_args = rule, view_args
+        return plugin_app.view_functions[rule.endpoint](**view_args)
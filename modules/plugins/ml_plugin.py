@@ -1,9 +1,90 @@
 # modules/plugins/ml_plugin.py
 
+import io
 from modules.plugins import PluginBase
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request, jsonify
+from modules.ml.models.registry import get_model_registry, ModelNotFound
 import numpy as np
 
+NPY_MAGIC = b'\x93NUMPY'
+NPY_MIMETYPE = 'application/x-npy'
+
+def predict_rows(matrix, model=None):
+    """Score every row of a 2-D float64 matrix in one vectorized call."""
+    if model is not None:
+        return model.predict(matrix)
+    # Without a registry model: the sum of each row
+    return matrix.sum(axis=1)
+
+def requested_model(data=None):
+    """
+    The registry model named by the request's model and version fields (in
+    the JSON body or the query string), or None when no model is named.
+    Raises ModelNotFound for an unknown name or version.
+    """
+    source = data if isinstance(data, dict) and 'model' in data else request.args
+    name = source.get('model')
+    if not name:
+        return None
+    return get_model_registry().get(name, source.get('version'))
+
+def model_fields(model):
+    return {'model': model.name, 'version': model.version} if model is not None else {}
+
+def read_npy(body):
+    """
+    A read-only view of the array in an .npy body: the header is parsed and
+    the data is wrapped with np.frombuffer, without copying it.
+    """
+    stream = io.BytesIO(body)
+    version = np.lib.format.read_magic(stream)
+    if version == (1, 0):
+        shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(stream)
+    elif version == (2, 0):
+        shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(stream)
+    else:
+        raise ValueError(f'Unsupported .npy format version {version}.')
+    if dtype.hasobject:
+        raise ValueError('Object arrays are not supported.')
+    count = int(np.prod(shape))
+    array = np.frombuffer(body, dtype=dtype, count=count, offset=stream.tell())
+    return array.reshape(shape, order='F' if fortran_order else 'C')
+
+def read_matrix():
+    """
+    The input matrix of a batch request and the format of the request:
+    'json' ({"inputs": [[...], ...]}), 'npy' (an .npy file body) or 'raw'
+    (little-endian float64 values, row after row, with ?columns=N).
+    Raises ValueError when the body is not a 2-D numeric matrix.
+    """
+    if request.is_json:
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict) or 'inputs' not in data:
+            raise ValueError('No inputs provided.')
+        try:
+            matrix = np.asarray(data['inputs'], dtype=np.float64)
+        except (ValueError, TypeError):
+            raise ValueError('Inputs must be a list of equally long lists of numbers.')
+        body_format = 'json'
+    else:
+        body = request.get_data()
+        if body.startswith(NPY_MAGIC):
+            matrix = read_npy(body)
+            body_format = 'npy'
+        else:
+            columns = request.args.get('columns', type=int)
+            if not columns or columns < 1:
+                raise ValueError('Raw float64 input needs a positive columns query parameter.')
+            if len(body) % (8 * columns):
+                raise ValueError(f'Body length is not a multiple of {columns} float64 values.')
+            matrix = np.frombuffer(body, dtype='<f8').reshape(-1, columns)
+            body_format = 'raw'
+    if matrix.ndim != 2:
+        raise ValueError('Inputs must be a 2-D matrix.')
+    if matrix.dtype != np.float64:
+        matrix = matrix.astype(np.float64)
+    return matrix, body_format
+
 class MLPlugin(PluginBase):
     def register(self, app):
         bp = Blueprint('ml_plugin', __name__, url_prefix='/ml')
@@ -29,11 +110,36 @@ class MLPlugin(PluginBase):
                 except ValueError:
                     return jsonify({'error': 'Invalid input format.'}), 400
 
-            # Dummy prediction logic
-            x = np.array(data['input'])
-            prediction = x.sum()
-            # Convert prediction to native Python data type
-            return jsonify({'prediction': prediction.item()})
+            try:
+                model = requested_model(data)
+                x = np.array(data['input']).reshape(1, -1)
+                prediction = predict_rows(x, model)[0]
+            except ModelNotFound as e:
+                return jsonify({'error': str(e)}), 404
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+            # Convert prediction to native Python data types
+            return jsonify({'prediction': prediction.tolist(), **model_fields(model)})
+
+        @bp.route('/predict/batch', methods=['POST'])
+        def predict_batch():
+            try:
+                matrix, body_format = read_matrix()
+                model = requested_model(request.get_json(silent=True) if body_format == 'json' else None)
+                predictions = predict_rows(matrix, model)
+            except ModelNotFound as e:
+                return jsonify({'error': str(e)}), 404
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+            # Answer in the format of the request
+            if body_format == 'npy':
+                output = io.BytesIO()
+                np.lib.format.write_array(output, predictions, allow_pickle=False)
+                return Response(output.getvalue(), mimetype=NPY_MIMETYPE)
+            if body_format == 'raw':
+                return Response(predictions.astype('<f8', copy=False).tobytes(),
+                                mimetype='application/octet-stream')
+            return jsonify({'predictions': predictions.tolist(), **model_fields(model)})
 
         app.register_blueprint(bp)
 
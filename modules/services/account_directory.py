@@ -0,0 +1,113 @@
+# modules/services/account_directory.py
+
+import threading
+import time
+from flask import current_app
+from modules.database.db import db
+from modules.models.account import Account
+
+class AccountDirectory:
+    """
+    Process-local map of accounts (id -> name and type, name -> id) used to
+    look up account names and types and fill account choices without
+    querying.
+
+    The directory is loaded with one query on first use and dropped by
+    invalidate() whenever an account is created, updated or deleted in this
+    process. Changes made by other processes are picked up when the TTL
+    expires, so lookups may lag behind them: name checks are only a first
+    line (the unique constraint decides), and missing() always asks the
+    database. As missing() never answers from the directory, it does not
+    count towards the hit and miss figures either.
+    """
+
+    def __init__(self, ttl=None):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._by_id = None
+        self._by_name = None
+        self._loaded_at = None
+        # Moved by invalidate(); a load that overlapped it is not kept
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.loads = 0
+
+    def invalidate(self):
+        """Drop the directory so the next lookup reloads it."""
+        with self._lock:
+            self._by_id = None
+            self._by_name = None
+            self._generation += 1
+
+    def stats(self):
+        """Lookup counters and size of the directory."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'accounts': len(self._by_id) if self._by_id is not None else 0,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'loads': self.loads
+            }
+
+    def _entries(self):
+        """Return (by_id, by_name), loading them if absent or expired."""
+        with self._lock:
+            expired = self.ttl is not None and self._loaded_at is not None \
+                and time.monotonic() - self._loaded_at > self.ttl
+            if self._by_id is not None and not expired:
+                self.hits += 1
+                return self._by_id, self._by_name
+            self.misses += 1
+            generation = self._generation
+        rows = db.session.execute(db.select(Account.id, Account.name, Account.type).order_by(Account.id)).all()
+        by_id = {account_id: (name, account_type) for account_id, name, account_type in rows}
+        by_name = {name: account_id for account_id, name, _ in rows}
+        with self._lock:
+            self.loads += 1
+            # Invalidated while loading: the rows may predate the change
+            if generation == self._generation:
+                self._by_id, self._by_name = by_id, by_name
+                self._loaded_at = time.monotonic()
+        return by_id, by_name
+
+    def get(self, account_id):
+        """(name, type) of an account, or None if it does not exist."""
+        by_id, _ = self._entries()
+        return by_id.get(account_id)
+
+    def id_for_name(self, name):
+        """Id of the account with this name, or None."""
+        _, by_name = self._entries()
+        return by_name.get(name)
+
+    def choices(self):
+        """(id, name) pairs for every account, for select fields."""
+        by_id, _ = self._entries()
+        return [(account_id, name) for account_id, (name, _) in by_id.items()]
+
+    def missing(self, account_ids):
+        """
+        The subset of account_ids that do not exist. Always checked against
+        the database: another process may have created or deleted them since
+        the last load, and SQLite does not enforce the foreign keys.
+        """
+        account_ids = set(account_ids)
+        found = set(db.session.execute(
+            db.select(Account.id).filter(Account.id.in_(account_ids))).scalars())
+        # The answer doubles as a staleness check of a loaded directory
+        with self._lock:
+            by_id = self._by_id
+        if by_id is not None and found != {account_id for account_id in account_ids if account_id in by_id}:
+            self.invalidate()
+        return account_ids - found
+
+def init_account_directory(app):
+    """Create the account directory for an application."""
+    app.extensions['account_directory'] = AccountDirectory(ttl=app.config.get('ACCOUNT_DIRECTORY_TTL'))
+
+def get_account_directory():
+    """The account directory of the current application."""
+    return current_app.extensions['account_directory']
@@ -0,0 +1,79 @@
+# modules/services/api_tokens.py
+
+import threading
+from flask import current_app, has_app_context
+from itsdangerous import URLSafeTimedSerializer, BadSignature
+from sqlalchemy import event
+from modules.models.user import User
+from modules.services.user_cache import CachedUser
+
+TOKEN_SALT = 'api-token'
+
+class ApiTokens:
+    """
+    Signed, expiring bearer tokens for machine clients.
+
+    A token carries the user's id, username and role, so verifying it needs
+    neither a database query nor a password hash check. Revocation uses
+    in-memory generation counters: a global one and one per user. A token
+    records the generations current when it was issued and is rejected once
+    either counter has moved past them. Counters live in the process, so
+    revocations last until restart; keep API_TOKEN_MAX_AGE short.
+    """
+
+    def __init__(self, secret_key, max_age):
+        self.max_age = max_age
+        self._serializer = URLSafeTimedSerializer(secret_key, salt=TOKEN_SALT)
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._user_generations = {}
+
+    def _generations(self, user_id):
+        with self._lock:
+            return self._generation, self._user_generations.get(user_id, 0)
+
+    def issue(self, user):
+        """Sign a new token for a user."""
+        return self._serializer.dumps({
+            'id': user.id,
+            'username': user.username,
+            'role': user.role,
+            'gen': list(self._generations(user.id))
+        })
+
+    def load(self, token):
+        """The user a valid token was issued to, or None."""
+        try:
+            data = self._serializer.loads(token, max_age=self.max_age)
+        except BadSignature:
+            return None
+        generation, user_generation = self._generations(data['id'])
+        token_generation, token_user_generation = data['gen']
+        if token_generation < generation or token_user_generation < user_generation:
+            return None
+        return CachedUser(data['id'], data['username'], data['role'])
+
+    def revoke_user(self, user_id):
+        """Reject every token issued to a user so far."""
+        with self._lock:
+            self._user_generations[user_id] = self._user_generations.get(user_id, 0) + 1
+
+    def revoke_all(self):
+        """Reject every token issued so far."""
+        with self._lock:
+            self._generation += 1
+
+def init_api_tokens(app):
+    """Create the token signer for an application."""
+    app.extensions['api_tokens'] = ApiTokens(app.config['SECRET_KEY'], app.config.get('API_TOKEN_MAX_AGE', 3600))
+
+def get_api_tokens():
+    """The token signer of the current application."""
+    return current_app.extensions['api_tokens']
+
+@event.listens_for(User, 'after_update')
+@event.listens_for(User, 'after_delete')
+def _revoke_changed_user_tokens(mapper, connection, target):
+    # Tokens carry the role, so a changed or deleted user must sign in again
+    if has_app_context() and 'api_tokens' in current_app.extensions:
+        get_api_tokens().revoke_user(target.id)
@@ -0,0 +1,122 @@
+# modules/services/balances.py
+
+import math
+from collections import defaultdict
+from sqlalchemy.dialects.sqlite import insert
+from modules.database.db import db
+from modules.models.account_balance import AccountBalance
+from modules.models.transaction import Transaction
+from modules.services.reports import ledger_totals, normal_balance
+
+def _apply(deltas):
+    """
+    Add {account_id: (debit_delta, credit_delta)} to the account_balances
+    table with one UPSERT per account. Runs in the caller's session so the
+    change commits or rolls back together with the transaction rows.
+    """
+    if not deltas:
+        return
+    stmt = insert(AccountBalance)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[AccountBalance.account_id],
+        set_={
+            'debit_total': AccountBalance.debit_total + stmt.excluded.debit_total,
+            'credit_total': AccountBalance.credit_total + stmt.excluded.credit_total
+        }
+    )
+    db.session.execute(stmt, [
+        {'account_id': account_id, 'debit_total': debit, 'credit_total': credit}
+        for account_id, (debit, credit) in deltas.items()
+    ])
+
+def _deltas(entries, sign):
+    deltas = defaultdict(lambda: (0.0, 0.0))
+    for debit_account_id, credit_account_id, amount in entries:
+        debit, credit = deltas[debit_account_id]
+        deltas[debit_account_id] = (debit + sign * amount, credit)
+        debit, credit = deltas[credit_account_id]
+        deltas[credit_account_id] = (debit, credit + sign * amount)
+    return deltas
+
+def post(*transactions):
+    """Add the given transactions to their accounts' balances."""
+    _apply(_deltas([(t.debit_account_id, t.credit_account_id, t.amount) for t in transactions], 1))
+
+def unpost(*transactions):
+    """Remove the given transactions from their accounts' balances."""
+    _apply(_deltas([(t.debit_account_id, t.credit_account_id, t.amount) for t in transactions], -1))
+
+def repost(old_entry, transaction):
+    """
+    Move an updated transaction from its old (debit_account_id,
+    credit_account_id, amount) posting to its current one.
+    """
+    deltas = _deltas([old_entry], -1)
+    for account_id, (debit, credit) in _deltas(
+            [(transaction.debit_account_id, transaction.credit_account_id, transaction.amount)], 1).items():
+        old_debit, old_credit = deltas[account_id]
+        deltas[account_id] = (old_debit + debit, old_credit + credit)
+    _apply(deltas)
+
+def post_entries(entries):
+    """Add (debit_account_id, credit_account_id, amount) tuples to the balances."""
+    _apply(_deltas(entries, 1))
+
+def forget_account(account_id):
+    """Drop the balance row of an account that is being deleted."""
+    db.session.execute(db.delete(AccountBalance).filter_by(account_id=account_id))
+
+def get_balance(account):
+    """
+    Return the balance summary for an account, read from its single
+    account_balances row.
+    """
+    row = db.session.get(AccountBalance, account.id)
+    debit_total = row.debit_total if row else 0.0
+    credit_total = row.credit_total if row else 0.0
+    return {
+        'account_id': account.id,
+        'debit_total': debit_total,
+        'credit_total': credit_total,
+        'balance': normal_balance(account.type, debit_total, credit_total)
+    }
+
+def ledger_totals_query():
+    """
+    One aggregate query over the transactions table returning
+    (account_id, debit_total, credit_total) for every account that appears
+    on either side of a posting.
+    """
+    return ledger_totals({'total': Transaction.amount})
+
+def find_drift():
+    """
+    Compare the stored balances with totals recomputed from the ledger.
+    Returns a list of (account_id, stored, expected) tuples, where each of
+    stored and expected is a (debit_total, credit_total) pair.
+    """
+    expected = {row.account_id: (row.debit_total, row.credit_total)
+                for row in db.session.execute(ledger_totals_query())}
+    stored = {row.account_id: (row.debit_total, row.credit_total)
+              for row in db.session.execute(db.select(AccountBalance)).scalars()}
+    drift = []
+    for account_id in sorted(expected.keys() | stored.keys()):
+        have = stored.get(account_id, (0.0, 0.0))
+        want = expected.get(account_id, (0.0, 0.0))
+        if not all(math.isclose(a, b, rel_tol=1e-9, abs_tol=1e-6) for a, b in zip(have, want)):
+            drift.append((account_id, have, want))
+    return drift
+
+def rebuild():
+    """
+    Recompute the whole account_balances table from the ledger with a single
+    INSERT ... SELECT. The caller is responsible for committing.
+    """
+    db.session.execute(db.delete(AccountBalance))
+    totals = ledger_totals_query().subquery()
+    db.session.execute(
+        db.insert(AccountBalance).from_select(
+            ['account_id', 'debit_total', 'credit_total'],
+            db.select(totals.c.account_id, totals.c.debit_total, totals.c.credit_total)
+        )
+    )
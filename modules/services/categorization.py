@@ -0,0 +1,116 @@
+# modules/services/categorization.py
+
+import threading
+from concurrent.futures import TimeoutError as FutureTimeout
+from typing import NamedTuple
+from flask import current_app
+from modules.ml.models.registry import ModelNotFound
+from modules.ml.utils.batching import MicroBatcher
+from modules.services.account_directory import get_account_directory
+
+class Suggestion(NamedTuple):
+    """The accounts the categorizer model would book a transaction to."""
+    debit_account_id: int
+    credit_account_id: int
+    model_version: int
+
+class Categorizer:
+    """
+    Suggests the debit and credit accounts of new transactions with the
+    registry model `model_name` (see `flask models train`).
+
+    Requests are scored through a MicroBatcher: concurrent submissions are
+    collected for up to max_wait seconds or max_batch items and scored with
+    one vectorized model call. A caller waits at most `timeout` seconds for
+    its suggestion. When categorization is disabled, the model does not
+    exist yet, or scoring fails or is too slow, the suggestion is None and
+    the transaction is saved as usual.
+    """
+
+    def __init__(self, app, model_name='categorizer', max_batch=64, max_wait=0.005, timeout=0.25,
+                 enabled=True):
+        self.app = app
+        self.model_name = model_name
+        self.timeout = timeout
+        self.enabled = enabled
+        self.batcher = MicroBatcher(self._score, max_batch, max_wait, name='categorizer')
+        self._lock = threading.Lock()
+        self.suggested = 0
+        self.unavailable = 0
+        self.timeouts = 0
+        self.failures = 0
+
+    def submit(self, description, amount, date, debit_account_id=None, credit_account_id=None):
+        """
+        Queue a transaction for scoring and return a handle for result(), so
+        the caller can write the transaction while the model runs. Returns
+        None when categorization is disabled.
+        """
+        if not self.enabled:
+            return None
+        directory = get_account_directory()
+        debit = directory.get(debit_account_id) if debit_account_id is not None else None
+        credit = directory.get(credit_account_id) if credit_account_id is not None else None
+        return self.batcher.submit((description, float(amount), date.toordinal(),
+                                    debit[1] if debit else None, credit[1] if credit else None))
+
+    def result(self, handle):
+        """The Suggestion for a submitted transaction, or None without one."""
+        if handle is None:
+            return None
+        try:
+            suggestion = handle.result(self.timeout)
+        except FutureTimeout:
+            outcome, suggestion = 'timeouts', None
+        except ModelNotFound:
+            outcome, suggestion = 'unavailable', None
+        except Exception:
+            self.app.logger.exception('Categorizing a transaction failed')
+            outcome, suggestion = 'failures', None
+        else:
+            outcome = 'suggested'
+        with self._lock:
+            setattr(self, outcome, getattr(self, outcome) + 1)
+        return suggestion
+
+    def suggest(self, description, amount, date, debit_account_id=None, credit_account_id=None):
+        """submit() and result() in one call."""
+        return self.result(self.submit(description, amount, date, debit_account_id, credit_account_id))
+
+    def stats(self):
+        with self._lock:
+            counters = {'suggested': self.suggested, 'unavailable': self.unavailable,
+                        'timeouts': self.timeouts, 'failures': self.failures}
+        return dict(counters, **self.batcher.stats())
+
+    def _score(self, items):
+        # Runs on the batcher thread, one model call per batch. Without a
+        # model this raises before anything imports NumPy
+        model = self.app.extensions['model_registry'].get(self.model_name)
+        if model.metadata.get('task') != 'account_pair':
+            raise ModelNotFound(f'Model {self.model_name} does not suggest accounts.')
+        from modules.ml.training.features import featurize
+        settings = model.metadata['features']
+        type_index = {name: index for index, name in enumerate(settings['account_types'])}
+        descriptions, amounts, dates, debit_types, credit_types = zip(*items)
+        features = featurize(descriptions, amounts, dates,
+                             [type_index.get(t, -1) for t in debit_types],
+                             [type_index.get(t, -1) for t in credit_types],
+                             hash_width=settings['hash_width'])
+        labels = model.arrays['labels'][model.predict(features).argmax(axis=1)]
+        return [Suggestion(debit, credit, model.version) for debit, credit in labels.tolist()]
+
+def init_categorization(app):
+    """Create the transaction categorizer of an application; its thread starts on first use."""
+    app.extensions['categorizer'] = Categorizer(
+        app,
+        model_name=app.config.get('CATEGORIZER_MODEL', 'categorizer'),
+        max_batch=app.config.get('CATEGORIZER_MAX_BATCH', 64),
+        max_wait=app.config.get('CATEGORIZER_MAX_WAIT', 0.005),
+        timeout=app.config.get('CATEGORIZER_TIMEOUT', 0.25),
+        enabled=app.config.get('CATEGORIZER_ENABLED', True)
+    )
+
+def get_categorizer():
+    """The transaction categorizer of the current application."""
+    return current_app.extensions['categorizer']
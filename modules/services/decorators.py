@@ -1,15 +1,56 @@
 # modules/services/decorators.py
 
 from functools import wraps
-from flask import jsonify
+from flask import jsonify, make_response, request
 from flask_login import current_user
+from flask_restx.utils import unpack
+from werkzeug.http import quote_etag
+
+def has_role(*roles):
+    """Whether the current user is logged in with one of these roles."""
+    return current_user.is_authenticated and current_user.role in roles
 
 def roles_required(*roles):
     def decorator(f):
         @wraps(f)
         def decorated_function(*args, **kwargs):
-            if current_user.role not in roles:
-                return jsonify({'error': 'Unauthorized access.'}), 403
+            if not has_role(*roles):
+                return make_response(jsonify({'error': 'Unauthorized access.'}), 403)
             return f(*args, **kwargs)
         return decorated_function
-    return decorator
\ No newline at end of file
+    return decorator
+
+def etag(tag_for):
+    """
+    Conditional GET for a resource method. tag_for(*args, **kwargs) returns
+    the resource's current entity tag, or None when it cannot tell (the
+    request then runs normally). A request whose If-None-Match holds the
+    tag gets an empty 304 without the method being called; otherwise the
+    tag is sent as the ETag of the response.
+
+    Place it above the marshalling decorators so the 304 skips them too.
+    tag_for's own lookup is the one query a 304 still costs, so keep it to a
+    single-row version read, never the resource itself; the version lives
+    in the database rather than in this process because another worker may
+    have written since. The tag is taken before the method runs: a write in
+    between leaves the client with a tag older than its body, which only
+    costs it one more full response.
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            if not current_user.is_authenticated:
+                return f(*args, **kwargs)
+            tag = tag_for(*args, **kwargs)
+            if tag is None:
+                return f(*args, **kwargs)
+            if request.if_none_match.contains_weak(tag):
+                response = make_response('', 304)
+                response.set_etag(tag)
+                return response
+            data, code, headers = unpack(f(*args, **kwargs))
+            if code == 200:
+                headers = dict(headers or {}, ETag=quote_etag(tag))
+            return data, code, headers
+        return decorated_function
+    return decorator
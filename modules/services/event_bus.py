@@ -0,0 +1,288 @@
+# modules/services/event_bus.py
+
+import itertools
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+from typing import NamedTuple
+from flask import current_app, has_app_context
+from sqlalchemy import event, inspect
+from modules.database.routing import RoutingSession
+from modules.models.account import Account
+from modules.models.transaction import Transaction
+
+CREATED, UPDATED, DELETED = 'created', 'updated', 'deleted'
+
+# What to do with a new event when a subscriber's queue is full
+DROP_OLDEST, DROP_NEWEST, BLOCK = 'drop_oldest', 'drop_newest', 'block'
+POLICIES = (DROP_OLDEST, DROP_NEWEST, BLOCK)
+
+# Mapped class -> (entity name, fields copied into the event)
+ENTITIES = {
+    Account: ('account', ('id', 'name', 'type', 'version')),
+    Transaction: ('transaction', ('id', 'date', 'amount', 'description', 'debit_account_id',
+                                  'credit_account_id', 'version'))
+}
+
+# Key of the events of the session's open transaction in session.info
+PENDING_KEY = 'ledger_events'
+
+class LedgerEvent(NamedTuple):
+    """A committed change to an account or transaction."""
+    sequence: int
+    entity: str
+    action: str
+    id: int
+    data: dict
+    published_at: float
+
+def snapshot(fields, values):
+    """The event data of a row: `fields` taken from the `values` mapping, dates as ISO strings."""
+    data = {}
+    for name in fields:
+        value = values.get(name)
+        if isinstance(value, datetime):
+            # Both entities only have Date columns, which a handler may have set from a datetime
+            value = value.date()
+        data[name] = value.isoformat() if isinstance(value, date) else value
+    return data
+
+class Subscription:
+    """One subscriber's handler, its bounded queue and its delivery counters."""
+
+    def __init__(self, name, handler, entities=None, actions=None, policy=DROP_OLDEST,
+                 max_queue=10000, batch_size=100):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown policy {policy}; use one of {', '.join(POLICIES)}.")
+        self.name = name
+        self.handler = handler
+        self.entities = set(entities) if entities else None
+        self.actions = set(actions) if actions else None
+        self.policy = policy
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.queue = deque()
+        self.scheduled = False
+        self.delivered = 0
+        self.dropped = 0
+        self.batches = 0
+        self.failed_batches = 0
+        self.last_sequence = 0
+
+    def wants(self, ledger_event):
+        return ((self.entities is None or ledger_event.entity in self.entities)
+                and (self.actions is None or ledger_event.action in self.actions))
+
+class EventBus:
+    """
+    Hands committed ledger events to subscribers on a bounded pool of
+    worker threads, so a slow subscriber never delays the request that
+    committed the change.
+
+    Each subscriber has its own queue of at most max_queue events and is
+    called with micro-batches of up to batch_size events, in commit order,
+    one batch at a time. A batch is sent as soon as it is full or
+    batch_wait seconds after its first event. When a queue is full the
+    subscriber's policy applies: drop_oldest discards the oldest queued
+    event, drop_newest discards the new one, and block makes the
+    committing request wait up to block_timeout seconds for room before
+    dropping it. Handlers run inside an application context; an exception
+    is logged and the batch is counted as failed, not retried.
+    """
+
+    def __init__(self, app, max_workers=2, max_queue=10000, batch_size=100, batch_wait=0.01,
+                 block_timeout=0.1):
+        self.app = app
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.batch_wait = batch_wait
+        self.block_timeout = block_timeout
+        self.subscriptions = {}
+        self._sequence = itertools.count(1)
+        self._published = 0
+        self._condition = threading.Condition()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='ledger-events')
+
+    def subscribe(self, name, handler, entities=None, actions=None, policy=DROP_OLDEST,
+                  max_queue=None, batch_size=None):
+        """
+        Call handler(events) with batches of committed events. entities
+        ('account', 'transaction') and actions ('created', 'updated',
+        'deleted') narrow the events down; None means all of them.
+        """
+        subscription = Subscription(name, handler, entities, actions, policy,
+                                    max_queue or self.max_queue, batch_size or self.batch_size)
+        with self._condition:
+            if name in self.subscriptions:
+                raise ValueError(f'A subscriber named {name} already exists.')
+            self.subscriptions[name] = subscription
+        return subscription
+
+    def unsubscribe(self, name):
+        with self._condition:
+            self.subscriptions.pop(name, None)
+
+    @property
+    def active(self):
+        """Whether anybody listens; changes are not even recorded otherwise."""
+        return bool(self.subscriptions)
+
+    def publish(self, changes):
+        """Queue (entity, action, id, data) changes that have just been committed."""
+        if not changes or not self.subscriptions:
+            return []
+        now = time.time()
+        with self._condition:
+            events = [LedgerEvent(next(self._sequence), entity, action, row_id, data, now)
+                      for entity, action, row_id, data in changes]
+            self._published = events[-1].sequence
+            for subscription in list(self.subscriptions.values()):
+                wanted = [e for e in events if subscription.wants(e)]
+                if not wanted:
+                    continue
+                for ledger_event in wanted:
+                    self._enqueue(subscription, ledger_event)
+                if not subscription.scheduled and subscription.queue:
+                    subscription.scheduled = True
+                    self._executor.submit(self._drain, subscription)
+                self._condition.notify_all()
+        return events
+
+    def _enqueue(self, subscription, ledger_event):
+        # Called with the condition held
+        queue = subscription.queue
+        if len(queue) >= subscription.max_queue and subscription.policy == BLOCK:
+            if not subscription.scheduled:
+                subscription.scheduled = True
+                self._executor.submit(self._drain, subscription)
+            self._condition.wait_for(lambda: len(queue) < subscription.max_queue, self.block_timeout)
+        if len(queue) < subscription.max_queue:
+            queue.append(ledger_event)
+        elif subscription.policy == DROP_OLDEST:
+            queue.popleft()
+            queue.append(ledger_event)
+            subscription.dropped += 1
+        else:
+            subscription.dropped += 1
+
+    def _drain(self, subscription):
+        while True:
+            with self._condition:
+                queue = subscription.queue
+                if len(queue) < subscription.batch_size and self.batch_wait:
+                    deadline = queue[0].published_at + self.batch_wait if queue else time.time()
+                    self._condition.wait_for(lambda: len(queue) >= subscription.batch_size,
+                                             max(deadline - time.time(), 0))
+                batch = [queue.popleft() for _ in range(min(len(queue), subscription.batch_size))]
+                if not batch:
+                    subscription.scheduled = False
+                    self._condition.notify_all()
+                    return
+                # Room in the queue for publishers blocked on it
+                self._condition.notify_all()
+            try:
+                with self.app.app_context():
+                    subscription.handler(batch)
+            except Exception:
+                self.app.logger.exception('Ledger event subscriber %s failed on %d event(s)',
+                                          subscription.name, len(batch))
+                failed = True
+            else:
+                failed = False
+            with self._condition:
+                subscription.batches += 1
+                subscription.failed_batches += failed
+                subscription.delivered += len(batch)
+                subscription.last_sequence = batch[-1].sequence
+
+    def stats(self):
+        """Per-subscriber queue and lag figures."""
+        now = time.time()
+        with self._condition:
+            return [{
+                'name': s.name,
+                'policy': s.policy,
+                'queued': len(s.queue),
+                'max_queue': s.max_queue,
+                'delivered': s.delivered,
+                'dropped': s.dropped,
+                'batches': s.batches,
+                'failed_batches': s.failed_batches,
+                # Events published since the last one this subscriber handled
+                'lag_events': self._published - s.last_sequence if s.queue or s.scheduled else 0,
+                'lag_seconds': round(now - s.queue[0].published_at, 3) if s.queue else 0.0
+            } for s in self.subscriptions.values()]
+
+    def flush(self, timeout=None):
+        """Wait until every queued event has been handled; False on timeout."""
+        with self._condition:
+            return self._condition.wait_for(
+                lambda: not any(s.queue or s.scheduled for s in self.subscriptions.values()), timeout)
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait, cancel_futures=not wait)
+
+# Recording changes from the ORM session
+
+def _bus():
+    if not has_app_context():
+        return None
+    bus = current_app.extensions.get('event_bus')
+    return bus if bus is not None and bus.active else None
+
+def record(session, entity, action, rows):
+    """
+    Add changes made outside the ORM (e.g. bulk Core inserts) to the events
+    of the session's transaction. rows are mappings holding the entity's
+    fields; they are published when the session commits.
+    """
+    if _bus() is None:
+        return
+    fields = dict(ENTITIES.values())[entity]
+    session.info.setdefault(PENDING_KEY, []).extend(
+        (entity, action, row['id'], snapshot(fields, row)) for row in rows)
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _record_flush(session, flush_context):
+    if _bus() is None:
+        return
+    pending = session.info.setdefault(PENDING_KEY, [])
+    for objects, action in ((session.new, CREATED), (session.dirty, UPDATED), (session.deleted, DELETED)):
+        for obj in objects:
+            entity = ENTITIES.get(type(obj))
+            if entity is None:
+                continue
+            if action == UPDATED and not session.is_modified(obj, include_collections=False):
+                continue
+            name, fields = entity
+            # Loaded values only: a deleted row can no longer load expired attributes
+            values = inspect(obj).dict
+            pending.append((name, action, obj.id, snapshot(fields, values)))
+
+@event.listens_for(RoutingSession, 'after_commit')
+def _publish_commit(session):
+    changes = session.info.pop(PENDING_KEY, None)
+    bus = _bus()
+    if changes and bus is not None:
+        bus.publish(changes)
+
+@event.listens_for(RoutingSession, 'after_rollback')
+def _discard_rollback(session):
+    session.info.pop(PENDING_KEY, None)
+
+def init_event_bus(app):
+    """Create the ledger event bus of an application."""
+    app.extensions['event_bus'] = EventBus(
+        app,
+        max_workers=app.config.get('EVENT_BUS_MAX_WORKERS', 2),
+        max_queue=app.config.get('EVENT_BUS_MAX_QUEUE', 10000),
+        batch_size=app.config.get('EVENT_BUS_BATCH_SIZE', 100),
+        batch_wait=app.config.get('EVENT_BUS_BATCH_WAIT', 0.01),
+        block_timeout=app.config.get('EVENT_BUS_BLOCK_TIMEOUT', 0.1)
+    )
+
+def get_event_bus():
+    """The ledger event bus of the current application."""
+    return current_app.extensions['event_bus']
@@ -0,0 +1,213 @@
+# modules/services/instrumentation.py
+
+import hmac
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from flask import Response, current_app, request, request_started, request_finished, \
+    before_render_template, template_rendered
+from sqlalchemy import event
+from modules.database.db import db
+from modules.services.decorators import roles_required
+
+# Upper bounds of the histogram buckets; +Inf is implied
+SECONDS_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 500)
+ROW_BUCKETS = (0, 1, 10, 100, 1000, 10000, 100000, 1000000)
+
+# (metric name, help text, buckets, RequestStats attribute)
+REQUEST_METRICS = [
+    ('bookkeeping_request_duration_seconds', 'Time from request start to response, per endpoint',
+     SECONDS_BUCKETS, 'handler_time'),
+    ('bookkeeping_request_db_seconds', 'Time spent executing SQL statements, per request',
+     SECONDS_BUCKETS, 'db_time'),
+    ('bookkeeping_request_queries', 'SQL statements executed, per request', QUERY_BUCKETS, 'queries'),
+    ('bookkeeping_request_rows', 'Rows fetched from the database, per request', ROW_BUCKETS, 'rows'),
+    ('bookkeeping_request_serialization_seconds', 'Time spent rendering JSON or templates, per request',
+     SECONDS_BUCKETS, 'serialization_time'),
+]
+
+# Statistics of the request being handled in this thread or task
+_current = ContextVar('request_stats', default=None)
+
+class RequestStats:
+    """SQL and timing figures of one request."""
+
+    __slots__ = ('started', 'queries', 'db_time', 'rows', 'serialization_time', 'handler_time',
+                 '_statement_started', '_render_started')
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_time = 0.0
+        self.rows = 0
+        self.serialization_time = 0.0
+        self.handler_time = 0.0
+        self._statement_started = None
+        self._render_started = None
+
+    def server_timing(self):
+        """The value of the Server-Timing header, durations in milliseconds."""
+        return (f'db;dur={self.db_time * 1000:.2f};desc="{self.queries} queries, {self.rows} rows", '
+                f'serialize;dur={self.serialization_time * 1000:.2f}, '
+                f'handler;dur={self.handler_time * 1000:.2f}')
+
+class Histogram:
+    """Cumulative histogram with Prometheus semantics, one series per label set."""
+
+    def __init__(self, name, help, buckets):
+        self.name = name
+        self.help = help
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._series = {}
+
+    def observe(self, labels, value):
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][bisect_left(self.buckets, value)] += 1
+            series[1] += value
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            series = sorted((labels, list(counts), total) for labels, (counts, total) in self._series.items())
+        for labels, counts, total in series:
+            label_text = ','.join(f'{key}="{value}"' for key, value in labels)
+            cumulative = 0
+            for bound, count in zip(self.buckets + ('+Inf',), counts):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{{label_text},le="{bound}"}} {cumulative}')
+            lines.append(f'{self.name}_sum{{{label_text}}} {total}')
+            lines.append(f'{self.name}_count{{{label_text}}} {cumulative}')
+        return '\n'.join(lines)
+
+class RequestMetrics:
+    """Per-endpoint histograms of the RequestStats of every finished request."""
+
+    def __init__(self):
+        self.histograms = [(Histogram(name, help, buckets), attribute)
+                           for name, help, buckets, attribute in REQUEST_METRICS]
+
+    def record(self, endpoint, method, stats):
+        labels = (('endpoint', endpoint), ('method', method))
+        for histogram, attribute in self.histograms:
+            histogram.observe(labels, getattr(stats, attribute))
+
+    def render(self):
+        return '\n'.join(histogram.render() for histogram, _ in self.histograms) + '\n'
+
+# SQLAlchemy and sqlite3 hooks
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current.get()
+    if stats is not None:
+        stats._statement_started = time.perf_counter()
+
+def _count_rows(conn, cursor, statement, parameters, context, executemany):
+    if _current.get() is not None:
+        cursor.row_factory = _count_row
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current.get()
+    if stats is not None and stats._statement_started is not None:
+        stats.queries += 1
+        stats.db_time += time.perf_counter() - stats._statement_started
+        stats._statement_started = None
+
+def _count_row(cursor, row):
+    # sqlite3 row factory: sees every row fetched through the cursor
+    stats = _current.get()
+    if stats is not None:
+        stats.rows += 1
+    return row
+
+def instrument_engine(engine):
+    """Time every statement of an engine and, for SQLite, count the rows it returns."""
+    event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+    event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+    if engine.dialect.name == 'sqlite':
+        event.listen(engine, 'before_cursor_execute', _count_rows)
+
+# Flask signal receivers
+
+def _request_started(sender, **extra):
+    _current.set(RequestStats())
+
+def _request_finished(sender, response, **extra):
+    stats = _current.get()
+    if stats is None:
+        return
+    _current.set(None)
+    stats.handler_time = time.perf_counter() - stats.started
+    response.headers['Server-Timing'] = stats.server_timing()
+    endpoint = request.url_rule.endpoint if request.url_rule is not None else 'unmatched'
+    sender.extensions['request_metrics'].record(endpoint, request.method, stats)
+
+def _before_render(sender, template, context, **extra):
+    stats = _current.get()
+    if stats is not None:
+        stats._render_started = time.perf_counter()
+
+def _rendered(sender, template, context, **extra):
+    stats = _current.get()
+    if stats is not None and stats._render_started is not None:
+        stats.serialization_time += time.perf_counter() - stats._render_started
+        stats._render_started = None
+
+def timed_representation(represent):
+    """Wrap a flask-restx representation function so its time counts as serialization."""
+    if getattr(represent, 'timed', False):
+        return represent
+
+    def timed(data, code, headers=None):
+        stats = _current.get()
+        if stats is None:
+            return represent(data, code, headers)
+        started = time.perf_counter()
+        response = represent(data, code, headers)
+        stats.serialization_time += time.perf_counter() - started
+        return response
+    timed.timed = True
+    return timed
+
+def init_instrumentation(app, api=None):
+    """
+    Instrument requests when INSTRUMENTATION_ENABLED is set: add a
+    Server-Timing header to every response and serve per-endpoint
+    histograms at /metrics in the Prometheus text format. /metrics is open
+    to admins and to scrapers sending METRICS_TOKEN as a bearer token. When
+    switched off nothing is hooked, so requests pay nothing.
+    """
+    if not app.config.get('INSTRUMENTATION_ENABLED'):
+        return
+    app.extensions['request_metrics'] = RequestMetrics()
+    with app.app_context():
+        engines = list(db.engines.values())
+    if app.extensions.get('read_engine') is not None:
+        engines.append(app.extensions['read_engine'])
+    for engine in engines:
+        instrument_engine(engine)
+
+    request_started.connect(_request_started, app)
+    request_finished.connect(_request_finished, app)
+    before_render_template.connect(_before_render, app)
+    template_rendered.connect(_rendered, app)
+    if api is not None:
+        for mediatype, represent in list(api.representations.items()):
+            api.representations[mediatype] = timed_representation(represent)
+
+    @roles_required('Admin')
+    def admin_metrics():
+        return Response(current_app.extensions['request_metrics'].render(),
+                        mimetype='text/plain; version=0.0.4')
+
+    @app.route('/metrics')
+    def metrics():
+        token = current_app.config.get('METRICS_TOKEN')
+        if token and hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}'):
+            return admin_metrics.__wrapped__()
+        return admin_metrics()
@@ -0,0 +1,432 @@
+# modules/services/jobs.py
+
+import json
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timezone
+from flask import current_app
+from sqlalchemy import func
+from modules.database.db import db
+from modules.database.routing import read_only
+from modules.models.transaction import Transaction
+from modules.services import reports
+
+# Job states; the last three are final
+QUEUED, RUNNING, SUCCEEDED, FAILED, CANCELLED = 'queued', 'running', 'succeeded', 'failed', 'cancelled'
+FINISHED_STATES = (SUCCEEDED, FAILED, CANCELLED)
+
+# Transactions read per round trip by the export job
+EXPORT_CHUNK_SIZE = 5000
+
+class JobCancelled(Exception):
+    """Raised inside a job when it has been asked to stop."""
+
+class JobKind:
+    """A kind of job: the function that runs it and the parameters it takes."""
+
+    def __init__(self, name, func, params):
+        self.name = name
+        self.func = func
+        self.params = params
+
+    def prepare(self, params):
+        """Convert request parameters to the function's arguments; ValueError if invalid."""
+        params = params or {}
+        unknown = set(params) - set(self.params)
+        if unknown:
+            raise ValueError(f"Unknown parameter(s) for {self.name}: {', '.join(sorted(unknown))}.")
+        prepared = {}
+        for name, convert in self.params.items():
+            if params.get(name) is not None:
+                try:
+                    prepared[name] = convert(params[name])
+                except (TypeError, ValueError):
+                    raise ValueError(f'Invalid value for {name}.')
+        return prepared
+
+JOB_KINDS = {}
+
+def job_kind(name, **params):
+    """
+    Register a function as a job kind. Keyword arguments map each accepted
+    parameter to the function converting it from JSON. The function is
+    called as func(context, **params) inside an application context and
+    returns a JSON-serializable result, or None after writing the result to
+    context.output itself.
+
+    A job can only stop part-way where it calls context.progress(). The
+    report kinds build their result in one call, so a cancel that arrives
+    while they run takes effect once the report is done: the result is
+    thrown away and the job ends cancelled. Only transactions_export stops
+    between chunks.
+    """
+    def decorator(func):
+        JOB_KINDS[name] = JobKind(name, func, params)
+        return func
+    return decorator
+
+def _period(value):
+    if value not in reports.PERIOD_FORMATS:
+        raise ValueError(value)
+    return value
+
+@job_kind('trial_balance', as_of=date.fromisoformat)
+def _trial_balance(context, as_of=None):
+    return reports.trial_balance(as_of)
+
+@job_kind('general_ledger', date_from=date.fromisoformat, date_to=date.fromisoformat, account_id=int)
+def _general_ledger(context, date_from=None, date_to=None, account_id=None):
+    return reports.general_ledger(date_from, date_to, account_id)
+
+@job_kind('period_totals', period=_period, date_from=date.fromisoformat, date_to=date.fromisoformat)
+def _period_totals(context, period='month', date_from=None, date_to=None):
+    return reports.period_totals(period, date_from, date_to)
+
+@job_kind('flows', date_from=date.fromisoformat, date_to=date.fromisoformat)
+def _flows(context, date_from=None, date_to=None):
+    return reports.flows(date_from, date_to)
+
+@job_kind('transactions_export', date_from=date.fromisoformat, date_to=date.fromisoformat)
+def _transactions_export(context, date_from=None, date_to=None):
+    """Every transaction in the range as a JSON array, streamed to the result file."""
+    filters = []
+    if date_from is not None:
+        filters.append(Transaction.date >= date_from)
+    if date_to is not None:
+        filters.append(Transaction.date <= date_to)
+    total = db.session.execute(db.select(func.count(Transaction.id)).filter(*filters)).scalar()
+    query = db.select(
+        Transaction.id, Transaction.date, Transaction.amount, Transaction.description,
+        Transaction.debit_account_id, Transaction.credit_account_id
+    ).filter(*filters).order_by(Transaction.date, Transaction.id).execution_options(yield_per=EXPORT_CHUNK_SIZE)
+    output = context.output
+    output.write('[')
+    done = 0
+    for partition in db.session.execute(query).partitions():
+        for transaction_id, transaction_date, amount, description, debit, credit in partition:
+            output.write(',' if done else '')
+            output.write(json.dumps({
+                'id': transaction_id,
+                'date': transaction_date.isoformat(),
+                'amount': amount,
+                'description': description,
+                'debit_account_id': debit,
+                'credit_account_id': credit
+            }))
+            done += 1
+        context.progress(done, total)
+    output.write(']')
+    return None
+
+def _json_default(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    raise TypeError(f'{type(value).__name__} is not JSON serializable')
+
+def _now():
+    return datetime.now(timezone.utc)
+
+# Fields of a job kept in its state file, result_dir/<job id>.state.json
+STATE_FIELDS = ('id', 'kind', 'user_id', 'status', 'progress', 'error',
+                'created_at', 'started_at', 'finished_at', 'result_path')
+DATETIME_FIELDS = ('created_at', 'started_at', 'finished_at')
+
+class Job:
+    """State of one submitted job, as reported by GET /api/jobs/<id>."""
+
+    def __init__(self, kind, params, user_id):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.params = params
+        self.user_id = user_id
+        self.status = QUEUED
+        self.progress = 0.0
+        self.error = None
+        self.created_at = _now()
+        self.started_at = None
+        self.finished_at = None
+        self.result_path = None
+        self.future = None
+        self.cancel_requested = threading.Event()
+
+    @property
+    def finished(self):
+        return self.status in FINISHED_STATES
+
+    def state(self):
+        """The persisted fields as JSON-serializable values."""
+        state = {name: getattr(self, name) for name in STATE_FIELDS}
+        for name in DATETIME_FIELDS:
+            if state[name] is not None:
+                state[name] = state[name].isoformat()
+        return state
+
+    @classmethod
+    def from_state(cls, state):
+        """A job read back from its state file, e.g. one run by another worker process."""
+        job = cls(state['kind'], {}, state['user_id'])
+        for name in STATE_FIELDS:
+            value = state.get(name)
+            if name in DATETIME_FIELDS and value is not None:
+                value = datetime.fromisoformat(value)
+            setattr(job, name, value)
+        return job
+
+class JobContext:
+    """Handed to a running job: its result file and a progress/cancellation hook."""
+
+    def __init__(self, runner, job, output):
+        self.runner = runner
+        self.job = job
+        self.output = output
+
+    def progress(self, done, total):
+        """Record progress and stop the job if it has been cancelled."""
+        if self.runner.cancel_requested(self.job):
+            raise JobCancelled()
+        progress = min(done / total, 1.0) if total else 1.0
+        if progress != self.job.progress:
+            self.job.progress = progress
+            self.runner.save(self.job)
+
+class JobRunner:
+    """
+    Runs report jobs on a local thread pool, outside the request that asked
+    for them. Each job gets its own application context and database
+    session, reads through the read-only engine when one is configured, and
+    writes its result as JSON to result_dir/<job id>.json.
+
+    Every change of a job's state is also written to
+    result_dir/<job id>.state.json, so any worker process sharing result_dir
+    can report on it: get() falls back to the state file for jobs this
+    process did not start. A cancel for such a job leaves a
+    result_dir/<job id>.cancel marker that the owning process picks up at
+    the job's next progress update. Results and state files stay on disk
+    until cleanup() removes those older than result_ttl seconds.
+    """
+
+    def __init__(self, app, max_workers=2, result_dir=None, result_ttl=None):
+        self.app = app
+        self.result_dir = result_dir
+        self.result_ttl = result_ttl
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='job')
+        self._lock = threading.Lock()
+        self._jobs = {}
+
+    def submit(self, kind, params=None, user_id=None):
+        """Queue a job; ValueError if the kind or its parameters are invalid."""
+        if kind not in JOB_KINDS:
+            raise ValueError(f'Unknown job kind: {kind}.')
+        prepared = JOB_KINDS[kind].prepare(params)
+        self.cleanup()
+        job = Job(kind, prepared, user_id)
+        with self._lock:
+            self._jobs[job.id] = job
+        self.save(job)
+        job.future = self._executor.submit(self._run, job)
+        return job
+
+    def get(self, job_id):
+        """The job, from this process or from its state file; None if unknown."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is not None or not self.result_dir:
+            return job
+        # Job ids come from URLs: anything but a hex id cannot name a state file
+        if not job_id.isalnum():
+            return None
+        state = self._read_state(job_id)
+        return Job.from_state(state) if state is not None else None
+
+    def _read_state(self, job_id):
+        try:
+            with open(self._state_path(job_id)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def jobs(self):
+        with self._lock:
+            return list(self._jobs.values())
+
+    def cancel(self, job_id):
+        """Ask a job to stop; queued jobs never start. Returns the job or None."""
+        job = self.get(job_id)
+        if job is None or job.finished:
+            return job
+        if job.future is None:
+            # Started by another worker process, which checks for the marker
+            open(self._cancel_path(job.id), 'w').close()
+            return job
+        job.cancel_requested.set()
+        if job.future.cancel():
+            self._finish(job, CANCELLED)
+        return job
+
+    def cancel_requested(self, job):
+        """Whether this or another worker process has asked the job to stop."""
+        if job.cancel_requested.is_set():
+            return True
+        if self.result_dir and os.path.exists(self._cancel_path(job.id)):
+            job.cancel_requested.set()
+            return True
+        return False
+
+    def discard(self, job_id):
+        """Cancel a job and forget it together with its result file."""
+        job = self.cancel(job_id)
+        if job is not None:
+            with self._lock:
+                self._jobs.pop(job_id, None)
+            self._remove_result(job)
+        return job
+
+    def cleanup(self, max_age=None):
+        """Forget finished jobs and delete result files older than max_age seconds."""
+        max_age = self.result_ttl if max_age is None else max_age
+        if max_age is None:
+            return 0
+        removed = 0
+        now = _now()
+        with self._lock:
+            expired = [job for job in self._jobs.values()
+                       if job.finished and (now - job.finished_at).total_seconds() > max_age]
+            for job in expired:
+                del self._jobs[job.id]
+        for job in expired:
+            self._remove_result(job)
+            removed += 1
+        # Files left behind by other worker processes or earlier runs
+        if self.result_dir and os.path.isdir(self.result_dir):
+            cutoff = time.time() - max_age
+            for name in os.listdir(self.result_dir):
+                if not name.endswith(('.json', '.cancel')):
+                    continue
+                path = os.path.join(self.result_dir, name)
+                # Another worker process may finish, discard or sweep a job meanwhile
+                try:
+                    if os.path.getmtime(path) >= cutoff:
+                        continue
+                    if name.endswith(('.state.json', '.cancel')):
+                        # A report job saves no progress while it runs: its age says nothing
+                        state = self._read_state(name.split('.', 1)[0])
+                        if state is not None and state['status'] not in FINISHED_STATES:
+                            continue
+                    os.remove(path)
+                except FileNotFoundError:
+                    continue
+                # Count results, not the state files and markers next to them
+                removed += not name.endswith(('.state.json', '.cancel'))
+        return removed
+
+    def shutdown(self, wait=True):
+        """Cancel queued and running jobs and stop the pool."""
+        for job in self.jobs():
+            if not job.finished:
+                job.cancel_requested.set()
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+
+    def _result_path(self, job):
+        return os.path.join(self.result_dir, f'{job.id}.json')
+
+    def _state_path(self, job_id):
+        return os.path.join(self.result_dir, f'{job_id}.state.json')
+
+    def _cancel_path(self, job_id):
+        return os.path.join(self.result_dir, f'{job_id}.cancel')
+
+    def save(self, job):
+        """
+        Write the job's state file; skipped for jobs that have been
+        discarded. A failure is logged: this process still knows the job,
+        and a job that cannot write its result fails on its own.
+        """
+        if not self.result_dir:
+            return
+        with self._lock:
+            if self._jobs.get(job.id) is not job:
+                return
+        path = self._state_path(job.id)
+        # Written aside and renamed so readers never see half a file
+        partial = f'{path}.{threading.get_ident()}.part'
+        try:
+            os.makedirs(self.result_dir, exist_ok=True)
+            with open(partial, 'w') as f:
+                json.dump(job.state(), f)
+            os.replace(partial, path)
+        except OSError:
+            self.app.logger.exception('Saving the state of job %s failed', job.id)
+
+    def _remove_result(self, job):
+        paths = [job.result_path]
+        if self.result_dir:
+            paths += [self._state_path(job.id), self._cancel_path(job.id)]
+        for path in paths:
+            if path:
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+
+    def _finish(self, job, status, error=None):
+        job.status = status
+        job.error = error
+        job.finished_at = _now()
+        self.save(job)
+
+    def _run(self, job):
+        if self.cancel_requested(job):
+            self._finish(job, CANCELLED)
+            return
+        job.status = RUNNING
+        job.started_at = _now()
+        partial = None
+        try:
+            try:
+                os.makedirs(self.result_dir, exist_ok=True)
+                self.save(job)
+                path = self._result_path(job)
+                partial = f'{path}.part'
+                with self.app.app_context():
+                    try:
+                        with open(partial, 'w') as output, read_only(db.session):
+                            context = JobContext(self, job, output)
+                            result = JOB_KINDS[job.kind].func(context, **job.params)
+                            # A cancel that came in while the job ran drops its result
+                            if self.cancel_requested(job):
+                                raise JobCancelled()
+                            if result is not None:
+                                json.dump(result, output, default=_json_default)
+                    finally:
+                        db.session.remove()
+                # Publish the result only once it is complete
+                os.replace(partial, path)
+            finally:
+                # Gone before the job is reported finished
+                if partial and os.path.exists(partial):
+                    os.remove(partial)
+        except JobCancelled:
+            self._finish(job, CANCELLED)
+        except Exception as e:
+            self.app.logger.exception('Job %s (%s) failed', job.id, job.kind)
+            self._finish(job, FAILED, str(e))
+        else:
+            job.result_path = path
+            job.progress = 1.0
+            self._finish(job, SUCCEEDED)
+
+def init_jobs(app):
+    """Create the job runner for an application."""
+    app.extensions['jobs'] = JobRunner(
+        app,
+        max_workers=app.config.get('JOBS_MAX_WORKERS', 2),
+        result_dir=app.config.get('JOBS_RESULT_DIR'),
+        result_ttl=app.config.get('JOBS_RESULT_TTL')
+    )
+
+def get_jobs():
+    """The job runner of the current application."""
+    return current_app.extensions['jobs']
@@ -0,0 +1,359 @@
+# modules/services/ledger_cache.py
+
+import threading
+from flask import current_app
+from sqlalchemy import func
+from modules.database.db import db
+from modules.models.transaction import Transaction
+from modules.services import ledger_version
+
+# NumPy is imported inside the methods that build or read the arrays, so a
+# worker that never serves an analytics report never loads it
+
+# Bytes held per cached transaction: id, date, amount, debit, credit, live flag
+ROW_BYTES = 8 + 8 + 8 + 4 + 4 + 1
+
+# numpy datetime units for the supported reporting periods
+PERIOD_UNITS = {'day': 'D', 'month': 'M', 'year': 'Y'}
+
+# Pairs of account ids are counted in a dense table up to this many cells
+DENSE_FLOW_CELLS = 1 << 22
+
+LOAD_CHUNK_SIZE = 50000
+
+UNIX_EPOCH_JULIAN_DAY = 2440587.5
+
+class LedgerCache:
+    """
+    Process-local columnar copy of the transactions table for analytics.
+
+    Columns are NumPy arrays ordered by transaction id: ids (int64), dates
+    (datetime64[D]), amounts (float64), debit and credit account ids (int32)
+    and a live flag that marks deleted rows until the next rebuild.
+
+    The arrays are tagged with the database-backed ledger version they were
+    built from. Every read compares it with ledger_version.current() and
+    rebuilds when another worker, generate_ledger or any other writer has
+    moved it. This process's own write paths apply their commits in place
+    via record_insert/record_update/record_delete, as long as their write is
+    the only one since the arrays were built (the version moved by exactly
+    one); otherwise, or after invalidate(), the next read rebuilds.
+    """
+
+    def __init__(self, enabled=True, max_bytes=None):
+        self.enabled = enabled
+        self.max_bytes = max_bytes
+        self._lock = threading.RLock()
+        self._columns = None
+        self._size = 0
+        # Ledger version the arrays hold; None until loaded or after invalidate()
+        self._built_version = None
+        self.loads = 0
+        self.over_budget = False
+
+    @property
+    def version(self):
+        return self._built_version
+
+    def invalidate(self):
+        """Force a rebuild on the next read."""
+        with self._lock:
+            self._drop()
+
+    def _drop(self):
+        self._columns = None
+        self._size = 0
+        self._built_version = None
+
+    def stats(self):
+        """Current size, memory use and version of the cache."""
+        with self._lock:
+            capacity = len(self._columns['ids']) if self._columns else 0
+            return {
+                'enabled': self.enabled,
+                'loaded': self._columns is not None,
+                'rows': int(self._columns['live'][:self._size].sum()) if self._columns else 0,
+                'capacity': capacity,
+                'bytes': capacity * ROW_BYTES,
+                'max_bytes': self.max_bytes,
+                'over_budget': self.over_budget,
+                'version': self._built_version,
+                'loads': self.loads
+            }
+
+    # Loading
+
+    def _allocate(self, capacity):
+        import numpy as np
+        return {
+            'ids': np.empty(capacity, dtype=np.int64),
+            'dates': np.empty(capacity, dtype='datetime64[D]'),
+            'amounts': np.empty(capacity, dtype=np.float64),
+            'debit': np.empty(capacity, dtype=np.int32),
+            'credit': np.empty(capacity, dtype=np.int32),
+            'live': np.zeros(capacity, dtype=bool)
+        }
+
+    def _fits(self, capacity):
+        return self.max_bytes is None or capacity * ROW_BYTES <= self.max_bytes
+
+    def _load(self):
+        import numpy as np
+        self._columns = None
+        self._size = 0
+        # Read before the rows: a write in between only costs another rebuild
+        version = ledger_version.current()
+        count = db.session.execute(db.select(func.count(Transaction.id))).scalar()
+        if not self._fits(count):
+            self.over_budget = True
+            self._built_version = version
+            return
+        # Dates come back as Julian day numbers so a whole chunk converts to
+        # NumPy in one call instead of parsing one string per row
+        query = db.select(
+            Transaction.id,
+            func.julianday(Transaction.date) - UNIX_EPOCH_JULIAN_DAY,
+            Transaction.amount,
+            Transaction.debit_account_id,
+            Transaction.credit_account_id
+        ).order_by(Transaction.id)
+        # Read through the DBAPI cursor: plain tuples convert to an array in C
+        connection = db.session.connection()
+        sql = str(query.compile(dialect=connection.dialect, compile_kwargs={'literal_binds': True}))
+        cursor = connection.connection.cursor()
+        cursor.execute(sql)
+        chunks = []
+        while True:
+            rows = cursor.fetchmany(LOAD_CHUNK_SIZE)
+            if not rows:
+                break
+            block = np.array(rows, dtype=np.float64)
+            chunks.append((
+                block[:, 0].astype(np.int64),
+                np.floor(block[:, 1]).astype(np.int64).astype('datetime64[D]'),
+                block[:, 2],
+                block[:, 3].astype(np.int32),
+                block[:, 4].astype(np.int32)
+            ))
+        cursor.close()
+        size = sum(len(chunk[0]) for chunk in chunks)
+        columns = self._allocate(max(size, 1))
+        offset = 0
+        for chunk in chunks:
+            end = offset + len(chunk[0])
+            for name, values in zip(('ids', 'dates', 'amounts', 'debit', 'credit'), chunk):
+                columns[name][offset:end] = values
+            offset = end
+        columns['live'][:size] = True
+        self._columns = columns
+        self._size = size
+        self._built_version = version
+        self.over_budget = False
+        self.loads += 1
+
+    def _ensure_loaded(self):
+        """Return True when the arrays match the committed ledger and are usable."""
+        if not self.enabled:
+            return False
+        if self._built_version is None or self._built_version != ledger_version.current():
+            self._load()
+        return self._columns is not None
+
+    # Incremental updates from the write paths
+
+    def _locate(self, transaction_id):
+        import numpy as np
+        ids = self._columns['ids'][:self._size]
+        index = int(np.searchsorted(ids, transaction_id))
+        if index < self._size and ids[index] == transaction_id:
+            return index
+        return None
+
+    def _write(self, index, entry):
+        import numpy as np
+        transaction_id, transaction_date, amount, debit_account_id, credit_account_id = entry
+        columns = self._columns
+        columns['ids'][index] = transaction_id
+        columns['dates'][index] = np.datetime64(transaction_date.isoformat()[:10], 'D')
+        columns['amounts'][index] = amount
+        columns['debit'][index] = debit_account_id
+        columns['credit'][index] = credit_account_id
+        columns['live'][index] = True
+
+    def _append(self, entries):
+        needed = self._size + len(entries)
+        capacity = len(self._columns['ids'])
+        if needed > capacity:
+            capacity = max(needed, capacity * 2, 1024)
+            if not self._fits(capacity):
+                capacity = needed
+            if not self._fits(capacity):
+                self.over_budget = True
+                self._drop()
+                return
+            grown = self._allocate(capacity)
+            for name, column in self._columns.items():
+                grown[name][:self._size] = column[:self._size]
+            self._columns = grown
+        for entry in entries:
+            self._write(self._size, entry)
+            self._size += 1
+
+    def _follows_own_write(self):
+        """
+        Whether the commit being recorded is the only write since the arrays
+        were built. Called after the commit, which bumped the ledger version
+        once; a larger step means another writer got in too, so the arrays
+        are dropped and the next read rebuilds.
+        """
+        if self._columns is None:
+            return False
+        if ledger_version.current() == self._built_version + 1:
+            return True
+        self._drop()
+        return False
+
+    def record_insert(self, *transactions):
+        """Add committed transactions to the cache."""
+        self.record_entries([_entry(transaction) for transaction in transactions])
+
+    def record_update(self, *transactions):
+        """Apply committed changes to existing transactions to the cache."""
+        self.record_entries([_entry(transaction) for transaction in transactions])
+
+    def record_entries(self, entries):
+        """
+        Apply committed inserts or updates given as (id, date, amount,
+        debit_account_id, credit_account_id) tuples.
+        """
+        with self._lock:
+            if not self._follows_own_write():
+                return
+            new = []
+            last_id = self._columns['ids'][self._size - 1] if self._size else 0
+            for entry in sorted(entries, key=lambda entry: entry[0]):
+                index = self._locate(entry[0])
+                if index is not None:
+                    self._write(index, entry)
+                elif entry[0] > last_id:
+                    new.append(entry)
+                    last_id = entry[0]
+                else:
+                    # Ids below the cached maximum would break the sort order
+                    self._drop()
+                    return
+            if new:
+                self._append(new)
+            if self._columns is not None:
+                self._built_version += 1
+
+    def record_delete(self, *transaction_ids):
+        """Drop committed deletions from the cache."""
+        with self._lock:
+            if not self._follows_own_write():
+                return
+            for transaction_id in transaction_ids:
+                index = self._locate(transaction_id)
+                if index is not None:
+                    self._columns['live'][index] = False
+            self._built_version += 1
+
+    # Aggregations
+
+    def _selection(self, date_from=None, date_to=None):
+        import numpy as np
+        columns = self._columns
+        mask = columns['live'][:self._size].copy()
+        dates = columns['dates'][:self._size]
+        if date_from is not None:
+            mask &= dates >= np.datetime64(date_from, 'D')
+        if date_to is not None:
+            mask &= dates <= np.datetime64(date_to, 'D')
+        return mask
+
+    def account_totals(self, date_from=None, date_to=None):
+        """
+        {account_id: (debit_total, credit_total)} for the date range, or None
+        if the cache is unavailable.
+        """
+        import numpy as np
+        with self._lock:
+            if not self._ensure_loaded():
+                return None
+            mask = self._selection(date_from, date_to)
+            amounts = self._columns['amounts'][:self._size][mask]
+            debit = self._columns['debit'][:self._size][mask]
+            credit = self._columns['credit'][:self._size][mask]
+            size = int(max(debit.max(initial=0), credit.max(initial=0))) + 1
+            debit_totals = np.bincount(debit, weights=amounts, minlength=size)
+            credit_totals = np.bincount(credit, weights=amounts, minlength=size)
+            present = np.flatnonzero(np.bincount(debit, minlength=size) + np.bincount(credit, minlength=size))
+            return {int(account_id): (float(debit_totals[account_id]), float(credit_totals[account_id]))
+                    for account_id in present}
+
+    def period_totals(self, period='month', date_from=None, date_to=None):
+        """
+        [(period_label, amount, count)] in period order, or None if the cache
+        is unavailable.
+        """
+        import numpy as np
+        with self._lock:
+            if not self._ensure_loaded():
+                return None
+            mask = self._selection(date_from, date_to)
+            unit = PERIOD_UNITS[period]
+            keys = self._columns['dates'][:self._size][mask].astype(f'datetime64[{unit}]').astype(np.int64)
+            if not len(keys):
+                return []
+            first = keys.min()
+            offsets = keys - first
+            amounts = np.bincount(offsets, weights=self._columns['amounts'][:self._size][mask])
+            counts = np.bincount(offsets)
+            present = np.flatnonzero(counts)
+            labels = (present + first).astype(f'datetime64[{unit}]')
+            return [(str(label), float(amounts[offset]), int(counts[offset]))
+                    for label, offset in zip(labels, present)]
+
+    def flows(self, date_from=None, date_to=None):
+        """
+        [(debit_account_id, credit_account_id, amount, count)] for every
+        account pair with postings, or None if the cache is unavailable.
+        """
+        import numpy as np
+        with self._lock:
+            if not self._ensure_loaded():
+                return None
+            mask = self._selection(date_from, date_to)
+            debit = self._columns['debit'][:self._size][mask].astype(np.int64)
+            credit = self._columns['credit'][:self._size][mask].astype(np.int64)
+            amounts = self._columns['amounts'][:self._size][mask]
+            width = int(max(debit.max(initial=0), credit.max(initial=0))) + 1
+            if width * width <= DENSE_FLOW_CELLS:
+                # Small charts of accounts: count every pair in a dense table
+                keys = debit * width + credit
+                totals = np.bincount(keys, weights=amounts, minlength=width * width)
+                counts = np.bincount(keys, minlength=width * width)
+                pairs = np.flatnonzero(counts)
+                totals, counts = totals[pairs], counts[pairs]
+            else:
+                pairs, inverse = np.unique(debit * width + credit, return_inverse=True)
+                totals = np.zeros(len(pairs))
+                np.add.at(totals, inverse, amounts)
+                counts = np.bincount(inverse, minlength=len(pairs))
+            return [(int(pair // width), int(pair % width), float(amount), int(count))
+                    for pair, amount, count in zip(pairs, totals, counts)]
+
+def _entry(transaction):
+    return (transaction.id, transaction.date, transaction.amount,
+            transaction.debit_account_id, transaction.credit_account_id)
+
+def init_ledger_cache(app):
+    """Create the ledger cache for an application."""
+    app.extensions['ledger_cache'] = LedgerCache(
+        enabled=app.config.get('LEDGER_CACHE_ENABLED', True),
+        max_bytes=app.config.get('LEDGER_CACHE_MAX_BYTES')
+    )
+
+def get_ledger_cache():
+    """The ledger cache of the current application."""
+    return current_app.extensions['ledger_cache']
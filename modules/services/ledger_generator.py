@@ -0,0 +1,168 @@
+# modules/services/ledger_generator.py
+
+from datetime import date
+import numpy as np
+from modules.database.db import db
+from modules.models.account import Account, ACCOUNT_TYPES
+from modules.models.transaction import Transaction
+from modules.services import balances, ledger_version
+
+# Chart of accounts; names beyond these get a number appended
+ACCOUNT_NAMES = {
+    'Asset': ['Cash', 'Bank', 'Accounts Receivable', 'Inventory', 'Prepaid Expenses', 'Equipment'],
+    'Liability': ['Accounts Payable', 'Credit Card', 'Bank Loan', 'Sales Tax Payable', 'Accrued Wages'],
+    'Equity': ['Owner Capital', 'Retained Earnings', 'Owner Drawings'],
+    'Revenue': ['Sales', 'Service Revenue', 'Interest Income', 'Subscription Revenue'],
+    'Expense': ['Rent', 'Wages', 'Utilities', 'Office Supplies', 'Travel', 'Advertising', 'Insurance']
+}
+
+# (debit type, credit type, share of transactions, description prefix)
+ENTRY_TEMPLATES = [
+    ('Asset', 'Revenue', 0.30, 'Sale'),
+    ('Expense', 'Asset', 0.30, 'Payment'),
+    ('Expense', 'Liability', 0.12, 'Bill'),
+    ('Liability', 'Asset', 0.12, 'Settlement'),
+    ('Asset', 'Liability', 0.08, 'Financing'),
+    ('Asset', 'Equity', 0.05, 'Contribution'),
+    ('Equity', 'Asset', 0.03, 'Drawing')
+]
+
+DEFAULT_VOCABULARY = [
+    'invoice', 'order', 'subscription', 'consulting', 'hardware', 'software', 'license', 'shipping',
+    'catering', 'maintenance', 'repairs', 'fuel', 'parking', 'hosting', 'training', 'refund',
+    'deposit', 'retainer', 'commission', 'royalty', 'rental', 'lease', 'freight', 'materials',
+    'printing', 'postage', 'telephone', 'internet', 'cleaning', 'security', 'legal', 'audit'
+]
+
+DATE_DISTRIBUTIONS = ('uniform', 'weekdays', 'month-end', 'growth')
+
+# Rows generated from one random stream and written with one executemany
+BLOCK_SIZE = 100000
+
+def _day_weights(start, end, distribution):
+    days = np.arange(np.datetime64(start, 'D'), np.datetime64(end, 'D') + 1)
+    if distribution == 'uniform':
+        weights = np.ones(len(days))
+    elif distribution == 'weekdays':
+        # 1970-01-01 was a Thursday; weekend days get a fifth of the volume
+        weekday = (days.astype(np.int64) + 3) % 7
+        weights = np.where(weekday < 5, 1.0, 0.2)
+    elif distribution == 'month-end':
+        # Volume triples over the last five days of each month
+        next_month = (days.astype('datetime64[M]') + 1).astype('datetime64[D]')
+        weights = np.where((next_month - days).astype(np.int64) <= 5, 3.0, 1.0)
+    elif distribution == 'growth':
+        # Volume grows linearly to four times the starting rate
+        weights = np.linspace(1.0, 4.0, len(days))
+    else:
+        raise ValueError(f'Unknown date distribution: {distribution}')
+    return days, weights / weights.sum()
+
+def ensure_accounts(count):
+    """
+    Make sure `count` generated accounts exist, spread round-robin over the
+    account types, and return {type: array of their ids}. Accounts that
+    already exist under a generated name are reused.
+    """
+    wanted = []
+    for n in range(count):
+        account_type = ACCOUNT_TYPES[n % len(ACCOUNT_TYPES)]
+        names = ACCOUNT_NAMES[account_type]
+        index = n // len(ACCOUNT_TYPES)
+        name = names[index] if index < len(names) else f'{names[index % len(names)]} {index // len(names) + 1}'
+        wanted.append((name, account_type))
+    existing = dict(db.session.execute(db.select(Account.name, Account.id)).all())
+    db.session.add_all([Account(name=name, type=account_type)
+                        for name, account_type in wanted if name not in existing])
+    db.session.flush()
+    ids = dict(db.session.execute(db.select(Account.name, Account.id)).all())
+    by_type = {account_type: [] for account_type in ACCOUNT_TYPES}
+    for name, account_type in wanted:
+        by_type[account_type].append(ids[name])
+    return {account_type: np.array(account_ids, dtype=np.int64) for account_type, account_ids in by_type.items()}
+
+def generate_chunk(rng, size, accounts, days, day_weights, amount_median, amount_skew, phrases, phrase_weights):
+    """
+    Columns of `size` generated transactions: ISO dates, amounts,
+    descriptions and debit/credit account ids. Every row debits and credits
+    the same amount, so the generated ledger always balances.
+    """
+    shares = np.array([share for _, _, share, _ in ENTRY_TEMPLATES])
+    templates = rng.choice(len(ENTRY_TEMPLATES), size=size, p=shares / shares.sum())
+    debit = np.empty(size, dtype=np.int64)
+    credit = np.empty(size, dtype=np.int64)
+    for index, (debit_type, credit_type, _, _) in enumerate(ENTRY_TEMPLATES):
+        rows = np.flatnonzero(templates == index)
+        debit[rows] = rng.choice(accounts[debit_type], size=len(rows))
+        credit[rows] = rng.choice(accounts[credit_type], size=len(rows))
+    dates = np.datetime_as_string(days[rng.choice(len(days), size=size, p=day_weights)])
+    amounts = np.maximum(np.round(rng.lognormal(np.log(amount_median), amount_skew, size=size), 2), 0.01)
+    words = rng.choice(len(phrase_weights), size=size, p=phrase_weights)
+    descriptions = phrases[templates * len(phrase_weights) + words]
+    return dates, amounts, descriptions, debit, credit
+
+def generate_ledger(transactions, accounts=25, seed=0, start=date(2021, 1, 1), end=date(2024, 12, 31),
+                    date_distribution='uniform', amount_median=120.0, amount_skew=1.0, vocabulary=None,
+                    rebuild_indexes=True, progress=None):
+    """
+    Add a generated chart of accounts and `transactions` balanced entries to
+    the current database, then rebuild the account balances.
+
+    The same arguments always produce the same rows. Dates are drawn from
+    [start, end] following date_distribution, amounts from a log-normal
+    distribution around amount_median whose spread is amount_skew, and
+    descriptions from the template prefix plus a vocabulary word, with
+    earlier words more frequent (Zipf). Rows are generated and written in
+    blocks of BLOCK_SIZE, each from its own random stream derived from the
+    seed; progress(done, total) is called after each block.
+
+    With rebuild_indexes the secondary indexes of the transactions table are
+    dropped for the load and built again afterwards, which is several times
+    faster than maintaining them row by row but leaves queries without them
+    until the load commits.
+    """
+    if date_distribution not in DATE_DISTRIBUTIONS:
+        raise ValueError(f'Unknown date distribution: {date_distribution}')
+    if accounts < len(ACCOUNT_TYPES):
+        raise ValueError(f'At least {len(ACCOUNT_TYPES)} accounts are needed, one per type.')
+    vocabulary = list(vocabulary or DEFAULT_VOCABULARY)
+    phrase_weights = 1.0 / np.arange(1, len(vocabulary) + 1)
+    phrase_weights /= phrase_weights.sum()
+    phrases = np.array([f'{prefix} {word}' for _, _, _, prefix in ENTRY_TEMPLATES for word in vocabulary],
+                       dtype=object)
+    days, day_weights = _day_weights(start, end, date_distribution)
+    account_ids = ensure_accounts(accounts)
+
+    connection = db.session.connection()
+    table = Transaction.__table__
+    if connection.dialect.name == 'sqlite':
+        # Plain tuples through the DBAPI cursor skip per-row parameter processing
+        sql = (f'INSERT INTO {table.name} (date, amount, description, debit_account_id, credit_account_id) '
+               'VALUES (?, ?, ?, ?, ?)')
+        def write(rows):
+            connection.exec_driver_sql(sql, list(rows))
+    else:
+        keys = ('date', 'amount', 'description', 'debit_account_id', 'credit_account_id')
+        def write(rows):
+            connection.execute(table.insert(), [dict(zip(keys, row)) for row in rows])
+
+    indexes = sorted(table.indexes, key=lambda index: index.name) if rebuild_indexes else []
+    for index in indexes:
+        index.drop(connection, checkfirst=True)
+
+    done = 0
+    while done < transactions:
+        size = min(BLOCK_SIZE, transactions - done)
+        rng = np.random.default_rng([seed, done // BLOCK_SIZE])
+        dates, amounts, descriptions, debit, credit = generate_chunk(
+            rng, size, account_ids, days, day_weights, amount_median, amount_skew, phrases, phrase_weights)
+        write(zip(dates.tolist(), amounts.tolist(), descriptions.tolist(), debit.tolist(), credit.tolist()))
+        done += size
+        if progress is not None:
+            progress(done, transactions)
+    for index in indexes:
+        index.create(connection)
+    balances.rebuild()
+    ledger_version.bump()
+    db.session.commit()
+    return {'accounts': accounts, 'transactions': transactions}
@@ -0,0 +1,25 @@
+# modules/services/ledger_version.py
+
+from sqlalchemy.dialects.sqlite import insert
+from modules.database.db import db
+from modules.models.ledger_version import LedgerVersion
+
+LEDGER_ROW_ID = 1
+
+def bump():
+    """
+    Move the ledger version forward in the caller's session, so it commits
+    or rolls back together with the change it records.
+    """
+    stmt = insert(LedgerVersion).values(id=LEDGER_ROW_ID, version=1)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[LedgerVersion.id],
+        set_={'version': LedgerVersion.version + 1}
+    )
+    db.session.execute(stmt)
+
+def current():
+    """The committed ledger version; 0 before the first write."""
+    version = db.session.execute(
+        db.select(LedgerVersion.version).filter_by(id=LEDGER_ROW_ID)).scalar()
+    return version or 0
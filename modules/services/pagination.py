@@ -0,0 +1,25 @@
+# modules/services/pagination.py
+
+import base64
+from datetime import date
+
+def encode_cursor(row_date, row_id):
+    """
+    Encode the (date, id) keyset position of the last row on a page into an
+    opaque, URL-safe cursor token.
+    """
+    raw = f'{row_date.isoformat()}|{row_id}'.encode('ascii')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+def decode_cursor(token):
+    """
+    Decode a cursor produced by encode_cursor back into a (date, id) tuple.
+    Raises ValueError if the token is malformed.
+    """
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode('ascii')).decode('ascii')
+        date_part, id_part = raw.split('|')
+        return date.fromisoformat(date_part[:10]), int(id_part)
+    except (ValueError, UnicodeError, TypeError) as exc:
+        raise ValueError('Invalid cursor.') from exc
@@ -0,0 +1,179 @@
+# modules/services/profiler.py
+
+import cProfile
+import io
+import itertools
+import json
+import os
+import pstats
+import re
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from flask import current_app, g, request
+from flask_login import current_user
+from modules.services.decorators import has_role
+
+# Request header and query parameter that ask for a profile of the request
+PROFILE_HEADER = 'X-Profile'
+PROFILE_PARAM = 'profile'
+
+# Roles allowed to ask for a profile
+PROFILER_ROLES = ('Admin',)
+
+# Profile ids are generated here; anything else is not a profile
+PROFILE_ID = re.compile(r'^\d{8}T\d{6}-[0-9a-f]{8}$')
+
+def _requested():
+    value = request.headers.get(PROFILE_HEADER) or request.args.get(PROFILE_PARAM)
+    return value is not None and value.lower() not in ('', '0', 'false', 'no')
+
+class RequestProfiler:
+    """
+    Profiles single requests with cProfile and keeps the results in
+    `directory`: <id>.prof (pstats format) next to <id>.json (endpoint,
+    method, path, status, duration and trigger). Only the newest
+    `max_profiles` profiles are kept.
+
+    cProfile is deterministic and only one profiler can be active per
+    interpreter (Python 3.12+ refuses a second one), so one request is
+    profiled at a time: a request that wants a profile while another is
+    being taken is served without one. every_n_requests = N profiles every
+    Nth request in full; it is not a statistical sampler.
+    """
+
+    def __init__(self, directory, every_n_requests=0, max_profiles=200):
+        self.directory = directory
+        self.every_n_requests = every_n_requests
+        self.max_profiles = max_profiles
+        self._requests = itertools.count(1)
+        self._active = threading.Lock()
+
+    def start(self):
+        """
+        Called before every request. The profile flag only counts for
+        admins; anyone else's request is served as if it were absent.
+        """
+        if _requested() and has_role(*PROFILER_ROLES):
+            trigger = 'requested'
+        elif self.every_n_requests and next(self._requests) % self.every_n_requests == 0:
+            trigger = 'every_n_requests'
+        else:
+            return
+        if not self._active.acquire(blocking=False):
+            return
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Another profiler, e.g. a developer's cProfile run, is active
+            self._active.release()
+            return
+        g.profile = (profile, trigger, time.time(), time.perf_counter())
+
+    def stop(self, status):
+        """Called after every request; stores the profile taken by start(), if any."""
+        state = g.pop('profile', None)
+        if state is None:
+            return None
+        profile, trigger, started_at, started = state
+        profile.disable()
+        self._active.release()
+        duration = time.perf_counter() - started
+        started_utc = datetime.fromtimestamp(started_at, timezone.utc)
+        profile_id = f"{started_utc.strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:8]}"
+        metadata = {
+            'id': profile_id,
+            'endpoint': request.endpoint,
+            'method': request.method,
+            'path': request.path,
+            'status': status,
+            'duration_ms': round(duration * 1000, 3),
+            'started_at': started_utc.isoformat(),
+            'trigger': trigger,
+            'user_id': current_user.get_id()
+        }
+        os.makedirs(self.directory, exist_ok=True)
+        profile.dump_stats(os.path.join(self.directory, f'{profile_id}.prof'))
+        # The metadata file is written last: profiles() lists only complete profiles
+        with open(os.path.join(self.directory, f'{profile_id}.json'), 'w') as f:
+            json.dump(metadata, f)
+        self.prune()
+        return metadata
+
+    def profiles(self):
+        """Metadata of the stored profiles, newest first."""
+        if not os.path.isdir(self.directory):
+            return []
+        found = []
+        for name in sorted(os.listdir(self.directory), reverse=True):
+            if name.endswith('.json') and PROFILE_ID.match(name[:-len('.json')]):
+                try:
+                    with open(os.path.join(self.directory, name)) as f:
+                        found.append(json.load(f))
+                except (OSError, ValueError):
+                    continue
+        return found
+
+    def get(self, profile_id):
+        """Metadata of one profile, or None."""
+        if not PROFILE_ID.match(profile_id):
+            return None
+        try:
+            with open(os.path.join(self.directory, f'{profile_id}.json')) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def stats_path(self, profile_id):
+        return os.path.join(self.directory, f'{profile_id}.prof')
+
+    def summary(self, profile_id, sort='cumulative', limit=40):
+        """The pstats report of a profile: its `limit` most expensive functions."""
+        output = io.StringIO()
+        stats = pstats.Stats(self.stats_path(profile_id), stream=output)
+        stats.strip_dirs().sort_stats(sort).print_stats(limit)
+        return output.getvalue()
+
+    def prune(self):
+        """Delete all but the newest max_profiles profiles."""
+        for metadata in self.profiles()[self.max_profiles:]:
+            for extension in ('.json', '.prof'):
+                try:
+                    os.remove(os.path.join(self.directory, metadata['id'] + extension))
+                except FileNotFoundError:
+                    pass
+
+def init_profiler(app):
+    """
+    Create the request profiler of an application. With PROFILER_ENABLED an
+    admin can profile a request by sending the X-Profile header or the
+    ?profile=1 query parameter, and PROFILER_EVERY_N_REQUESTS = N profiles
+    every Nth request on top of that. Disabled, no hooks are installed.
+    """
+    profiler = RequestProfiler(
+        app.config.get('PROFILER_DIR'),
+        every_n_requests=app.config.get('PROFILER_EVERY_N_REQUESTS', 0),
+        max_profiles=app.config.get('PROFILER_MAX_PROFILES', 200)
+    )
+    app.extensions['profiler'] = profiler
+    if not app.config.get('PROFILER_ENABLED'):
+        return
+
+    @app.before_request
+    def start_profile():
+        profiler.start()
+
+    @app.after_request
+    def record_status(response):
+        g.profile_status = response.status_code
+        return response
+
+    @app.teardown_request
+    def stop_profile(exc):
+        profiler.stop(500 if exc is not None else g.pop('profile_status', None))
+
+def get_profiler():
+    """The request profiler of the current application."""
+    return current_app.extensions['profiler']
@@ -0,0 +1,166 @@
+# modules/services/query_budget.py
+
+import re
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from flask import current_app, request
+from sqlalchemy import event
+from modules.database.db import db
+
+# Literals and bound-parameter lists that vary between otherwise identical statements
+_IN_LIST = re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)')
+_LITERAL = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_SPACE = re.compile(r'\s+')
+
+# Budget for limits that grow with the request by design, such as one statement per batch chunk
+UNLIMITED = float('inf')
+
+# Recorders of the code running in this thread or task
+_recorders = ContextVar('query_recorders', default=())
+# (recorder, reset token) of the request being checked
+_request_recorder = ContextVar('request_query_recorder', default=None)
+
+class QueryBudgetExceeded(AssertionError):
+    """A request or block issued more queries than its budget allows."""
+
+def statement_shape(statement):
+    """A statement with its literals and IN lists replaced, so N+1 repeats compare equal."""
+    shape = _LITERAL.sub('?', _SPACE.sub(' ', statement).strip())
+    return _IN_LIST.sub('(?)', shape)
+
+class QueryRecorder:
+    """Statements executed while the recorder is active, counted by shape."""
+
+    def __init__(self):
+        self.statements = []
+
+    @property
+    def count(self):
+        return len(self.statements)
+
+    def repeats(self):
+        """(shape, times) of the most repeated statement shape, or (None, 0)."""
+        if not self.statements:
+            return None, 0
+        return Counter(map(statement_shape, self.statements)).most_common(1)[0]
+
+    def violations(self, max_queries, max_repeats):
+        """Readable reasons the recorded statements break the budget."""
+        problems = []
+        if max_queries is not None and self.count > max_queries:
+            problems.append(f'{self.count} queries, budget {max_queries}')
+        shape, times = self.repeats()
+        if max_repeats is not None and times > max_repeats:
+            problems.append(f'{times} executions of the same statement (limit {max_repeats}): {shape}')
+        return problems
+
+def _record(conn, cursor, statement, parameters, context, executemany):
+    for recorder in _recorders.get():
+        recorder.statements.append(statement)
+
+def instrument_engine(engine):
+    """Feed the statements of an engine to the active recorders; safe to call twice."""
+    if not event.contains(engine, 'before_cursor_execute', _record):
+        event.listen(engine, 'before_cursor_execute', _record)
+
+def _app_engines(app):
+    engines = list(db.engines.values())
+    if app.extensions.get('read_engine') is not None:
+        engines.append(app.extensions['read_engine'])
+    return engines
+
+@contextmanager
+def record_queries():
+    """Record the statements run by the current app's engines inside the block."""
+    for engine in _app_engines(current_app):
+        instrument_engine(engine)
+    recorder = QueryRecorder()
+    token = _recorders.set(_recorders.get() + (recorder,))
+    try:
+        yield recorder
+    finally:
+        _recorders.reset(token)
+
+@contextmanager
+def assert_query_budget(max_queries=None, max_repeats=None):
+    """
+    Fail with QueryBudgetExceeded when the block runs more than max_queries
+    statements, or the same statement shape more than max_repeats times.
+    """
+    with record_queries() as recorder:
+        yield recorder
+    problems = recorder.violations(max_queries, max_repeats)
+    if problems:
+        raise QueryBudgetExceeded('; '.join(problems))
+
+def query_budget(max_queries=None, max_repeats=None):
+    """
+    Declare the query budget of a view function or resource method. None
+    keeps the app-wide default (QUERY_BUDGET_MAX_QUERIES and
+    QUERY_BUDGET_MAX_REPEATS) for that limit, UNLIMITED lifts it.
+    """
+    def decorator(f):
+        f.query_budget = (max_queries, max_repeats)
+        return f
+    return decorator
+
+def declared_budget(app):
+    """The (max_queries, max_repeats) budget of the request's endpoint."""
+    view = app.view_functions.get(request.endpoint)
+    view_class = getattr(view, 'view_class', None)
+    if view_class is not None:
+        method = 'get' if request.method == 'HEAD' else request.method.lower()
+        view = getattr(view_class, method, view)
+    max_queries, max_repeats = getattr(view, 'query_budget', (None, None))
+    if max_queries is None:
+        max_queries = app.config['QUERY_BUDGET_MAX_QUERIES']
+    if max_repeats is None:
+        max_repeats = app.config['QUERY_BUDGET_MAX_REPEATS']
+    return max_queries, max_repeats
+
+def init_query_budget(app):
+    """
+    Check every request against its query budget when QUERY_BUDGET_MODE is
+    'raise' (tests: the request fails with QueryBudgetExceeded) or 'warn'
+    (staging: a warning is logged). Nothing is hooked when the mode is None.
+    """
+    mode = app.config.get('QUERY_BUDGET_MODE')
+    if mode is None:
+        return
+    if mode not in ('raise', 'warn'):
+        raise ValueError(f'Unknown QUERY_BUDGET_MODE: {mode}')
+    with app.app_context():
+        for engine in _app_engines(app):
+            instrument_engine(engine)
+
+    def stop_recording():
+        state = _request_recorder.get()
+        if state is None:
+            return None
+        recorder, token = state
+        _request_recorder.set(None)
+        _recorders.reset(token)
+        return recorder
+
+    @app.before_request
+    def start_recording():
+        recorder = QueryRecorder()
+        _request_recorder.set((recorder, _recorders.set(_recorders.get() + (recorder,))))
+
+    @app.teardown_request
+    def discard_recording(exc):
+        stop_recording()
+
+    @app.after_request
+    def check_budget(response):
+        recorder = stop_recording()
+        if recorder is None:
+            return response
+        problems = recorder.violations(*declared_budget(app))
+        if problems:
+            message = f"{request.method} {request.path} ({request.endpoint}): {'; '.join(problems)}"
+            if mode == 'raise':
+                raise QueryBudgetExceeded(message)
+            app.logger.warning('Query budget exceeded: %s', message)
+        return response
@@ -0,0 +1,211 @@
+# modules/services/reports.py
+
+from datetime import timedelta
+from sqlalchemy import literal, union_all, func, case
+from modules.database.db import db
+from modules.models.account import Account, ACCOUNT_TYPES
+from modules.models.transaction import Transaction
+from modules.services.ledger_cache import get_ledger_cache
+
+# Account types whose balance is normally on the debit side
+DEBIT_NORMAL_TYPES = ('Asset', 'Expense')
+
+# strftime formats matching the ledger cache's period labels
+PERIOD_FORMATS = {'day': '%Y-%m-%d', 'month': '%Y-%m', 'year': '%Y'}
+
+def ledger_totals(amounts, *filters):
+    """
+    Per-account sums over both sides of the ledger in one aggregate query.
+
+    `amounts` maps a label to an expression over Transaction columns; the
+    result has an account_id column plus debit_<label> and credit_<label>
+    for each entry. Each side is grouped by its own account column before
+    the UNION ALL, so SQLite can read it straight from that side's index,
+    and the outer GROUP BY only folds the per-side subtotals together.
+    """
+    def side(account_column, side_name):
+        columns = [account_column.label('account_id')]
+        for label, expression in amounts.items():
+            for column_side in ('debit', 'credit'):
+                value = func.sum(expression) if column_side == side_name else literal(0.0)
+                columns.append(value.label(f'{column_side}_{label}'))
+        return db.select(*columns).filter(*filters).group_by(account_column)
+
+    sides = union_all(
+        side(Transaction.debit_account_id, 'debit'),
+        side(Transaction.credit_account_id, 'credit')
+    ).subquery()
+    return db.select(sides.c.account_id, *[
+        func.sum(sides.c[f'{column_side}_{label}']).label(f'{column_side}_{label}')
+        for label in amounts for column_side in ('debit', 'credit')
+    ]).group_by(sides.c.account_id)
+
+def normal_balance(account_type, debit, credit):
+    """State a debit/credit pair as a balance on the account type's normal side."""
+    if account_type in DEBIT_NORMAL_TYPES:
+        return debit - credit
+    return credit - debit
+
+def _group_by_type(accounts, total_keys):
+    """Arrange account rows into one group per account type, with subtotals."""
+    groups = {account_type: {'type': account_type, 'accounts': [], **{key: 0.0 for key in total_keys}}
+              for account_type in ACCOUNT_TYPES}
+    for account in accounts:
+        group = groups.setdefault(account['type'], {'type': account['type'], 'accounts': [],
+                                                    **{key: 0.0 for key in total_keys}})
+        group['accounts'].append(account)
+        for key in total_keys:
+            group[key] += account[key]
+    return list(groups.values())
+
+def _accounts_query():
+    return db.select(Account.id, Account.name, Account.type).order_by(Account.name)
+
+def trial_balance(as_of=None):
+    """
+    Debit and credit totals per account up to and including as_of, grouped
+    by account type. Served from the ledger cache when it is available,
+    otherwise computed with one GROUP BY over both ledger sides; no
+    Transaction objects are loaded either way.
+    """
+    cached = get_ledger_cache().account_totals(date_to=as_of)
+    if cached is not None:
+        rows = [(account_id, name, account_type, *cached.get(account_id, (0.0, 0.0)))
+                for account_id, name, account_type in db.session.execute(_accounts_query())]
+    else:
+        filters = [Transaction.date <= as_of] if as_of is not None else []
+        totals = ledger_totals({'total': Transaction.amount}, *filters).subquery()
+        query = db.select(
+            Account.id, Account.name, Account.type,
+            func.coalesce(totals.c.debit_total, 0.0),
+            func.coalesce(totals.c.credit_total, 0.0)
+        ).outerjoin(totals, totals.c.account_id == Account.id).order_by(Account.name)
+        rows = db.session.execute(query)
+
+    accounts = [{
+        'account_id': account_id,
+        'name': name,
+        'type': account_type,
+        'debit_total': debit,
+        'credit_total': credit,
+        'balance': normal_balance(account_type, debit, credit)
+    } for account_id, name, account_type, debit, credit in rows]
+    groups = _group_by_type(accounts, ('debit_total', 'credit_total', 'balance'))
+    return {
+        'as_of': as_of,
+        'groups': groups,
+        'debit_total': sum(group['debit_total'] for group in groups),
+        'credit_total': sum(group['credit_total'] for group in groups)
+    }
+
+def general_ledger(date_from=None, date_to=None, account_id=None):
+    """
+    Opening balance, period debits and credits, and closing balance per
+    account for the period [date_from, date_to], grouped by account type.
+    Served from the ledger cache when it is available, otherwise from a
+    single conditional-aggregate pass over both ledger sides.
+    """
+    rows = _cached_general_ledger(date_from, date_to, account_id)
+    if rows is None:
+        filters = [Transaction.date <= date_to] if date_to is not None else []
+        if date_from is not None:
+            before = Transaction.date < date_from
+            amounts = {
+                'opening': case((before, Transaction.amount), else_=0.0),
+                'period': case((before, 0.0), else_=Transaction.amount)
+            }
+        else:
+            amounts = {'opening': literal(0.0), 'period': Transaction.amount}
+        totals = ledger_totals(amounts, *filters).subquery()
+        query = db.select(
+            Account.id, Account.name, Account.type,
+            func.coalesce(totals.c.debit_opening, 0.0) - func.coalesce(totals.c.credit_opening, 0.0),
+            func.coalesce(totals.c.debit_period, 0.0),
+            func.coalesce(totals.c.credit_period, 0.0)
+        ).outerjoin(totals, totals.c.account_id == Account.id).order_by(Account.name)
+        if account_id is not None:
+            query = query.filter(Account.id == account_id)
+        rows = db.session.execute(query)
+
+    accounts = []
+    for row_id, name, account_type, opening_net, debit, credit in rows:
+        opening_balance = normal_balance(account_type, opening_net, 0.0)
+        accounts.append({
+            'account_id': row_id,
+            'name': name,
+            'type': account_type,
+            'opening_balance': opening_balance,
+            'debit_total': debit,
+            'credit_total': credit,
+            'closing_balance': opening_balance + normal_balance(account_type, debit, credit)
+        })
+    groups = _group_by_type(accounts, ('opening_balance', 'debit_total', 'credit_total', 'closing_balance'))
+    if account_id is not None:
+        groups = [group for group in groups if group['accounts']]
+    return {
+        'date_from': date_from,
+        'date_to': date_to,
+        'groups': groups
+    }
+
+def _cached_general_ledger(date_from, date_to, account_id):
+    """
+    (account_id, name, type, opening_net, debit, credit) rows of the general
+    ledger from the ledger cache, or None if the cache is unavailable.
+    """
+    cache = get_ledger_cache()
+    period = cache.account_totals(date_from, date_to)
+    if period is None:
+        return None
+    opening = {}
+    if date_from is not None:
+        opening = cache.account_totals(date_to=date_from - timedelta(days=1))
+        if opening is None:
+            return None
+    query = _accounts_query()
+    if account_id is not None:
+        query = query.filter(Account.id == account_id)
+    rows = []
+    for row_id, name, account_type in db.session.execute(query):
+        opening_debit, opening_credit = opening.get(row_id, (0.0, 0.0))
+        rows.append((row_id, name, account_type, opening_debit - opening_credit,
+                     *period.get(row_id, (0.0, 0.0))))
+    return rows
+
+def _date_filters(date_from, date_to):
+    filters = []
+    if date_from is not None:
+        filters.append(Transaction.date >= date_from)
+    if date_to is not None:
+        filters.append(Transaction.date <= date_to)
+    return filters
+
+def period_totals(period='month', date_from=None, date_to=None):
+    """
+    Amount and number of transactions per day, month or year. Served from
+    the in-memory ledger cache when it is available, otherwise from SQL.
+    """
+    rows = get_ledger_cache().period_totals(period, date_from, date_to)
+    if rows is None:
+        label = func.strftime(PERIOD_FORMATS[period], Transaction.date)
+        query = db.select(label, func.sum(Transaction.amount), func.count(Transaction.id)) \
+            .filter(*_date_filters(date_from, date_to)).group_by(label).order_by(label)
+        rows = db.session.execute(query).all()
+    return [{'period': label, 'amount': amount, 'count': count} for label, amount, count in rows]
+
+def flows(date_from=None, date_to=None):
+    """
+    Amount and number of transactions moved between each pair of debit and
+    credit accounts. Served from the ledger cache when it is available.
+    """
+    rows = get_ledger_cache().flows(date_from, date_to)
+    if rows is None:
+        query = db.select(
+            Transaction.debit_account_id, Transaction.credit_account_id,
+            func.sum(Transaction.amount), func.count(Transaction.id)
+        ).filter(*_date_filters(date_from, date_to)).group_by(
+            Transaction.debit_account_id, Transaction.credit_account_id
+        ).order_by(Transaction.debit_account_id, Transaction.credit_account_id)
+        rows = db.session.execute(query).all()
+    return [{'debit_account_id': debit, 'credit_account_id': credit, 'amount': amount, 'count': count}
+            for debit, credit, amount, count in rows]
@@ -0,0 +1,103 @@
+# modules/services/user_cache.py
+
+import threading
+import time
+from collections import OrderedDict
+from flask import current_app, has_app_context
+from flask_login import UserMixin
+from sqlalchemy import event
+from modules.models.user import User
+
+class CachedUser(UserMixin):
+    """
+    Identity and role of a logged-in user, detached from any database
+    session so it can be shared between requests.
+    """
+
+    def __init__(self, id, username, role):
+        self.id = id
+        self.username = username
+        self.role = role
+
+    def __repr__(self):
+        return f"<CachedUser {self.username}>"
+
+class UserCache:
+    """
+    Bounded LRU cache of CachedUser entries that expire after ttl seconds.
+    Entries are dropped when the user is updated or deleted in this process;
+    the TTL bounds how long changes made by other processes go unseen.
+    """
+
+    def __init__(self, maxsize=1024, ttl=300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, user_id):
+        """The cached user, or None on a miss."""
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None:
+                user, expires_at = entry
+                if expires_at > time.monotonic():
+                    self._entries.move_to_end(user_id)
+                    self.hits += 1
+                    return user
+                del self._entries[user_id]
+            self.misses += 1
+            return None
+
+    def put(self, user):
+        """Cache the identity of a User row and return it."""
+        cached = CachedUser(user.id, user.username, user.role)
+        with self._lock:
+            self._entries[user.id] = (cached, time.monotonic() + self.ttl)
+            self._entries.move_to_end(user.id)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return cached
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0
+            }
+
+def init_user_cache(app):
+    """Create the user cache for an application, unless it is switched off."""
+    if app.config.get('USER_CACHE_ENABLED', True):
+        app.extensions['user_cache'] = UserCache(
+            maxsize=app.config.get('USER_CACHE_SIZE', 1024),
+            ttl=app.config.get('USER_CACHE_TTL', 300)
+        )
+    else:
+        app.extensions['user_cache'] = None
+
+def get_user_cache():
+    """The user cache of the current application, or None when disabled."""
+    return current_app.extensions.get('user_cache')
+
+@event.listens_for(User, 'after_update')
+@event.listens_for(User, 'after_delete')
+def _invalidate_cached_user(mapper, connection, target):
+    if has_app_context():
+        cache = get_user_cache()
+        if cache is not None:
+            cache.invalidate(target.id)
@@ -59,3 +59,187 @@ def test_delete_account(client, db, test_user, new_account_data):
     assert response.status_code == 204
     response = client.get(f'/api/accounts/{account_id}')
     assert response.status_code == 404
+
+def test_account_balance_follows_transaction_writes(client, db, test_user):
+    login(client, test_user)
+    cash = client.post('/api/accounts/', json={'name': 'Cash', 'type': 'Asset'}).json['id']
+    sales = client.post('/api/accounts/', json={'name': 'Sales', 'type': 'Revenue'}).json['id']
+
+    response = client.get(f'/api/accounts/{cash}/balance')
+    assert response.status_code == 200
+    assert response.json == {'account_id': cash, 'debit_total': 0.0, 'credit_total': 0.0, 'balance': 0.0}
+
+    entry = {'date': '2024-01-01', 'amount': 100.0, 'description': 'Sale',
+             'debit_account_id': cash, 'credit_account_id': sales}
+    first = client.post('/api/transactions/', json=entry).json['id']
+    client.post('/api/transactions/batch', json=[dict(entry, amount=25.0), dict(entry, amount=5.0)])
+    assert client.get(f'/api/accounts/{cash}/balance').json['balance'] == 130.0
+    assert client.get(f'/api/accounts/{sales}/balance').json['balance'] == 130.0
+
+    client.put(f'/api/transactions/{first}', json={'amount': 40.0})
+    assert client.get(f'/api/accounts/{cash}/balance').json['debit_total'] == 70.0
+
+    client.put(f'/api/transactions/{first}', json={'debit_account_id': sales, 'credit_account_id': cash})
+    response = client.get(f'/api/accounts/{cash}/balance')
+    assert response.json['debit_total'] == 30.0
+    assert response.json['credit_total'] == 40.0
+    assert response.json['balance'] == -10.0
+
+    client.delete(f'/api/transactions/{first}')
+    response = client.get(f'/api/accounts/{sales}/balance')
+    assert response.json['debit_total'] == 0.0
+    assert response.json['balance'] == 30.0
+
+def test_account_balance_not_found(client, db, test_user):
+    login(client, test_user)
+    response = client.get('/api/accounts/99999/balance')
+    assert response.status_code == 404
+
+def test_account_directory_tracks_account_writes(client, db, test_user, new_account_data):
+    login(client, test_user)
+    account_id = client.post('/api/accounts/', json=new_account_data).json['id']
+    client.put(f'/api/accounts/{account_id}', json={'name': 'Renamed Account', 'type': 'Asset'})
+
+    # The old name is free again and the new one is taken
+    response = client.post('/api/accounts/', json=new_account_data)
+    assert response.status_code == 201
+    response = client.post('/api/accounts/', json={'name': 'Renamed Account', 'type': 'Asset'})
+    assert response.status_code == 400
+
+    client.delete(f'/api/accounts/{account_id}')
+    response = client.post('/api/transactions/', json={
+        'date': '2024-01-01', 'amount': 1.0, 'description': 'To a deleted account',
+        'debit_account_id': account_id, 'credit_account_id': account_id
+    })
+    assert response.status_code == 400
+
+def test_account_directory_rechecks_unknown_ids(client, db, test_user, new_account_data):
+    from modules.models.account import Account
+    login(client, test_user)
+    client.get('/api/accounts/directory-stats')
+    client.post('/api/accounts/', json=new_account_data)
+    client.post('/api/accounts/', json={'name': 'Loaded', 'type': 'Asset'})
+
+    # Created behind the directory's back, as another worker would
+    account = Account(name='Elsewhere', type='Expense')
+    db.session.add(account)
+    db.session.commit()
+    response = client.post('/api/transactions/', json={
+        'date': '2024-01-01', 'amount': 1.0, 'description': 'New account',
+        'debit_account_id': account.id, 'credit_account_id': account.id
+    })
+    assert response.status_code == 201
+
+def test_writes_behind_the_directory(client, db, test_user, new_account_data):
+    from modules.models.account import Account
+    login(client, test_user)
+    account_id = client.post('/api/accounts/', json=new_account_data).json['id']
+    client.post('/api/accounts/', json={'name': 'Loaded', 'type': 'Asset'})
+    from modules.services.account_directory import get_account_directory
+    get_account_directory().choices()
+
+    # Another worker takes a name and deletes an account; this directory still holds the old state
+    db.session.add(Account(name='Taken Elsewhere', type='Asset'))
+    db.session.delete(db.session.get(Account, account_id))
+    db.session.commit()
+
+    response = client.post('/api/accounts/', json={'name': 'Taken Elsewhere', 'type': 'Asset'})
+    assert response.status_code == 400
+    assert response.json['message'] == 'Account name already exists.'
+    loaded_id = db.session.execute(db.select(Account.id).filter_by(name='Loaded')).scalar()
+    response = client.put(f'/api/accounts/{loaded_id}', json={'name': 'Taken Elsewhere', 'type': 'Asset'})
+    assert response.status_code == 400
+
+    response = client.post('/api/transactions/', json={
+        'date': '2024-01-01', 'amount': 1.0, 'description': 'To a deleted account',
+        'debit_account_id': account_id, 'credit_account_id': loaded_id
+    })
+    assert response.status_code == 400
+
+def test_account_directory_drops_loads_overlapping_invalidate(app, db, test_user):
+    from sqlalchemy import event
+    from modules.models.account import Account
+    from modules.services.account_directory import get_account_directory
+    directory = get_account_directory()
+    db.session.add(Account(name='Before', type='Asset'))
+    db.session.commit()
+
+    def write_during_load(conn, cursor, statement, *args):
+        if 'FROM accounts' in statement and not directory.loads:
+            directory.invalidate()
+
+    event.listen(db.engine, 'before_cursor_execute', write_during_load)
+    try:
+        assert directory.id_for_name('Before') is not None
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', write_during_load)
+    # The overlapping load was not kept: the next lookup loads again
+    directory.id_for_name('Before')
+    assert directory.stats()['loads'] == 2
+
+def test_account_directory_stats(client, db, test_user, new_account_data):
+    login(client, test_user)
+    client.post('/api/accounts/', json=new_account_data)
+    for _ in range(3):
+        client.post('/api/accounts/', json=new_account_data)
+    response = client.get('/api/accounts/directory-stats')
+    assert response.status_code == 200
+    assert response.json['accounts'] == 1
+    assert response.json['hits'] == 2
+    assert response.json['misses'] == 2
+    assert response.json['hit_rate'] == 0.5
+
+def test_transaction_writes_do_not_count_as_directory_lookups(client, db, test_user, new_account_data):
+    login(client, test_user)
+    account_id = client.post('/api/accounts/', json=new_account_data).json['id']
+    before = client.get('/api/accounts/directory-stats').json
+    for _ in range(3):
+        client.post('/api/transactions/', json={
+            'date': '2024-01-01', 'amount': 1.0, 'description': 'Checked in the database',
+            'debit_account_id': account_id, 'credit_account_id': account_id
+        })
+    after = client.get('/api/accounts/directory-stats').json
+    # Only the categorizer's account type lookups, two per transaction, use the directory
+    lookups = after['hits'] + after['misses'] - before['hits'] - before['misses']
+    assert lookups == 6
+
+def test_account_list_etag(client, db, test_user, new_account_data):
+    from sqlalchemy import event
+    login(client, test_user)
+    client.post('/api/accounts/', json=new_account_data)
+    response = client.get('/api/accounts/')
+    tag = response.headers['ETag']
+    assert tag
+
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(db.engine, 'before_cursor_execute', listener)
+    try:
+        response = client.get('/api/accounts/', headers={'If-None-Match': tag})
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', listener)
+    assert response.status_code == 304
+    assert response.data == b''
+    assert response.headers['ETag'] == tag
+    # Only the version row was read; the accounts were neither queried nor marshalled
+    assert not any('FROM accounts' in statement for statement in statements)
+    assert len([statement for statement in statements if 'FROM users' not in statement]) == 1
+
+    client.post('/api/accounts/', json={'name': 'Another', 'type': 'Expense'})
+    response = client.get('/api/accounts/', headers={'If-None-Match': tag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != tag
+    assert len(response.json) == 2
+
+def test_account_list_matches_marshalled_output(app, client, db, test_user):
+    from flask_restx import marshal
+    from flask_restx.representations import output_json
+    from app.api.accounts_api import account_model
+    from modules.models.account import Account
+    login(client, test_user)
+    for name, account_type in [('Cash', 'Asset'), ('Loan', 'Liability'), ('Sales', 'Revenue')]:
+        client.post('/api/accounts/', json={'name': name, 'type': account_type})
+    response = client.get('/api/accounts/')
+    with app.test_request_context():
+        expected = output_json(marshal(Account.query.all(), account_model), 200).get_data()
+    assert response.data == expected
@@ -1,6 +1,7 @@
 # tests/api/test_auth_api.py
 
 import pytest
+from flask import g
 
 def test_login(client, test_user):
     response = client.post('/api/auth/login', json={
@@ -45,3 +46,100 @@ def test_logout(client, test_user):
     # Attempt to access protected endpoint
     response = client.get('/api/auth/user')
     assert response.status_code == 401 or response.status_code == 302  # Depending on your setup
+
+def get_in_new_request(client, url):
+    # The test app context outlives each request, so drop the user Flask-Login
+    # remembered on g to make it call the user loader as a new request would
+    g.pop('_login_user', None)
+    return client.get(url)
+
+def test_user_cache_serves_repeat_requests(client, test_user):
+    client.post('/api/auth/login', json={
+        'username': test_user.username,
+        'password': 'testpass'
+    })
+    for _ in range(3):
+        assert get_in_new_request(client, '/api/auth/user').status_code == 200
+    response = get_in_new_request(client, '/api/auth/user-cache-stats')
+    assert response.json['enabled'] is True
+    assert response.json['size'] == 1
+    assert response.json['misses'] == 1
+    assert response.json['hits'] == 3
+
+def test_user_cache_invalidated_on_change(client, db, test_user):
+    client.post('/api/auth/login', json={
+        'username': test_user.username,
+        'password': 'testpass'
+    })
+    assert get_in_new_request(client, '/api/auth/user').json['role'] == 'User'
+    test_user.role = 'Admin'
+    db.session.commit()
+    assert get_in_new_request(client, '/api/auth/user').json['role'] == 'Admin'
+
+    db.session.delete(test_user)
+    db.session.commit()
+    assert get_in_new_request(client, '/api/auth/user').status_code == 401
+
+def test_user_cache_can_be_disabled(app, client, test_user):
+    app.extensions['user_cache'] = None
+    client.post('/api/auth/login', json={
+        'username': test_user.username,
+        'password': 'testpass'
+    })
+    assert get_in_new_request(client, '/api/auth/user').json['username'] == test_user.username
+    assert get_in_new_request(client, '/api/auth/user-cache-stats').json['enabled'] is False
+
+def get_token(client, test_user):
+    response = client.post('/api/auth/token', json={
+        'username': test_user.username,
+        'password': 'testpass'
+    })
+    assert response.status_code == 200
+    assert response.json['token_type'] == 'Bearer'
+    return response.json['token']
+
+def bearer(token):
+    return {'Authorization': f'Bearer {token}'}
+
+def test_token_authenticates_without_queries(app, client, db, test_user):
+    from sqlalchemy import event
+    token = get_token(client, test_user)
+    statements = []
+    capture = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(db.engine, 'before_cursor_execute', capture)
+    try:
+        g.pop('_login_user', None)
+        response = client.get('/api/auth/user', headers=bearer(token))
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', capture)
+    assert response.status_code == 200
+    assert response.json['username'] == test_user.username
+    assert response.json['role'] == test_user.role
+    assert statements == []
+
+def test_token_rejected_when_invalid_or_expired(app, client, test_user):
+    token = get_token(client, test_user)
+    g.pop('_login_user', None)
+    assert client.get('/api/auth/user', headers=bearer(token + 'x')).status_code == 401
+    app.extensions['api_tokens'].max_age = -1
+    g.pop('_login_user', None)
+    assert client.get('/api/auth/user', headers=bearer(token)).status_code == 401
+
+def test_token_revocation(client, db, test_user):
+    token = get_token(client, test_user)
+    g.pop('_login_user', None)
+    assert client.post('/api/auth/token/revoke', headers=bearer(token)).status_code == 200
+    g.pop('_login_user', None)
+    assert client.get('/api/auth/user', headers=bearer(token)).status_code == 401
+
+    token = get_token(client, test_user)
+    test_user.role = 'Viewer'
+    db.session.commit()
+    g.pop('_login_user', None)
+    assert client.get('/api/auth/user', headers=bearer(token)).status_code == 401
+
+def test_revoke_all_tokens_requires_admin(client, test_user):
+    token = get_token(client, test_user)
+    g.pop('_login_user', None)
+    response = client.post('/api/auth/token/revoke-all', headers=bearer(token))
+    assert response.status_code == 403
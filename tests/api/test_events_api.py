@@ -0,0 +1,112 @@
+# tests/api/test_events_api.py
+
+import threading
+import time
+import pytest
+from modules.models.account import Account
+from modules.plugins import PluginBase
+from modules.services.event_bus import get_event_bus
+
+@pytest.fixture
+def bus(app):
+    bus = get_event_bus()
+    yield bus
+    bus.shutdown(wait=False)
+
+@pytest.fixture
+def received(bus):
+    events = []
+    bus.subscribe('test', events.extend)
+    return events
+
+@pytest.fixture
+def setup_accounts(db):
+    cash = Account(name='Cash', type='Asset')
+    sales = Account(name='Sales', type='Revenue')
+    db.session.add_all([cash, sales])
+    db.session.commit()
+    return cash, sales
+
+def login(client, test_user):
+    client.post('/api/auth/login', json={
+        'username': test_user.username,
+        'password': 'testpass'
+    })
+
+def entry(cash, sales, amount=10.0, description='Sale'):
+    return {'date': '2024-03-01', 'amount': amount, 'description': description,
+            'debit_account_id': cash.id, 'credit_account_id': sales.id}
+
+def test_transaction_lifecycle_events(client, test_user, setup_accounts, bus, received):
+    cash, sales = setup_accounts
+    login(client, test_user)
+    transaction_id = client.post('/api/transactions/', json=entry(cash, sales)).json['id']
+    client.put(f'/api/transactions/{transaction_id}', json={'amount': 25.0})
+    client.delete(f'/api/transactions/{transaction_id}')
+    assert bus.flush(5)
+
+    assert [(e.entity, e.action, e.id) for e in received] == [
+        ('transaction', 'created', transaction_id),
+        ('transaction', 'updated', transaction_id),
+        ('transaction', 'deleted', transaction_id)
+    ]
+    created, updated, deleted = (e.data for e in received)
+    assert created == {'id': transaction_id, 'date': '2024-03-01', 'amount': 10.0, 'description': 'Sale',
+                       'debit_account_id': cash.id, 'credit_account_id': sales.id, 'version': 1}
+    assert updated['amount'] == 25.0 and updated['version'] == 2
+    assert deleted['id'] == transaction_id
+    assert [e.sequence for e in received] == sorted(e.sequence for e in received)
+
+def test_account_and_batch_events(client, test_user, setup_accounts, bus, received):
+    cash, sales = setup_accounts
+    login(client, test_user)
+    account_id = client.post('/api/accounts/', json={'name': 'Bank', 'type': 'Asset'}).json['id']
+    client.post('/api/transactions/batch', json=[entry(cash, sales, description=f'Feed {n}') for n in range(3)])
+    assert bus.flush(5)
+    assert received[0].entity == 'account' and received[0].id == account_id
+    batch = received[1:]
+    assert [(e.action, e.data['description']) for e in batch] == [('created', f'Feed {n}') for n in range(3)]
+    assert all(e.data['date'] == '2024-03-01' for e in batch)
+
+def test_failed_writes_publish_nothing(client, test_user, setup_accounts, bus, received):
+    cash, sales = setup_accounts
+    login(client, test_user)
+    response = client.post('/api/transactions/', json=dict(entry(cash, sales), debit_account_id=999))
+    assert response.status_code == 400
+    assert bus.flush(5)
+    assert received == []
+
+def test_slow_subscriber_adds_no_latency(client, test_user, setup_accounts, bus):
+    cash, sales = setup_accounts
+    release = threading.Event()
+    bus.subscribe('slow', lambda events: release.wait(5))
+    login(client, test_user)
+    start = time.perf_counter()
+    for n in range(5):
+        assert client.post('/api/transactions/', json=entry(cash, sales)).status_code == 201
+    elapsed = time.perf_counter() - start
+    assert elapsed < 2
+    stats = client.get('/api/events/subscribers').json
+    assert stats[0]['name'] == 'slow'
+    assert stats[0]['lag_events'] == 5
+    release.set()
+    assert bus.flush(5)
+    assert client.get('/api/events/subscribers').json[0]['delivered'] == 5
+
+def test_plugin_subscribe_hook(app, client, test_user, setup_accounts, bus):
+    cash, sales = setup_accounts
+    seen = []
+
+    class AuditPlugin(PluginBase):
+        def register(self, app):
+            pass
+
+        def subscribe(self, bus):
+            bus.subscribe('audit', seen.extend, entities=['transaction'], actions=['created'])
+
+    AuditPlugin().subscribe(bus)
+    login(client, test_user)
+    client.post('/api/transactions/', json=entry(cash, sales))
+    client.post('/api/accounts/', json={'name': 'Bank', 'type': 'Asset'})
+    assert bus.flush(5)
+    assert [(e.entity, e.action) for e in seen] == [('transaction', 'created')]
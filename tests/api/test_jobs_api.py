@@ -0,0 +1,210 @@
+# tests/api/test_jobs_api.py
+
+import json
+import os
+import threading
+import time
+from datetime import date
+import pytest
+from werkzeug.security import generate_password_hash
+from modules.models.account import Account
+from modules.models.transaction import Transaction
+from modules.models.user import User
+from modules.services import jobs as jobs_service
+from modules.services.jobs import get_jobs, job_kind, JOB_KINDS
+
+@pytest.fixture
+def runner(app, tmp_path):
+    runner = get_jobs()
+    runner.result_dir = str(tmp_path / 'jobs')
+    yield runner
+    runner.shutdown()
+
+@pytest.fixture
+def books(db):
+    cash = Account(name='Cash', type='Asset')
+    sales = Account(name='Sales', type='Revenue')
+    db.session.add_all([cash, sales])
+    db.session.commit()
+    db.session.add_all([
+        Transaction(date=date(2024, 1, day), amount=10.0 * day, description=f'Sale {day}',
+                    debit_account_id=cash.id, credit_account_id=sales.id)
+        for day in range(1, 8)
+    ])
+    db.session.commit()
+    return cash, sales
+
+@pytest.fixture
+def blocking_kind():
+    release = threading.Event()
+
+    @job_kind('test_blocking')
+    def blocking(context):
+        while not release.wait(0.01):
+            context.progress(0, 1)
+        return {'released': True}
+
+    yield release
+    release.set()
+    del JOB_KINDS['test_blocking']
+
+def login(client, test_user):
+    client.post('/api/auth/login', json={
+        'username': test_user.username,
+        'password': 'testpass'
+    })
+
+def wait_for(client, job_id, timeout=10):
+    deadline = time.monotonic() + timeout
+    while True:
+        job = client.get(f'/api/jobs/{job_id}').json
+        if job['status'] not in ('queued', 'running') or time.monotonic() > deadline:
+            return job
+        time.sleep(0.01)
+
+def test_trial_balance_job(client, test_user, books, runner):
+    login(client, test_user)
+    response = client.post('/api/jobs/', json={'kind': 'trial_balance', 'params': {'as_of': '2024-01-03'}})
+    assert response.status_code == 202
+    assert response.headers['Location'].endswith(f"/api/jobs/{response.json['id']}")
+    job = wait_for(client, response.json['id'])
+    assert job['status'] == 'succeeded'
+    assert job['progress'] == 1.0
+    assert job['finished_at'] is not None
+
+    result = client.get(job['result_url'])
+    assert result.status_code == 200
+    report = client.get('/api/reports/trial-balance?as_of=2024-01-03').json
+    assert result.json['groups'] == report['groups']
+    assert result.json['debit_total'] == 60.0
+    assert sorted(os.listdir(runner.result_dir)) == [f"{job['id']}.json", f"{job['id']}.state.json"]
+
+def test_export_job_streams_transactions(client, test_user, books, runner):
+    login(client, test_user)
+    job_id = client.post('/api/jobs/', json={
+        'kind': 'transactions_export', 'params': {'date_from': '2024-01-03'}
+    }).json['id']
+    job = wait_for(client, job_id)
+    assert job['status'] == 'succeeded'
+    rows = json.loads(client.get(job['result_url']).data)
+    assert [row['description'] for row in rows] == [f'Sale {day}' for day in range(3, 8)]
+    assert rows[0]['date'] == '2024-01-03'
+
+def test_invalid_job_requests(client, test_user, runner):
+    login(client, test_user)
+    assert client.post('/api/jobs/', json={'kind': 'nope'}).status_code == 400
+    response = client.post('/api/jobs/', json={'kind': 'trial_balance', 'params': {'as_of': 'soon'}})
+    assert response.status_code == 400
+    assert 'as_of' in response.json['message']
+    response = client.post('/api/jobs/', json={'kind': 'flows', 'params': {'account': 1}})
+    assert response.status_code == 400
+    assert client.get('/api/jobs/missing').status_code == 404
+
+def test_cancel_running_and_queued_jobs(app, client, test_user, tmp_path, blocking_kind):
+    runner = jobs_service.JobRunner(app, max_workers=1, result_dir=str(tmp_path))
+    app.extensions['jobs'] = runner
+    login(client, test_user)
+    running = client.post('/api/jobs/', json={'kind': 'test_blocking'}).json['id']
+    queued = client.post('/api/jobs/', json={'kind': 'test_blocking'}).json['id']
+    assert client.get(f'/api/jobs/{queued}/result').status_code == 409
+
+    assert client.post(f'/api/jobs/{queued}/cancel').json['status'] == 'cancelled'
+    client.post(f'/api/jobs/{running}/cancel')
+    assert wait_for(client, running)['status'] == 'cancelled'
+    assert sorted(os.listdir(tmp_path)) == sorted(f'{job_id}.state.json' for job_id in (running, queued))
+    runner.shutdown()
+
+def test_cancel_drops_result_of_job_without_progress_updates(app, client, test_user, tmp_path):
+    started, release = threading.Event(), threading.Event()
+
+    @job_kind('test_one_call')
+    def one_call(context):
+        started.set()
+        release.wait(10)
+        return {'released': True}
+
+    runner = jobs_service.JobRunner(app, max_workers=1, result_dir=str(tmp_path))
+    app.extensions['jobs'] = runner
+    try:
+        login(client, test_user)
+        job_id = client.post('/api/jobs/', json={'kind': 'test_one_call'}).json['id']
+        assert started.wait(10)
+        assert client.post(f'/api/jobs/{job_id}/cancel').json['status'] == 'running'
+        release.set()
+        assert wait_for(client, job_id)['status'] == 'cancelled'
+        assert os.listdir(tmp_path) == [f'{job_id}.state.json']
+    finally:
+        release.set()
+        runner.shutdown()
+        del JOB_KINDS['test_one_call']
+
+def test_jobs_are_shared_through_state_files(app, client, test_user, tmp_path, blocking_kind):
+    # Two runners on one result directory stand in for two worker processes
+    owner = jobs_service.JobRunner(app, max_workers=1, result_dir=str(tmp_path))
+    app.extensions['jobs'] = owner
+    login(client, test_user)
+    job_id = client.post('/api/jobs/', json={'kind': 'test_blocking'}).json['id']
+    app.extensions['jobs'] = other = jobs_service.JobRunner(app, result_dir=str(tmp_path))
+
+    job = client.get(f'/api/jobs/{job_id}').json
+    assert job['kind'] == 'test_blocking'
+    assert job['status'] in ('queued', 'running')
+    client.post(f'/api/jobs/{job_id}/cancel')
+    assert wait_for(client, job_id)['status'] == 'cancelled'
+    assert owner.get(job_id).status == 'cancelled'
+    owner.shutdown()
+    other.shutdown()
+
+def test_jobs_are_private(client, db, test_user, books, runner):
+    login(client, test_user)
+    job_id = client.post('/api/jobs/', json={'kind': 'flows'}).json['id']
+    wait_for(client, job_id)
+    client.post('/api/auth/logout')
+    other = User(username='other', password_hash=generate_password_hash('testpass'), role='User')
+    db.session.add(other)
+    db.session.commit()
+    login(client, other)
+    assert client.get(f'/api/jobs/{job_id}').status_code == 404
+    assert client.delete(f'/api/jobs/{job_id}').status_code == 404
+
+def test_cleanup_removes_old_results(app, client, test_user, books, runner):
+    login(client, test_user)
+    job_id = client.post('/api/jobs/', json={'kind': 'period_totals', 'params': {'period': 'year'}}).json['id']
+    assert wait_for(client, job_id)['status'] == 'succeeded'
+    assert len(os.listdir(runner.result_dir)) == 2
+
+    result = app.test_cli_runner().invoke(args=['jobs', 'cleanup', '--max-age', '0'])
+    assert 'Removed 1 job result(s).' in result.output
+    assert os.listdir(runner.result_dir) == []
+    assert client.get(f'/api/jobs/{job_id}').status_code == 404
+
+def test_cleanup_keeps_running_jobs_and_tolerates_other_sweeps(app, tmp_path, monkeypatch):
+    runner = jobs_service.JobRunner(app, result_dir=str(tmp_path), result_ttl=60)
+    for job_id, status in (('running', 'running'), ('done', 'succeeded')):
+        (tmp_path / f'{job_id}.state.json').write_text(json.dumps({'status': status}))
+    (tmp_path / 'swept.json').write_text('[]')
+    old = time.time() - 3600
+    for path in tmp_path.iterdir():
+        os.utime(path, (old, old))
+
+    getmtime = os.path.getmtime
+
+    def swept_meanwhile(path):
+        # Another worker process deletes this result between listdir and getmtime
+        if path.endswith('swept.json') and os.path.exists(path):
+            os.remove(path)
+        return getmtime(path)
+
+    monkeypatch.setattr(jobs_service.os.path, 'getmtime', swept_meanwhile)
+    assert runner.cleanup() == 0
+    assert os.listdir(tmp_path) == ['running.state.json']
+    runner.shutdown()
+
+def test_job_fails_when_results_cannot_be_written(app, tmp_path):
+    blocker = tmp_path / 'not-a-directory'
+    blocker.write_text('')
+    runner = jobs_service.JobRunner(app, result_dir=str(blocker / 'jobs'))
+    job = runner.submit('flows')
+    job.future.result(10)
+    assert job.status == 'failed'
+    runner.shutdown()
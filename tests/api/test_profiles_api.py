@@ -0,0 +1,96 @@
+# tests/api/test_profiles_api.py
+
+import os
+import pstats
+import pytest
+from werkzeug.security import generate_password_hash
+from modules.models.user import User
+from modules.services.profiler import get_profiler
+
+@pytest.fixture
+def profiler(app, tmp_path):
+    profiler = get_profiler()
+    profiler.directory = str(tmp_path / 'profiles')
+    return profiler
+
+@pytest.fixture
+def admin(db):
+    user = User(username='admin', password_hash=generate_password_hash('testpass'), role='Admin')
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+def login(client, test_user):
+    client.post('/api/auth/login', json={
+        'username': test_user.username,
+        'password': 'testpass'
+    })
+
+def test_admin_profiles_a_request(client, admin, profiler, tmp_path):
+    login(client, admin)
+    response = client.get('/api/accounts/', headers={'X-Profile': '1'})
+    assert response.status_code == 200
+
+    profiles = client.get('/api/profiles/').json
+    assert len(profiles) == 1
+    profile = profiles[0]
+    assert profile['endpoint'] == 'api.accounts_account_list'
+    assert profile['method'] == 'GET'
+    assert profile['path'] == '/api/accounts/'
+    assert profile['status'] == 200
+    assert profile['trigger'] == 'requested'
+    assert profile['duration_ms'] > 0
+    assert profile['user_id'] == str(admin.id)
+
+    detail = client.get(f"/api/profiles/{profile['id']}").json
+    assert 'function calls' in detail['summary']
+    raw = client.get(f"/api/profiles/{profile['id']}/raw")
+    assert raw.status_code == 200
+    path = tmp_path / 'download.prof'
+    path.write_bytes(raw.data)
+    assert pstats.Stats(str(path)).total_calls > 0
+
+def test_query_parameter_and_unknown_profile(client, admin, profiler):
+    login(client, admin)
+    client.get('/api/transactions/?profile=1')
+    client.get('/api/transactions/')
+    assert [p['endpoint'] for p in client.get('/api/profiles/').json] == ['api.transactions_transaction_list']
+    assert client.get('/api/profiles/20240101T000000-00000000').status_code == 404
+    assert client.get('/api/profiles/..%2Fapp').status_code == 404
+
+def test_profiling_is_admin_only(client, test_user, profiler):
+    # The flag is ignored for anyone but an admin; the request is served as usual
+    assert client.get('/api/accounts/', headers={'X-Profile': '1'}).status_code == 401
+    assert client.post('/api/auth/login?profile=1', json={
+        'username': test_user.username, 'password': 'testpass'}).status_code == 200
+    assert client.get('/api/accounts/', headers={'X-Profile': '1'}).status_code == 200
+    assert client.get('/api/accounts/').status_code == 200
+    assert client.get('/api/profiles/').status_code == 403
+    assert profiler.profiles() == []
+
+def test_every_nth_request_is_profiled(client, admin, profiler):
+    profiler.every_n_requests = 3
+    login(client, admin)
+    for _ in range(9):
+        client.get('/api/accounts/')
+    profiler.every_n_requests = 0
+    profiled = profiler.profiles()
+    assert len(profiled) == 3
+    assert {p['trigger'] for p in profiled} == {'every_n_requests'}
+
+def test_one_profile_at_a_time(client, admin, profiler):
+    login(client, admin)
+    # Another request holds the profiler: this one is served without a profile
+    with profiler._active:
+        assert client.get('/api/accounts/', headers={'X-Profile': '1'}).status_code == 200
+    assert profiler.profiles() == []
+    client.get('/api/accounts/', headers={'X-Profile': '1'})
+    assert len(profiler.profiles()) == 1
+
+def test_old_profiles_are_pruned(client, admin, profiler):
+    profiler.max_profiles = 2
+    login(client, admin)
+    for _ in range(4):
+        client.get('/api/accounts/', headers={'X-Profile': '1'})
+    assert len(profiler.profiles()) == 2
+    assert len(os.listdir(profiler.directory)) == 4
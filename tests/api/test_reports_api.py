@@ -0,0 +1,143 @@
+# tests/api/test_reports_api.py
+
+import pytest
+from datetime import date
+from sqlalchemy import event
+from modules.models.account import Account
+from modules.models.transaction import Transaction
+
+@pytest.fixture
+def books(db):
+    cash = Account(name='Cash', type='Asset')
+    loan = Account(name='Loan', type='Liability')
+    sales = Account(name='Sales', type='Revenue')
+    rent = Account(name='Rent', type='Expense')
+    db.session.add_all([cash, loan, sales, rent])
+    db.session.commit()
+    db.session.add_all([
+        Transaction(date=date(2024, 1, 5), amount=1000.0, description='Loan drawn',
+                    debit_account_id=cash.id, credit_account_id=loan.id),
+        Transaction(date=date(2024, 2, 10), amount=300.0, description='Sale',
+                    debit_account_id=cash.id, credit_account_id=sales.id),
+        Transaction(date=date(2024, 3, 1), amount=200.0, description='Rent',
+                    debit_account_id=rent.id, credit_account_id=cash.id)
+    ])
+    db.session.commit()
+    return cash, loan, sales, rent
+
+def login(client, test_user):
+    client.post('/api/auth/login', json={
+        'username': test_user.username,
+        'password': 'testpass'
+    })
+
+def find_account(report, name):
+    for group in report['groups']:
+        for account in group['accounts']:
+            if account['name'] == name:
+                return group, account
+    return None, None
+
+def test_trial_balance(client, test_user, books):
+    login(client, test_user)
+    response = client.get('/api/reports/trial-balance')
+    assert response.status_code == 200
+    report = response.json
+    assert [group['type'] for group in report['groups']] == ['Asset', 'Liability', 'Equity', 'Revenue', 'Expense']
+    assert report['debit_total'] == report['credit_total'] == 1500.0
+    group, cash = find_account(report, 'Cash')
+    assert cash['debit_total'] == 1300.0
+    assert cash['credit_total'] == 200.0
+    assert cash['balance'] == 1100.0
+    assert group['balance'] == 1100.0
+    _, sales = find_account(report, 'Sales')
+    assert sales['balance'] == 300.0
+
+def test_trial_balance_as_of(client, test_user, books):
+    login(client, test_user)
+    response = client.get('/api/reports/trial-balance?as_of=2024-02-10')
+    report = response.json
+    assert report['as_of'] == '2024-02-10'
+    assert report['debit_total'] == 1300.0
+    _, rent = find_account(report, 'Rent')
+    assert rent['balance'] == 0.0
+
+def test_general_ledger(client, test_user, books):
+    login(client, test_user)
+    response = client.get('/api/reports/general-ledger?date_from=2024-02-01&date_to=2024-02-29')
+    assert response.status_code == 200
+    _, cash = find_account(response.json, 'Cash')
+    assert cash['opening_balance'] == 1000.0
+    assert cash['debit_total'] == 300.0
+    assert cash['credit_total'] == 0.0
+    assert cash['closing_balance'] == 1300.0
+    _, loan = find_account(response.json, 'Loan')
+    assert loan['opening_balance'] == 1000.0
+    assert loan['closing_balance'] == 1000.0
+
+def test_general_ledger_single_account(client, test_user, books):
+    cash = books[0]
+    login(client, test_user)
+    response = client.get(f'/api/reports/general-ledger?account_id={cash.id}')
+    groups = response.json['groups']
+    assert len(groups) == 1
+    assert groups[0]['accounts'][0]['closing_balance'] == 1100.0
+
+def test_general_ledger_invalid_period(client, test_user, books):
+    login(client, test_user)
+    response = client.get('/api/reports/general-ledger?date_from=2024-03-01&date_to=2024-01-01')
+    assert response.status_code == 400
+
+def test_period_totals(client, test_user, books):
+    login(client, test_user)
+    response = client.get('/api/reports/period-totals?period=month')
+    assert response.status_code == 200
+    assert response.json == [
+        {'period': '2024-01', 'amount': 1000.0, 'count': 1},
+        {'period': '2024-02', 'amount': 300.0, 'count': 1},
+        {'period': '2024-03', 'amount': 200.0, 'count': 1}
+    ]
+
+def test_flows_follow_api_writes(client, test_user, books):
+    cash, loan, sales, rent = books
+    login(client, test_user)
+    before = client.get('/api/reports/flows').json
+    assert {'debit_account_id': cash.id, 'credit_account_id': sales.id, 'amount': 300.0, 'count': 1} in before
+
+    client.post('/api/transactions/', json={'date': '2024-03-15', 'amount': 50.0, 'description': 'Sale',
+                                            'debit_account_id': cash.id, 'credit_account_id': sales.id})
+    after = client.get('/api/reports/flows').json
+    assert {'debit_account_id': cash.id, 'credit_account_id': sales.id, 'amount': 350.0, 'count': 2} in after
+    assert client.get('/api/reports/ledger-cache').json['loads'] == 1
+
+def test_analytics_reports_without_cache(app, client, test_user, books):
+    login(client, test_user)
+    cached = (client.get('/api/reports/period-totals?period=year').json,
+              client.get('/api/reports/flows?date_from=2024-02-01').json)
+    app.extensions['ledger_cache'].enabled = False
+    uncached = (client.get('/api/reports/period-totals?period=year').json,
+                client.get('/api/reports/flows?date_from=2024-02-01').json)
+    assert cached == uncached
+    assert client.get('/api/reports/ledger-cache').json['enabled'] is False
+
+def test_account_reports_from_warm_cache(app, client, db, test_user, books):
+    login(client, test_user)
+    client.get('/api/reports/trial-balance')
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', capture)
+    try:
+        trial_balance = client.get('/api/reports/trial-balance?as_of=2024-02-10').json
+        general_ledger = client.get('/api/reports/general-ledger?date_from=2024-02-01&date_to=2024-02-29').json
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', capture)
+    assert statements
+    assert not [statement for statement in statements if 'transactions' in statement]
+    assert client.get('/api/reports/ledger-cache').json['loads'] == 1
+
+    app.extensions['ledger_cache'].enabled = False
+    assert client.get('/api/reports/trial-balance?as_of=2024-02-10').json == trial_balance
+    assert client.get('/api/reports/general-ledger?date_from=2024-02-01&date_to=2024-02-29').json == general_ledger
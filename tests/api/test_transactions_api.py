@@ -70,3 +70,185 @@ def test_delete_transaction(client, db, test_user, new_transaction_data):
     assert response.status_code == 204
     response = client.get(f'/api/transactions/{transaction_id}')
     assert response.status_code == 404
+
+@pytest.fixture
+def ledger(db, setup_accounts):
+    from datetime import date
+    from modules.models.transaction import Transaction
+    debit_account, credit_account = setup_accounts
+    transactions = [
+        Transaction(date=date(2024, 1, day), amount=float(day * 10),
+                    description=f'Entry {day}',
+                    debit_account_id=debit_account.id if day % 2 else credit_account.id,
+                    credit_account_id=credit_account.id if day % 2 else debit_account.id)
+        for day in range(1, 11)
+    ]
+    db.session.add_all(transactions)
+    db.session.commit()
+    return debit_account, credit_account
+
+def test_list_transactions_paginates_with_cursor(client, test_user, ledger):
+    login(client, test_user)
+    seen = []
+    response = client.get('/api/transactions/?limit=4')
+    while True:
+        assert response.status_code == 200
+        assert len(response.json) <= 4
+        seen.extend(item['description'] for item in response.json)
+        cursor = response.headers.get('X-Next-Cursor')
+        if not cursor:
+            break
+        assert 'rel="next"' in response.headers['Link']
+        response = client.get(f'/api/transactions/?limit=4&after={cursor}')
+    assert seen == [f'Entry {day}' for day in range(1, 11)]
+
+def test_list_transactions_last_page_has_no_cursor(client, test_user, ledger):
+    login(client, test_user)
+    response = client.get('/api/transactions/?limit=10')
+    assert len(response.json) == 10
+    assert 'X-Next-Cursor' not in response.headers
+
+def test_list_transactions_filters(client, test_user, ledger):
+    debit_account, credit_account = ledger
+    login(client, test_user)
+    response = client.get('/api/transactions/?date_from=2024-01-03&date_to=2024-01-08'
+                          f'&debit_account_id={debit_account.id}&amount_min=40')
+    assert response.status_code == 200
+    assert [item['description'] for item in response.json] == ['Entry 5', 'Entry 7']
+
+    response = client.get(f'/api/transactions/?credit_account_id={debit_account.id}&amount_max=50')
+    assert [item['description'] for item in response.json] == ['Entry 2', 'Entry 4']
+
+def test_list_transactions_invalid_cursor(client, test_user, ledger):
+    login(client, test_user)
+    response = client.get('/api/transactions/?after=not-a-cursor')
+    assert response.status_code == 400
+    assert 'Invalid cursor.' in response.json['message']
+
+def test_batch_create_transactions(client, test_user, setup_accounts):
+    debit_account, credit_account = setup_accounts
+    login(client, test_user)
+    entries = [{
+        'date': f'2024-02-{day:02d}T09:30:00Z',
+        'amount': float(day),
+        'description': f'Feed {day}',
+        'debit_account_id': debit_account.id,
+        'credit_account_id': credit_account.id
+    } for day in range(1, 26)]
+    response = client.post('/api/transactions/batch', json=entries)
+    assert response.status_code == 200
+    assert response.json == {'created': 25, 'failed': 0, 'errors': []}
+    response = client.get('/api/transactions/?limit=100')
+    assert len(response.json) == 25
+    assert response.json[0]['date'].startswith('2024-02-01')
+
+def test_batch_create_reports_row_errors(client, test_user, setup_accounts):
+    debit_account, credit_account = setup_accounts
+    login(client, test_user)
+    valid = {
+        'date': '2024-02-01',
+        'amount': 10.0,
+        'description': 'Valid',
+        'debit_account_id': debit_account.id,
+        'credit_account_id': credit_account.id
+    }
+    entries = [
+        valid,
+        dict(valid, debit_account_id=99999),
+        dict(valid, date='not-a-date'),
+        {key: value for key, value in valid.items() if key != 'amount'},
+        'not an object',
+        dict(valid, description='Also valid')
+    ]
+    response = client.post('/api/transactions/batch', json=entries)
+    assert response.status_code == 200
+    assert response.json['created'] == 2
+    assert response.json['failed'] == 4
+    errors = {error['index']: error['message'] for error in response.json['errors']}
+    assert errors[1] == 'Invalid debit or credit account ID.'
+    assert errors[2] == 'Invalid date format.'
+    assert 'amount' in errors[3]
+    assert errors[4] == 'Entry must be a JSON object.'
+
+def test_batch_create_ndjson(client, test_user, setup_accounts):
+    import json
+    debit_account, credit_account = setup_accounts
+    login(client, test_user)
+    lines = [json.dumps({
+        'date': '2024-03-01',
+        'amount': 5.0,
+        'description': f'Line {n}',
+        'debit_account_id': debit_account.id,
+        'credit_account_id': credit_account.id
+    }) for n in range(3)]
+    lines.insert(1, '{broken')
+    response = client.post('/api/transactions/batch', data='\n'.join(lines),
+                           content_type='application/x-ndjson')
+    assert response.status_code == 200
+    assert response.json['created'] == 3
+    assert response.json['errors'] == [{'index': 1, 'message': 'Entry must be a JSON object.'}]
+
+def test_batch_create_rejects_non_array(client, test_user):
+    login(client, test_user)
+    response = client.post('/api/transactions/batch', json={'date': '2024-01-01'})
+    assert response.status_code == 400
+
+def test_transaction_etag(client, db, test_user, new_transaction_data):
+    login(client, test_user)
+    first = client.post('/api/transactions/', json=new_transaction_data).json['id']
+    second = client.post('/api/transactions/', json=new_transaction_data).json['id']
+    response = client.get(f'/api/transactions/{first}')
+    tag = response.headers['ETag']
+
+    response = client.get(f'/api/transactions/{first}', headers={'If-None-Match': tag})
+    assert response.status_code == 304
+    assert response.data == b''
+
+    # Writes to other rows leave the tag alone
+    client.put(f'/api/transactions/{second}', json={'amount': 5.0})
+    assert client.get(f'/api/transactions/{first}', headers={'If-None-Match': tag}).status_code == 304
+
+    client.put(f'/api/transactions/{first}', json={'amount': 150.0})
+    response = client.get(f'/api/transactions/{first}', headers={'If-None-Match': tag})
+    assert response.status_code == 200
+    assert response.json['amount'] == 150.0
+    assert response.headers['ETag'] != tag
+
+    client.delete(f'/api/transactions/{first}')
+    assert client.get(f'/api/transactions/{first}', headers={'If-None-Match': tag}).status_code == 404
+
+def test_list_transactions_matches_marshalled_output(app, client, test_user, ledger):
+    from flask_restx import marshal
+    from flask_restx.representations import output_json
+    from app.api.transactions_api import transaction_model
+    from modules.database.db import db
+    from modules.models.transaction import Transaction
+    login(client, test_user)
+    response = client.get('/api/transactions/?limit=1000')
+    transactions = db.session.execute(
+        db.select(Transaction).order_by(Transaction.date, Transaction.id)).scalars().all()
+    with app.test_request_context():
+        expected = output_json(marshal(transactions, transaction_model), 200).get_data()
+    assert response.data == expected
+
+def test_create_transaction_suggests_accounts(app, client, test_user, setup_accounts, new_transaction_data,
+                                              tmp_path):
+    from modules.ml.models.registry import ModelRegistry
+    from modules.ml.training.categorizer import train_categorizer
+    debit_account, credit_account = setup_accounts
+    login(client, test_user)
+
+    # No model yet: created without a suggestion
+    response = client.post('/api/transactions/', json=new_transaction_data)
+    assert response.status_code == 201
+    assert response.json['suggestion'] is None
+
+    registry = ModelRegistry(str(tmp_path))
+    app.extensions['model_registry'] = registry
+    version = train_categorizer(registry, workers=0)
+    response = client.post('/api/transactions/', json=dict(new_transaction_data, description='Another Test'))
+    assert response.status_code == 201
+    assert response.json['suggestion'] == {'debit_account_id': debit_account.id,
+                                           'credit_account_id': credit_account.id, 'model_version': version}
+    # Other responses are unchanged
+    assert 'suggestion' not in client.get('/api/transactions/').json[0]
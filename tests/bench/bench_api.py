@@ -0,0 +1,271 @@
+# tests/bench/bench_api.py
+"""
+Latency of the accounts and transactions API endpoints, the HTML views and
+login over ledgers of realistic size.
+
+    python -m tests.bench.bench_api --sizes 10000 1000000 5000000 --output bench.json
+    python -m tests.bench.bench_api --sizes 10000 --compare tests/bench/baseline.json
+
+Each ledger size runs in its own process: a file database using the
+ProductionConfig profile is seeded with that many transactions, then every
+case is timed through the Flask test client. Results hold p50/p95 latency
+in milliseconds and rows per second per case, plus the peak RSS of the
+process. With --compare the run fails (exit status 1) when a case's p50 or
+the peak RSS is more than --tolerance above the baseline; --write-baseline
+stores the results as the new baseline instead.
+
+Latencies are compared relative to REFERENCE_CASE of the same run: each
+baseline p50 is scaled by how much faster or slower the reference case ran
+than in the baseline, so the gate measures regressions of one endpoint
+against the rest of the stack rather than the speed of the machine. The
+scaling cancels CPU speed, not noise: on shared CI runners keep the
+tolerance generous or run the gate locally.
+"""
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+ACCOUNTS = 25
+PASSWORD = 'bench-password'
+
+# Above this size the unpaginated transaction list view is skipped
+VIEW_LIST_MAX_ROWS = 100000
+
+# The yardstick for --compare: password hashing is pure CPU, stable from
+# run to run and independent of the ledger, so it measures the machine
+REFERENCE_CASE = 'POST /api/auth/login'
+
+def build_app(path):
+    from app import create_app
+    import config
+
+    class BenchConfig(config.ProductionConfig):
+        TESTING = True
+        WTF_CSRF_ENABLED = False
+        SQLALCHEMY_DATABASE_URI = f'sqlite:///{path}'
+        JOBS_RESULT_DIR = os.path.join(os.path.dirname(path), 'jobs')
+
+    return create_app(BenchConfig)
+
+def seed(app, rows):
+    from werkzeug.security import generate_password_hash
+    from modules.database.db import db
+    from modules.models.user import User
+    from modules.services.ledger_generator import generate_ledger
+
+    with app.app_context():
+        db.create_all()
+        db.session.add(User(username='bench', password_hash=generate_password_hash(PASSWORD), role='Admin'))
+        generate_ledger(rows, accounts=ACCOUNTS)
+
+def percentile(values, q):
+    ordered = sorted(values)
+    index = (len(ordered) - 1) * q
+    low = int(index)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (index - low)
+
+def time_case(client, repeat, request, expected, count_rows=None):
+    """Time `repeat` calls of request(n) after one warm-up call; returns the stats of the case."""
+    request(-1)  # Warm-up; write cases keep one extra row per case for it
+    durations = []
+    rows = 0
+    for n in range(repeat):
+        start = time.perf_counter()
+        response = request(n)
+        durations.append(time.perf_counter() - start)
+        if response.status_code != expected:
+            raise RuntimeError(f'{response.request.method} {response.request.path}: '
+                               f'status {response.status_code}, expected {expected}')
+        rows += count_rows(response) if count_rows else 1
+    p50 = percentile(durations, 0.5)
+    return {
+        'p50_ms': round(p50 * 1000, 3),
+        'p95_ms': round(percentile(durations, 0.95) * 1000, 3),
+        'rows_per_second': round(rows / repeat / p50, 1) if p50 else None,
+        'calls': repeat
+    }
+
+def run_cases(app, rows, repeat):
+    client = app.test_client()
+    cases = {}
+
+    def login_api(n):
+        return client.post('/api/auth/login', json={'username': 'bench', 'password': PASSWORD})
+
+    def login_form(n):
+        return client.post('/auth/login', data={'username': 'bench', 'password': PASSWORD})
+
+    cases['POST /api/auth/login'] = time_case(client, repeat, login_api, 200)
+    cases['POST /auth/login'] = time_case(client, repeat, login_form, 302)
+
+    # Accounts
+    cases['GET /api/accounts/'] = time_case(
+        client, repeat, lambda n: client.get('/api/accounts/'), 200, lambda r: len(r.json))
+    created = []
+
+    def create_account(n):
+        response = client.post('/api/accounts/', json={'name': f'Created {n}', 'type': 'Expense'})
+        created.append(response.json['id'])
+        return response
+
+    cases['POST /api/accounts/'] = time_case(client, repeat, create_account, 201)
+    cases['GET /api/accounts/<id>'] = time_case(
+        client, repeat, lambda n: client.get(f'/api/accounts/{1 + n % ACCOUNTS}'), 200)
+    cases['PUT /api/accounts/<id>'] = time_case(
+        client, repeat, lambda n: client.put(f'/api/accounts/{created[n + 1]}',
+                                             json={'name': f'Renamed {n}', 'type': 'Expense'}), 200)
+    cases['GET /api/accounts/<id>/balance'] = time_case(
+        client, repeat, lambda n: client.get(f'/api/accounts/{1 + n % ACCOUNTS}/balance'), 200)
+    cases['GET /api/accounts/directory-stats'] = time_case(
+        client, repeat, lambda n: client.get('/api/accounts/directory-stats'), 200)
+    cases['DELETE /api/accounts/<id>'] = time_case(
+        client, repeat, lambda n: client.delete(f'/api/accounts/{created[n + 1]}'), 204)
+
+    # Transactions
+    first_page = client.get('/api/transactions/')
+    cursor = first_page.headers['X-Next-Cursor']
+    count = lambda response: len(response.json)
+    cases['GET /api/transactions/'] = time_case(
+        client, repeat, lambda n: client.get('/api/transactions/?limit=1000'), 200, count)
+    cases['GET /api/transactions/?after'] = time_case(
+        client, repeat, lambda n: client.get(f'/api/transactions/?limit=1000&after={cursor}'), 200, count)
+    cases['GET /api/transactions/?filtered'] = time_case(
+        client, repeat, lambda n: client.get(
+            f'/api/transactions/?debit_account_id={1 + n % ACCOUNTS}&date_from=2022-01-01&amount_min=500'),
+        200, count)
+    cases['GET /api/transactions/<id>'] = time_case(
+        client, repeat, lambda n: client.get(f'/api/transactions/{1 + (n * 7919) % rows}'), 200)
+    posted = []
+
+    def create_transaction(n):
+        response = client.post('/api/transactions/', json={
+            'date': '2024-06-30', 'amount': 12.5, 'description': f'Posted {n}',
+            'debit_account_id': 1 + n % ACCOUNTS, 'credit_account_id': 1 + (n + 1) % ACCOUNTS
+        })
+        posted.append(response.json['id'])
+        return response
+
+    cases['POST /api/transactions/'] = time_case(client, repeat, create_transaction, 201)
+    cases['PUT /api/transactions/<id>'] = time_case(
+        client, repeat, lambda n: client.put(f'/api/transactions/{posted[n + 1]}', json={'amount': 20.0}), 200)
+    cases['DELETE /api/transactions/<id>'] = time_case(
+        client, repeat, lambda n: client.delete(f'/api/transactions/{posted[n + 1]}'), 204)
+    batch = [{'date': '2024-07-01', 'amount': 3.0, 'description': f'Batch {n}',
+              'debit_account_id': 1 + n % ACCOUNTS, 'credit_account_id': 1 + (n + 2) % ACCOUNTS}
+             for n in range(1000)]
+    cases['POST /api/transactions/batch'] = time_case(
+        client, max(repeat // 10, 3), lambda n: client.post('/api/transactions/batch', json=batch), 200,
+        lambda response: response.json['created'])
+
+    # HTML views
+    cases['GET /'] = time_case(client, repeat, lambda n: client.get('/'), 200)
+    cases['GET /accounts/'] = time_case(client, repeat, lambda n: client.get('/accounts/'), 200)
+    cases['GET /transactions/new'] = time_case(client, repeat, lambda n: client.get('/transactions/new'), 200)
+    if rows <= VIEW_LIST_MAX_ROWS:
+        cases['GET /transactions/'] = time_case(
+            client, max(repeat // 10, 3), lambda n: client.get('/transactions/'), 200)
+    return cases
+
+def run_size(rows, repeat):
+    """Seed a ledger of `rows` transactions in a temporary database and time every case."""
+    with tempfile.TemporaryDirectory() as directory:
+        app = build_app(os.path.join(directory, 'bench.db'))
+        start = time.perf_counter()
+        seed(app, rows)
+        seed_seconds = time.perf_counter() - start
+        with app.app_context():
+            cases = run_cases(app, rows, repeat)
+        app.extensions['jobs'].shutdown()
+    return {
+        'rows': rows,
+        'seed_seconds': round(seed_seconds, 2),
+        # ru_maxrss is in KiB on Linux
+        'peak_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        'cases': cases
+    }
+
+def compare(results, baseline, tolerance, slack_ms):
+    """
+    Regressions of `results` against `baseline`, as readable strings. Case
+    latencies are judged relative to REFERENCE_CASE of the same run and size.
+    """
+    regressions = []
+    for size, result in results['sizes'].items():
+        base = baseline['sizes'].get(size)
+        if base is None:
+            continue
+        # Machine speed relative to the one that recorded the baseline
+        scale = result['cases'][REFERENCE_CASE]['p50_ms'] / base['cases'][REFERENCE_CASE]['p50_ms']
+        for name, case in result['cases'].items():
+            base_case = base['cases'].get(name)
+            if base_case is None or name == REFERENCE_CASE:
+                continue
+            expected = base_case['p50_ms'] * scale
+            limit = expected * (1 + tolerance) + slack_ms
+            if case['p50_ms'] > limit:
+                regressions.append(f"{size} rows, {name}: p50 {case['p50_ms']} ms > {round(limit, 3)} ms "
+                                   f"(baseline {base_case['p50_ms']} ms x {round(scale, 2)} machine speed)")
+        limit = base['peak_rss_mb'] * (1 + tolerance)
+        if result['peak_rss_mb'] > limit:
+            regressions.append(f"{size} rows: peak RSS {result['peak_rss_mb']} MB > {round(limit, 1)} MB "
+                               f"(baseline {base['peak_rss_mb']} MB)")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000],
+                        help='Ledger sizes to benchmark, e.g. 10000 1000000 5000000')
+    parser.add_argument('--repeat', type=int, default=30, help='Timed calls per case')
+    parser.add_argument('--output', help='Write the results to this JSON file')
+    parser.add_argument('--compare', metavar='BASELINE', help='Fail if slower than this baseline file')
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='Allowed slowdown against the baseline, as a fraction')
+    parser.add_argument('--slack-ms', type=float, default=0.5,
+                        help='Absolute p50 slack in milliseconds, for sub-millisecond cases')
+    parser.add_argument('--write-baseline', metavar='BASELINE', help='Store the results as the new baseline')
+    parser.add_argument('--single-size', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.single_size is not None:
+        print(json.dumps(run_size(args.single_size, args.repeat)))
+        return
+
+    results = {'repeat': args.repeat, 'sizes': {}}
+    for rows in args.sizes:
+        # A fresh process per size keeps the peak RSS of each size separate
+        child = subprocess.run(
+            [sys.executable, '-m', 'tests.bench.bench_api', '--single-size', str(rows), '--repeat', str(args.repeat)],
+            check=True, stdout=subprocess.PIPE, text=True)
+        results['sizes'][str(rows)] = json.loads(child.stdout.strip().splitlines()[-1])
+        print(f"{rows} rows: seeded in {results['sizes'][str(rows)]['seed_seconds']} s, "
+              f"peak RSS {results['sizes'][str(rows)]['peak_rss_mb']} MB", file=sys.stderr)
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+    if args.write_baseline:
+        with open(args.write_baseline, 'w') as f:
+            f.write(output + '\n')
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance, args.slack_ms)
+        for regression in regressions:
+            print(f'REGRESSION {regression}', file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+        print('No regressions against the baseline.', file=sys.stderr)
+
+if __name__ == '__main__':
+    main()
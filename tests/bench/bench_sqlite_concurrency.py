@@ -0,0 +1,118 @@
+# tests/bench/bench_sqlite_concurrency.py
+"""
+Reader/writer throughput of the SQLite engine under concurrent load, with
+the default engine settings and with the ProductionConfig profile.
+
+    python -m tests.bench.bench_sqlite_concurrency --seconds 10 --writers 4 --readers 4
+
+Each writer thread posts single transactions (row, balance update, commit)
+in a loop; each reader thread runs the trial balance report. The script
+prints one JSON object per profile with operations per second and the
+number of "database is locked" failures.
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import threading
+import time
+from datetime import date
+from sqlalchemy.exc import OperationalError
+
+def build_app(profile, path):
+    from app import create_app
+    import config
+
+    base = config.ProductionConfig if profile == 'production' else config.Config
+
+    class BenchConfig(base):
+        SQLALCHEMY_DATABASE_URI = f'sqlite:///{path}'
+        LEDGER_CACHE_ENABLED = False
+
+    return create_app(BenchConfig)
+
+def seed(app, rows):
+    from modules.database.db import db
+    from modules.services.ledger_generator import generate_ledger
+
+    with app.app_context():
+        db.create_all()
+        generate_ledger(rows, accounts=20)
+
+def run_workers(app, writers, readers, seconds):
+    from modules.database.db import db
+    from modules.models.transaction import Transaction
+    from modules.services import balances, reports
+
+    counts = {'writes': 0, 'reads': 0, 'write_locked': 0, 'read_locked': 0}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+
+    def bump(key):
+        with lock:
+            counts[key] += 1
+
+    def writer(worker):
+        with app.app_context():
+            n = 0
+            while time.perf_counter() < deadline:
+                n += 1
+                transaction = Transaction(date=date(2024, 1, 1), amount=1.0, description=f'W{worker}-{n}',
+                                          debit_account_id=1 + n % 20, credit_account_id=1 + (n + 1) % 20)
+                try:
+                    db.session.add(transaction)
+                    balances.post(transaction)
+                    db.session.commit()
+                    bump('writes')
+                except OperationalError:
+                    db.session.rollback()
+                    bump('write_locked')
+            db.session.remove()
+
+    def reader(worker):
+        with app.app_context():
+            while time.perf_counter() < deadline:
+                try:
+                    reports.trial_balance()
+                    db.session.rollback()
+                    bump('reads')
+                except OperationalError:
+                    db.session.rollback()
+                    bump('read_locked')
+            db.session.remove()
+
+    threads = [threading.Thread(target=writer, args=(n,)) for n in range(writers)]
+    threads += [threading.Thread(target=reader, args=(n,)) for n in range(readers)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    return dict(counts,
+                writes_per_second=round(counts['writes'] / elapsed, 1),
+                reads_per_second=round(counts['reads'] / elapsed, 1),
+                seconds=round(elapsed, 2))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--writers', type=int, default=4)
+    parser.add_argument('--readers', type=int, default=4)
+    parser.add_argument('--rows', type=int, default=50000, help='Transactions seeded before the run')
+    parser.add_argument('--profiles', nargs='+', default=['default', 'production'],
+                        choices=['default', 'production'])
+    args = parser.parse_args()
+
+    for profile in args.profiles:
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'bench.db')
+            app = build_app(profile, path)
+            seed(app, args.rows)
+            result = run_workers(app, args.writers, args.readers, args.seconds)
+            print(json.dumps(dict(profile=profile, writers=args.writers, readers=args.readers,
+                                  rows=args.rows, **result)))
+
+if __name__ == '__main__':
+    main()
@@ -4,6 +4,7 @@ import pytest
 from app import create_app
 from modules.database.db import db as _db
 from modules.models.user import User
+from modules.services.query_budget import assert_query_budget
 from werkzeug.security import generate_password_hash
 
 @pytest.fixture(scope='function')
@@ -34,3 +35,14 @@ def test_user(db):
 @pytest.fixture(scope='function')
 def client(app, db):
     return app.test_client()
+
+@pytest.fixture(scope='function')
+def query_budget(app):
+    """
+    Context manager failing the test when the block runs more statements
+    than max_queries, or one statement shape more than max_repeats times:
+
+        with query_budget(max_queries=3, max_repeats=1):
+            client.get('/api/transactions/')
+    """
+    return assert_query_budget
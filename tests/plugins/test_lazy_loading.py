@@ -0,0 +1,102 @@
+# tests/plugins/test_lazy_loading.py
+
+import json
+import os
+import subprocess
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Builds an app in a fresh interpreter and reports what starting it cost
+STARTUP_PROBE = '''
+import json, sys, time
+started = time.perf_counter()
+import config
+from app import create_app
+
+class ProbeConfig(config.TestingConfig):
+    PLUGINS_LAZY = {lazy}
+
+create_app(ProbeConfig)
+seconds = time.perf_counter() - started
+# VmHWM starts over at exec, unlike ru_maxrss which keeps the parent's peak
+with open('/proc/self/status') as f:
+    peak = next(int(line.split()[1]) for line in f if line.startswith('VmHWM:'))
+print(json.dumps({{
+    'seconds': seconds,
+    'peak_rss_kb': peak,
+    'numpy': 'numpy' in sys.modules,
+    'ml_plugin': 'modules.plugins.ml_plugin' in sys.modules
+}}))
+'''
+
+def start_app(lazy):
+    result = subprocess.run([sys.executable, '-c', STARTUP_PROBE.format(lazy=lazy)], cwd=ROOT,
+                            check=True, stdout=subprocess.PIPE, text=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+@pytest.mark.skipif(not os.path.exists('/proc/self/status'), reason='needs Linux /proc')
+def test_startup_skips_plugin_imports(record_property):
+    lazy = min((start_app(True) for _ in range(3)), key=lambda run: run['seconds'])
+    eager = min((start_app(False) for _ in range(3)), key=lambda run: run['seconds'])
+    for name, value in (('lazy', lazy), ('eager', eager)):
+        record_property(f'{name}_startup_ms', round(value['seconds'] * 1000, 1))
+        record_property(f'{name}_peak_rss_kb', value['peak_rss_kb'])
+    print(f"\nstartup: lazy {lazy['seconds'] * 1000:.0f} ms / {lazy['peak_rss_kb']} KiB, "
+          f"eager {eager['seconds'] * 1000:.0f} ms / {eager['peak_rss_kb']} KiB")
+
+    assert not lazy['ml_plugin'] and not lazy['numpy']
+    assert eager['ml_plugin'] and eager['numpy']
+    # NumPy alone is several MiB of shared libraries and module objects
+    assert lazy['peak_rss_kb'] < eager['peak_rss_kb']
+
+def test_first_request_loads_the_plugin(app, client):
+    plugin = app.extensions['plugins']['ml_plugin']
+    assert not plugin.loaded
+    rules = [rule.rule for rule in app.url_map.iter_rules()]
+
+    response = client.get('/ml/predict?input=1,2,3')
+    assert response.status_code == 200
+    assert response.json['prediction'] == 6.0
+    assert plugin.loaded
+    assert client.post('/ml/predict', json={'input': [1, 1]}).json['prediction'] == 2.0
+    assert client.put('/ml/predict').status_code == 405
+
+    # The plugin's routes live in its own app; the served url_map never changes
+    assert plugin.app.url_map.bind('localhost').match('/ml/predict')[0] == 'ml_plugin.predict'
+    assert 'ml_plugin.predict' not in app.view_functions
+    assert [rule.rule for rule in app.url_map.iter_rules()] == rules
+
+def test_concurrent_first_requests_load_the_plugin_once(app):
+    plugin = app.extensions['plugins']['sample_plugin']
+    barrier = threading.Barrier(8)
+
+    def first_request():
+        barrier.wait()
+        return app.test_client().get('/sample_plugin/').data
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        bodies = list(pool.map(lambda _: first_request(), range(8)))
+    assert bodies == [b'Hello from Sample Plugin!'] * 8
+    assert list(plugin.app.blueprints) == ['sample_plugin']
+
+def test_unknown_paths_under_a_prefix(app, client):
+    assert client.get('/ml/missing').status_code == 404
+    assert app.extensions['plugins']['ml_plugin'].loaded
+    assert client.get('/ml/missing').status_code == 404
+    assert client.get('/mlx').status_code == 404
+
+@pytest.mark.parametrize('lazy', [True, False])
+def test_sample_plugin_either_way(lazy):
+    from app import create_app
+    import config
+
+    class PluginConfig(config.TestingConfig):
+        PLUGINS_LAZY = lazy
+
+    app = create_app(PluginConfig)
+    assert app.extensions['plugins']['sample_plugin'].loaded is not lazy
+    assert app.test_client().get('/sample_plugin/').data == b'Hello from Sample Plugin!'
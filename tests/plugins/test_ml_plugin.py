@@ -1,6 +1,11 @@
 # tests/plugins/test_ml_plugin.py
 
+import io
 import json
+import time
+import numpy as np
+import pytest
+from modules.ml.models.registry import ModelRegistry
 
 def test_ml_plugin_post(client):
     # Test POST request with valid input
@@ -36,3 +41,92 @@ def test_ml_plugin_get_invalid_input(client):
     assert response.status_code == 400
     data = response.get_json()
     assert 'error' in data
+
+def test_ml_plugin_batch_json(client):
+    response = client.post('/ml/predict/batch', json={'inputs': [[1, 2, 3], [4, 5, 6]]})
+    assert response.status_code == 200
+    assert response.get_json() == {'predictions': [6.0, 15.0]}
+
+def test_ml_plugin_batch_npy(client):
+    matrix = np.arange(12, dtype=np.float64).reshape(4, 3)
+    body = io.BytesIO()
+    np.save(body, matrix)
+    response = client.post('/ml/predict/batch', data=body.getvalue(), content_type='application/x-npy')
+    assert response.status_code == 200
+    assert response.mimetype == 'application/x-npy'
+    np.testing.assert_array_equal(np.load(io.BytesIO(response.data)), matrix.sum(axis=1))
+
+    # Fortran-ordered and non-float64 arrays are accepted too
+    body = io.BytesIO()
+    np.save(body, np.asfortranarray(matrix.astype(np.float32)))
+    response = client.post('/ml/predict/batch', data=body.getvalue(), content_type='application/x-npy')
+    np.testing.assert_array_equal(np.load(io.BytesIO(response.data)), matrix.sum(axis=1))
+
+def test_ml_plugin_batch_raw(client):
+    matrix = np.array([[0.5, 1.5], [2.0, -1.0], [3.0, 3.0]], dtype='<f8')
+    response = client.post('/ml/predict/batch?columns=2', data=matrix.tobytes(),
+                           content_type='application/octet-stream')
+    assert response.status_code == 200
+    np.testing.assert_array_equal(np.frombuffer(response.data, dtype='<f8'), [2.0, 1.0, 6.0])
+
+def test_ml_plugin_batch_invalid_input(client):
+    assert client.post('/ml/predict/batch', json={'inputs': [[1, 2], [3]]}).status_code == 400
+    assert client.post('/ml/predict/batch', json={'inputs': [1, 2]}).status_code == 400
+    assert client.post('/ml/predict/batch', json={'rows': []}).status_code == 400
+    assert client.post('/ml/predict/batch', data=b'\x00' * 24,
+                       content_type='application/octet-stream').status_code == 400
+    assert client.post('/ml/predict/batch?columns=2', data=b'\x00' * 24,
+                       content_type='application/octet-stream').status_code == 400
+    body = io.BytesIO()
+    np.save(body, np.array([{'a': 1}], dtype=object))
+    assert client.post('/ml/predict/batch', data=body.getvalue(),
+                       content_type='application/x-npy').status_code == 400
+
+def test_ml_plugin_batch_throughput(client):
+    # One row per call on /ml/predict against one binary batch call
+    client.get('/ml/predict?input=1,2,3,4')
+    calls = 200
+    start = time.perf_counter()
+    for _ in range(calls):
+        client.get('/ml/predict?input=1,2,3,4')
+    single_rows_per_second = calls / (time.perf_counter() - start)
+
+    matrix = np.random.default_rng(0).random((200000, 4))
+    start = time.perf_counter()
+    response = client.post('/ml/predict/batch?columns=4', data=matrix.tobytes(),
+                           content_type='application/octet-stream')
+    batch_rows_per_second = len(matrix) / (time.perf_counter() - start)
+    assert response.status_code == 200
+    assert batch_rows_per_second >= 100 * single_rows_per_second
+
+@pytest.fixture
+def registry(app, tmp_path):
+    registry = ModelRegistry(str(tmp_path))
+    app.extensions['model_registry'] = registry
+    return registry
+
+def test_predict_with_named_model(client, registry):
+    registry.publish('weighted', {'weights': np.array([1.0, 2.0, 3.0])})
+    registry.publish('weighted', {'weights': np.array([0.0, 0.0, 1.0]), 'bias': np.array(10.0)})
+
+    response = client.post('/ml/predict', json={'input': [1, 1, 1], 'model': 'weighted'})
+    assert response.json == {'prediction': 11.0, 'model': 'weighted', 'version': 2}
+    response = client.get('/ml/predict?input=1,1,1&model=weighted&version=1')
+    assert response.json == {'prediction': 6.0, 'model': 'weighted', 'version': 1}
+
+    response = client.post('/ml/predict/batch', json={'inputs': [[1, 0, 0], [0, 1, 0]], 'model': 'weighted',
+                                                      'version': 1})
+    assert response.json == {'predictions': [1.0, 2.0], 'model': 'weighted', 'version': 1}
+
+    # A new version is served without restarting the app
+    registry.publish('weighted', {'weights': np.array([5.0, 0.0, 0.0])})
+    assert client.get('/ml/predict?input=1,1,1&model=weighted').json['version'] == 3
+
+def test_predict_with_unknown_model(client, registry):
+    registry.publish('weighted', {'weights': np.array([1.0, 2.0, 3.0])})
+    assert client.get('/ml/predict?input=1,2,3&model=missing').status_code == 404
+    assert client.get('/ml/predict?input=1,2,3&model=weighted&version=9').status_code == 404
+    # Wrong number of inputs for the model
+    response = client.get('/ml/predict?input=1,2&model=weighted')
+    assert response.status_code == 400
+    assert 'expects 3 input column(s)' in response.json['error']
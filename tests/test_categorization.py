@@ -0,0 +1,170 @@
+# tests/test_categorization.py
+
+import os
+import subprocess
+import sys
+import threading
+import time
+from datetime import date
+import numpy as np
+import pytest
+from modules.models.account import Account
+from modules.ml.models.registry import ModelRegistry
+from modules.ml.training.categorizer import CentroidAccumulator
+from modules.ml.training.features import featurize, feature_count, HASH_WIDTH, AMOUNT_SCALE
+from modules.ml.utils.batching import MicroBatcher
+from modules.models.account import ACCOUNT_TYPES
+from modules.services.categorization import get_categorizer, Suggestion
+
+@pytest.fixture
+def batcher():
+    calls = []
+
+    def double(items):
+        calls.append(len(items))
+        return [item * 2 for item in items]
+
+    batcher = MicroBatcher(double, max_batch=8, max_wait=0.05)
+    batcher.calls = calls
+    yield batcher
+    batcher.close()
+
+def submit_concurrently(batcher, count):
+    results = [None] * count
+    start = threading.Barrier(count)
+
+    def call(n):
+        start.wait()
+        results[n] = batcher.submit(n).result(5)
+
+    threads = [threading.Thread(target=call, args=(n,)) for n in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+def test_concurrent_calls_share_batches(batcher):
+    assert submit_concurrently(batcher, 20) == [n * 2 for n in range(20)]
+    # 20 callers, at most 8 per call: three model calls instead of twenty
+    assert sum(batcher.calls) == 20
+    assert max(batcher.calls) == 8
+    assert len(batcher.calls) <= 4
+    assert batcher.stats()['largest_batch'] == 8
+
+def test_lone_call_waits_at_most_max_wait(batcher):
+    started = time.perf_counter()
+    assert batcher.submit(21).result(5) == 42
+    assert time.perf_counter() - started < 0.5
+    assert batcher.calls == [1]
+
+def test_handler_errors_reach_every_caller():
+    def broken(items):
+        raise RuntimeError('model crashed')
+
+    batcher = MicroBatcher(broken, max_wait=0)
+    futures = [batcher.submit(n) for n in range(3)]
+    for future in futures:
+        with pytest.raises(RuntimeError):
+            future.result(5)
+    batcher.close()
+
+@pytest.fixture
+def accounts(db):
+    accounts = [Account(name='Cash', type='Asset'), Account(name='Rent', type='Expense'),
+                Account(name='Sales', type='Revenue')]
+    db.session.add_all(accounts)
+    db.session.commit()
+    return {account.name: account.id for account in accounts}
+
+@pytest.fixture
+def registry(app, tmp_path):
+    registry = ModelRegistry(str(tmp_path))
+    app.extensions['model_registry'] = registry
+    return registry
+
+def publish_categorizer(registry, examples):
+    """A categorizer trained on (description, amount, debit_id, credit_id, debit_type, credit_type) examples."""
+    accumulator = CentroidAccumulator(feature_count())
+    type_index = {name: index for index, name in enumerate(ACCOUNT_TYPES)}
+    for description, amount, debit, credit, debit_type, credit_type in examples:
+        features = featurize([description], [amount], [date(2024, 1, 1).toordinal()],
+                             [type_index[debit_type]], [type_index[credit_type]])
+        accumulator.add(np.array([[debit, credit]]), features.astype(np.float64), np.array([1]))
+    metadata = {'task': 'account_pair', 'features': {'hash_width': HASH_WIDTH, 'amount_scale': AMOUNT_SCALE,
+                                                     'account_types': ACCOUNT_TYPES}}
+    return registry.publish('categorizer', accumulator.model_arrays(), metadata)
+
+def test_suggest_with_and_without_a_model(app, accounts, registry):
+    categorizer = get_categorizer()
+    assert categorizer.suggest('Office rent', 900.0, date(2024, 3, 1)) is None
+    assert categorizer.stats()['unavailable'] == 1
+
+    version = publish_categorizer(registry, [
+        ('Office rent', 900.0, accounts['Rent'], accounts['Cash'], 'Expense', 'Asset'),
+        ('Customer invoice', 250.0, accounts['Cash'], accounts['Sales'], 'Asset', 'Revenue')
+    ])
+    assert categorizer.suggest('Rent for office', 950.0, date(2024, 4, 1)) == \
+        Suggestion(accounts['Rent'], accounts['Cash'], version)
+    assert categorizer.stats()['suggested'] == 1
+
+def test_slow_model_falls_back(app, accounts, registry):
+    categorizer = get_categorizer()
+    categorizer.timeout = 0.05
+    release = threading.Event()
+    categorizer.batcher.handler = lambda items: release.wait(5) and []
+    started = time.perf_counter()
+    assert categorizer.suggest('Office rent', 900.0, date(2024, 3, 1)) is None
+    assert time.perf_counter() - started < 1
+    assert categorizer.stats()['timeouts'] == 1
+    release.set()
+
+def test_disabled(app, accounts, registry):
+    categorizer = get_categorizer()
+    categorizer.enabled = False
+    assert categorizer.submit('Office rent', 900.0, date(2024, 3, 1)) is None
+    assert categorizer.batcher.stats()['items'] == 0
+
+def login(client, test_user):
+    client.post('/auth/login', data={'username': test_user.username, 'password': 'testpass'})
+
+def test_new_transaction_view_flashes_a_different_suggestion(client, test_user, accounts, registry):
+    publish_categorizer(registry, [('Office rent', 900.0, accounts['Rent'], accounts['Cash'], 'Expense', 'Asset')])
+    login(client, test_user)
+    response = client.post('/transactions/new', data={
+        'date': '2024-03-01', 'amount': '900', 'description': 'Office rent',
+        'debit_account': accounts['Sales'], 'credit_account': accounts['Cash'], 'submit': 'Create Transaction'
+    }, follow_redirects=True)
+    assert b'Transaction created successfully.' in response.data
+    assert b'usually booked to debit Rent and credit Cash' in response.data
+
+    response = client.post('/transactions/new', data={
+        'date': '2024-03-01', 'amount': '900', 'description': 'Office rent',
+        'debit_account': accounts['Rent'], 'credit_account': accounts['Cash'], 'submit': 'Create Transaction'
+    }, follow_redirects=True)
+    assert b'usually booked' not in response.data
+
+# Posts a transaction in a fresh interpreter with no model published
+NO_MODEL_PROBE = '''
+import sys, tempfile
+import config
+from app import create_app
+
+class ProbeConfig(config.TestingConfig):
+    ML_MODELS_DIR = tempfile.mkdtemp()
+
+app = create_app(ProbeConfig)
+with app.app_context():
+    from datetime import date
+    from modules.database.db import db
+    from modules.services.categorization import get_categorizer
+    db.create_all()
+    assert get_categorizer().suggest('Office rent', 900.0, date(2024, 3, 1)) is None
+print('numpy' in sys.modules)
+'''
+
+def test_no_model_does_not_load_numpy():
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    result = subprocess.run([sys.executable, '-c', NO_MODEL_PROBE], cwd=root, check=True,
+                            stdout=subprocess.PIPE, text=True)
+    assert result.stdout.strip().splitlines()[-1] == 'False'
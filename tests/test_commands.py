@@ -0,0 +1,76 @@
+# tests/test_commands.py
+
+from datetime import date
+import pytest
+from modules.database.db import db as _db
+from modules.models.account import Account
+from modules.models.account_balance import AccountBalance
+from modules.models.transaction import Transaction
+from modules.services import balances
+
+def add_ledger(db):
+    cash = Account(name='Cash_Cmd', type='Asset')
+    sales = Account(name='Sales_Cmd', type='Revenue')
+    db.session.add_all([cash, sales])
+    db.session.commit()
+    db.session.add_all([
+        Transaction(date=date(2024, 1, 1), amount=60.0, description='Sale 1',
+                    debit_account_id=cash.id, credit_account_id=sales.id),
+        Transaction(date=date(2024, 1, 2), amount=40.0, description='Sale 2',
+                    debit_account_id=cash.id, credit_account_id=sales.id)
+    ])
+    db.session.commit()
+    return cash, sales
+
+def test_balances_check_detects_drift(app, db):
+    add_ledger(db)  # Inserted directly, so the balances table was never updated
+    runner = app.test_cli_runner()
+    result = runner.invoke(args=['balances', 'check'])
+    assert result.exit_code != 0
+    assert 'drifted' in result.output
+
+def test_balances_rebuild(app, db):
+    cash, sales = add_ledger(db)
+    runner = app.test_cli_runner()
+    result = runner.invoke(args=['balances', 'rebuild'])
+    assert result.exit_code == 0
+    assert '2 drifted account(s) corrected' in result.output
+    assert db.session.get(AccountBalance, cash.id).debit_total == 100.0
+    assert db.session.get(AccountBalance, sales.id).credit_total == 100.0
+    assert balances.find_drift() == []
+
+    result = runner.invoke(args=['balances', 'check'])
+    assert result.exit_code == 0
+    assert 'match the ledger' in result.output
+
+@pytest.fixture
+def production_app(tmp_path):
+    from app import create_app
+    from config import ProductionConfig
+
+    class FileProductionConfig(ProductionConfig):
+        TESTING = True
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'app.db'}"
+
+    app = create_app(FileProductionConfig)
+    with app.app_context():
+        _db.create_all()
+        yield app
+        _db.session.remove()
+        _db.engine.dispose()
+
+def test_sqlite_status_reports_production_pragmas(production_app):
+    runner = production_app.test_cli_runner()
+    result = runner.invoke(args=['sqlite', 'status'])
+    assert result.exit_code == 0
+    assert 'journal_mode: wal' in result.output
+    assert 'synchronous: 1' in result.output  # NORMAL
+    assert 'busy_timeout: 5000' in result.output
+    assert f'mmap_size: {256 * 1024 * 1024}' in result.output
+
+def test_sqlite_checkpoint(production_app):
+    add_ledger(_db)
+    runner = production_app.test_cli_runner()
+    result = runner.invoke(args=['sqlite', 'checkpoint', '--mode', 'truncate'])
+    assert result.exit_code == 0
+    assert 'Checkpoint TRUNCATE' in result.output
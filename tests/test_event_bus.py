@@ -0,0 +1,91 @@
+# tests/test_event_bus.py
+
+import threading
+import time
+import pytest
+from modules.services.event_bus import EventBus, CREATED, DROP_OLDEST, DROP_NEWEST, BLOCK
+
+@pytest.fixture
+def bus(app):
+    bus = EventBus(app, max_workers=2, max_queue=100, batch_size=10, batch_wait=0.01)
+    yield bus
+    bus.shutdown(wait=False)
+
+def changes(count, start=1):
+    return [('transaction', CREATED, n, {'id': n}) for n in range(start, start + count)]
+
+def test_micro_batches_in_commit_order(bus):
+    batches = []
+    bus.subscribe('recorder', batches.append)
+    bus.publish(changes(25))
+    assert bus.flush(5)
+    assert [e.id for batch in batches for e in batch] == list(range(1, 26))
+    assert max(len(batch) for batch in batches) == 10
+    assert len(batches) == 3
+
+def test_filters(bus):
+    seen = []
+    bus.subscribe('accounts', seen.extend, entities=['account'])
+    bus.publish(changes(3) + [('account', 'deleted', 7, {'id': 7})])
+    assert bus.flush(5)
+    assert [(e.entity, e.action, e.id) for e in seen] == [('account', 'deleted', 7)]
+
+@pytest.mark.parametrize('policy, kept', [(DROP_OLDEST, list(range(11, 16))), (DROP_NEWEST, list(range(1, 6)))])
+def test_full_queue_drop_policies(bus, policy, kept):
+    release = threading.Event()
+    seen = []
+
+    def slow(batch):
+        release.wait(5)
+        seen.extend(e.id for e in batch)
+
+    subscription = bus.subscribe('slow', slow, policy=policy, max_queue=5, batch_size=1)
+    bus.publish(changes(1, start=0))
+    time.sleep(0.05)  # The first event is now being handled and blocks the subscriber
+    bus.publish(changes(15))
+    stats = bus.stats()[0]
+    assert stats['queued'] == 5
+    assert stats['dropped'] == 10
+    assert stats['lag_events'] == 16
+    assert stats['lag_seconds'] >= 0
+    release.set()
+    assert bus.flush(5)
+    assert seen == [0] + kept
+    assert subscription.delivered == 6
+    assert bus.stats()[0]['lag_events'] == 0
+
+def test_block_policy_waits_for_room(bus):
+    seen = []
+
+    def slowish(batch):
+        time.sleep(0.02)
+        seen.extend(e.id for e in batch)
+
+    bus.block_timeout = 5
+    bus.subscribe('careful', slowish, policy=BLOCK, max_queue=2, batch_size=1)
+    bus.publish(changes(6))
+    assert bus.flush(5)
+    assert seen == list(range(1, 7))
+    assert bus.stats()[0]['dropped'] == 0
+
+def test_failing_subscriber_does_not_stop_others(bus):
+    seen = []
+
+    def broken(batch):
+        raise RuntimeError('boom')
+
+    bus.subscribe('broken', broken)
+    bus.subscribe('working', seen.extend)
+    bus.publish(changes(3))
+    assert bus.flush(5)
+    stats = {s['name']: s for s in bus.stats()}
+    assert stats['broken']['failed_batches'] == 1
+    assert stats['working']['failed_batches'] == 0
+    assert len(seen) == 3
+
+def test_duplicate_and_unknown(bus):
+    bus.subscribe('once', print)
+    with pytest.raises(ValueError):
+        bus.subscribe('once', print)
+    with pytest.raises(ValueError):
+        bus.subscribe('other', print, policy='sometimes')
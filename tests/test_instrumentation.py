@@ -0,0 +1,111 @@
+# tests/test_instrumentation.py
+
+import re
+from datetime import date
+import pytest
+from werkzeug.security import generate_password_hash
+from modules.database.db import db as _db
+from modules.models.account import Account
+from modules.models.transaction import Transaction
+from modules.models.user import User
+from modules.services.instrumentation import Histogram
+
+@pytest.fixture
+def instrumented_app():
+    from app import create_app
+    from config import TestingConfig
+
+    class InstrumentedConfig(TestingConfig):
+        TESTING = True
+        INSTRUMENTATION_ENABLED = True
+        METRICS_TOKEN = 'scrape-token'
+
+    app = create_app(InstrumentedConfig)
+    with app.app_context():
+        _db.create_all()
+        cash = Account(name='Cash', type='Asset')
+        sales = Account(name='Sales', type='Revenue')
+        _db.session.add_all([
+            User(username='testuser', password_hash=generate_password_hash('testpass'), role='User'),
+            User(username='admin', password_hash=generate_password_hash('testpass'), role='Admin'),
+            cash, sales
+        ])
+        _db.session.commit()
+        _db.session.add_all([
+            Transaction(date=date(2024, 1, day), amount=day, description=f'Sale {day}',
+                        debit_account_id=cash.id, credit_account_id=sales.id)
+            for day in range(1, 6)
+        ])
+        _db.session.commit()
+        yield app
+        _db.session.remove()
+        _db.drop_all()
+
+def server_timing(response):
+    return {name: dict(re.findall(r';(\w+)=("[^"]*"|[^;,]+)', rest))
+            for name, rest in re.findall(r'(\w+)((?:;\w+=(?:"[^"]*"|[^;,]*))*)',
+                                         response.headers['Server-Timing'])}
+
+def test_server_timing_header(instrumented_app):
+    client = instrumented_app.test_client()
+    client.post('/api/auth/login', json={'username': 'testuser', 'password': 'testpass'})
+    response = client.get('/api/transactions/')
+    assert response.status_code == 200
+    timing = server_timing(response)
+    assert set(timing) == {'db', 'serialize', 'handler'}
+    queries, rows = map(int, re.match(r'"(\d+) queries, (\d+) rows"', timing['db']['desc']).groups())
+    assert queries >= 1
+    assert rows >= 5
+    assert float(timing['handler']['dur']) >= float(timing['db']['dur'])
+    assert float(timing['serialize']['dur']) > 0
+
+    # Template rendering counts as serialization for the HTML views
+    view = client.get('/accounts/')
+    assert float(server_timing(view)['serialize']['dur']) > 0
+
+def test_metrics_endpoint(instrumented_app):
+    client = instrumented_app.test_client()
+    client.post('/api/auth/login', json={'username': 'testuser', 'password': 'testpass'})
+    client.get('/api/accounts/')
+    client.get('/api/accounts/')
+    client.post('/api/auth/logout')
+    client.post('/api/auth/login', json={'username': 'admin', 'password': 'testpass'})
+    metrics = client.get('/metrics')
+    assert metrics.status_code == 200
+    assert metrics.mimetype == 'text/plain'
+    text = metrics.get_data(as_text=True)
+    assert '# TYPE bookkeeping_request_duration_seconds histogram' in text
+    labels = 'endpoint="api.accounts_account_list",method="GET"'
+    assert f'bookkeeping_request_queries_count{{{labels}}} 2' in text
+    assert f'bookkeeping_request_duration_seconds_bucket{{{labels},le="+Inf"}} 2' in text
+    assert f'bookkeeping_request_rows_sum{{{labels}}}' in text
+
+def test_metrics_need_admin_or_token(instrumented_app):
+    client = instrumented_app.test_client()
+    assert client.get('/metrics').status_code == 403
+    assert client.get('/metrics', headers={'Authorization': 'Bearer wrong'}).status_code == 403
+    client.post('/api/auth/login', json={'username': 'testuser', 'password': 'testpass'})
+    assert client.get('/metrics').status_code == 403
+
+    scraper = instrumented_app.test_client()
+    assert scraper.get('/metrics', headers={'Authorization': 'Bearer scrape-token'}).status_code == 200
+
+def test_disabled_by_default(app, client, test_user):
+    client.post('/api/auth/login', json={'username': 'testuser', 'password': 'testpass'})
+    response = client.get('/api/accounts/')
+    assert response.status_code == 200
+    assert 'Server-Timing' not in response.headers
+    assert client.get('/metrics').status_code == 404
+    assert 'request_metrics' not in app.extensions
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram('test_seconds', 'Test', (0.1, 1.0))
+    labels = (('endpoint', 'x'),)
+    for value in (0.05, 0.1, 0.5, 2.0):
+        histogram.observe(labels, value)
+    text = histogram.render()
+    assert 'test_seconds_bucket{endpoint="x",le="0.1"} 2' in text
+    assert 'test_seconds_bucket{endpoint="x",le="1.0"} 3' in text
+    assert 'test_seconds_bucket{endpoint="x",le="+Inf"} 4' in text
+    assert 'test_seconds_sum{endpoint="x"} 2.65' in text
+    assert 'test_seconds_count{endpoint="x"} 4' in text
@@ -0,0 +1,98 @@
+# tests/test_ledger_cache.py
+
+from datetime import date
+from types import SimpleNamespace
+from modules.models.account import Account
+from modules.models.transaction import Transaction
+from modules.services import ledger_version
+from modules.services.ledger_cache import LedgerCache
+
+def add_ledger(db):
+    cash = Account(name='Cash_Cache', type='Asset')
+    sales = Account(name='Sales_Cache', type='Revenue')
+    db.session.add_all([cash, sales])
+    db.session.commit()
+    transactions = [
+        Transaction(date=date(2024, month, 1), amount=10.0 * month, description=f'Cache {month}',
+                    debit_account_id=cash.id, credit_account_id=sales.id)
+        for month in range(1, 4)
+    ]
+    db.session.add_all(transactions)
+    ledger_version.bump()
+    db.session.commit()
+    return cash, sales, transactions
+
+def commit_write(db):
+    """Commit like the write paths do: one ledger version bump per commit."""
+    ledger_version.bump()
+    db.session.commit()
+
+def test_cache_loads_once_and_aggregates(app, db):
+    cash, sales, _ = add_ledger(db)
+    cache = LedgerCache()
+    assert cache.account_totals() == {cash.id: (60.0, 0.0), sales.id: (0.0, 60.0)}
+    assert cache.period_totals('month') == [('2024-01', 10.0, 1), ('2024-02', 20.0, 1), ('2024-03', 30.0, 1)]
+    assert cache.period_totals('year', date_from=date(2024, 2, 1)) == [('2024', 50.0, 2)]
+    assert cache.flows() == [(cash.id, sales.id, 60.0, 3)]
+    assert cache.loads == 1
+    assert cache.stats()['rows'] == 3
+
+def test_cache_applies_writes_without_reloading(app, db):
+    cash, sales, transactions = add_ledger(db)
+    cache = LedgerCache()
+    cache.account_totals()
+
+    commit_write(db)
+    cache.record_insert(SimpleNamespace(id=transactions[-1].id + 1, date=date(2024, 4, 1), amount=5.0,
+                                        debit_account_id=sales.id, credit_account_id=cash.id))
+    transactions[0].amount = 15.0
+    commit_write(db)
+    cache.record_update(transactions[0])
+    commit_write(db)
+    cache.record_delete(transactions[1].id)
+
+    assert cache.account_totals() == {cash.id: (45.0, 5.0), sales.id: (5.0, 45.0)}
+    assert cache.loads == 1
+
+def test_cache_rebuilds_when_invalidated(app, db):
+    cash, _, _ = add_ledger(db)
+    cache = LedgerCache()
+    cache.account_totals()
+    db.session.add(Transaction(date=date(2024, 5, 1), amount=1.0, description='Outside the write paths',
+                               debit_account_id=cash.id, credit_account_id=cash.id))
+    db.session.commit()
+    cache.invalidate()
+    assert cache.account_totals()[cash.id] == (61.0, 1.0)
+    assert cache.loads == 2
+
+def test_cache_rebuilds_after_writes_elsewhere(app, db):
+    cash, sales, transactions = add_ledger(db)
+    cache = LedgerCache()
+    cache.account_totals()
+    # Another worker's write: committed with a version bump, never recorded here
+    db.session.add(Transaction(date=date(2024, 5, 1), amount=1.0, description='Other worker',
+                               debit_account_id=cash.id, credit_account_id=sales.id))
+    commit_write(db)
+    assert cache.account_totals()[cash.id] == (61.0, 0.0)
+    assert cache.loads == 2
+
+    # A recorded write that follows another one cannot be applied in place
+    db.session.delete(transactions[0])
+    commit_write(db)
+    db.session.delete(transactions[1])
+    commit_write(db)
+    cache.record_delete(transactions[1].id)
+    assert cache.account_totals()[cash.id] == (31.0, 0.0)
+    assert cache.loads == 3
+
+def test_cache_respects_memory_budget(app, db):
+    add_ledger(db)
+    cache = LedgerCache(max_bytes=64)
+    assert cache.account_totals() is None
+    assert cache.stats()['over_budget'] is True
+
+def test_cache_can_be_disabled(app, db):
+    add_ledger(db)
+    cache = LedgerCache(enabled=False)
+    assert cache.flows() is None
+    assert cache.loads == 0
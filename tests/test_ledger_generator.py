@@ -0,0 +1,77 @@
+# tests/test_ledger_generator.py
+
+from datetime import date
+import pytest
+from modules.models.account import Account, ACCOUNT_TYPES
+from modules.models.transaction import Transaction
+from modules.services import balances, ledger_version
+from modules.services.ledger_generator import generate_ledger
+
+def ledger_rows(db):
+    return db.session.execute(db.select(
+        Transaction.date, Transaction.amount, Transaction.description,
+        Transaction.debit_account_id, Transaction.credit_account_id
+    ).order_by(Transaction.id)).all()
+
+def test_generated_ledger_is_deterministic(app, db):
+    generate_ledger(2000, accounts=10, seed=7)
+    first = ledger_rows(db)
+    db.session.execute(db.delete(Transaction))
+    db.session.commit()
+    generate_ledger(2000, accounts=10, seed=7)
+    assert ledger_rows(db) == first
+    db.session.execute(db.delete(Transaction))
+    db.session.commit()
+    generate_ledger(2000, accounts=10, seed=8)
+    assert ledger_rows(db) != first
+
+def test_generated_ledger_blocks(app, db, monkeypatch):
+    from modules.services import ledger_generator
+    monkeypatch.setattr(ledger_generator, 'BLOCK_SIZE', 400)
+    progress = []
+    generate_ledger(1000, seed=3, progress=lambda done, total: progress.append(done))
+    assert progress == [400, 800, 1000]
+    # A longer run with the same seed repeats every full block
+    first = ledger_rows(db)
+    db.session.execute(db.delete(Transaction))
+    db.session.commit()
+    generate_ledger(1200, seed=3)
+    assert ledger_rows(db)[:800] == first[:800]
+
+def test_generated_ledger_shape(app, db):
+    generate_ledger(5000, accounts=12, seed=1, start=date(2023, 1, 1), end=date(2023, 3, 31),
+                    date_distribution='weekdays', amount_median=50.0, amount_skew=0.5,
+                    vocabulary=['alpha', 'beta'])
+    assert db.session.query(Account).count() == 12
+    assert {account.type for account in Account.query.all()} == set(ACCOUNT_TYPES)
+
+    rows = ledger_rows(db)
+    assert len(rows) == 5000
+    assert min(row.date for row in rows) >= date(2023, 1, 1)
+    assert max(row.date for row in rows) <= date(2023, 3, 31)
+    weekend = sum(1 for row in rows if row.date.weekday() >= 5)
+    assert weekend < len(rows) * 0.15
+    assert all(row.amount >= 0.01 for row in rows)
+    assert {row.description.split(' ')[1] for row in rows} == {'alpha', 'beta'}
+    assert all(row.debit_account_id != row.credit_account_id for row in rows)
+
+    # Balances were rebuilt and the ledger balances
+    assert balances.find_drift() == []
+    report = balances.ledger_totals_query()
+    debit = sum(row.debit_total for row in db.session.execute(report))
+    credit = sum(row.credit_total for row in db.session.execute(report))
+    assert debit == pytest.approx(credit)
+    assert ledger_version.current() == 1
+
+def test_generator_reuses_accounts_and_keeps_indexes(app, db):
+    generate_ledger(100, accounts=5)
+    generate_ledger(100, accounts=5, seed=1)
+    assert db.session.query(Account).count() == 5
+    names = {index['name'] for index in db.inspect(db.engine).get_indexes('transactions')}
+    assert {index.name for index in Transaction.__table__.indexes} <= names
+
+def test_generator_rejects_bad_arguments(app, db):
+    with pytest.raises(ValueError):
+        generate_ledger(10, accounts=3)
+    with pytest.raises(ValueError):
+        generate_ledger(10, date_distribution='lunar')
@@ -0,0 +1,78 @@
+# tests/test_model_registry.py
+
+import numpy as np
+import pytest
+from modules.ml.models.registry import ModelRegistry, ModelNotFound
+
+@pytest.fixture
+def registry(tmp_path):
+    return ModelRegistry(str(tmp_path), max_bytes=None)
+
+def test_publish_and_load_memory_mapped(registry):
+    weights = np.array([[1.0, 0.0], [0.0, 2.0], [1.0, 1.0]])
+    version = registry.publish('scorer', {'weights': weights, 'bias': np.array([0.5, -0.5])},
+                               {'trained_rows': 3})
+    assert version == 1
+    model = registry.get('scorer')
+    assert model.version == 1
+    assert isinstance(model.arrays['weights'], np.memmap)
+    assert not model.arrays['weights'].flags.writeable
+    assert model.metadata['trained_rows'] == 3
+    assert model.predict(np.array([[1.0, 1.0, 1.0]])).tolist() == [[2.5, 2.5]]
+    with pytest.raises(ValueError):
+        model.predict(np.ones((1, 2)))
+
+    # Loaded once per process
+    assert registry.get('scorer', 1) is model
+    assert registry.stats()['loads'] == 1
+
+def test_versions_and_hot_swap_across_processes(registry, tmp_path):
+    registry.publish('scorer', {'weights': np.array([1.0, 1.0])})
+    assert registry.get('scorer').predict(np.array([[1.0, 2.0]])).tolist() == [3.0]
+
+    # Another worker publishes a new version; this one switches on its next lookup
+    other_worker = ModelRegistry(str(tmp_path))
+    assert other_worker.publish('scorer', {'weights': np.array([2.0, 2.0])}) == 2
+    assert registry.get('scorer').version == 2
+    assert registry.get('scorer').predict(np.array([[1.0, 2.0]])).tolist() == [6.0]
+
+    # Rolling back is activating the older version
+    other_worker.activate('scorer', 1)
+    assert registry.get('scorer').version == 1
+    assert registry.get('scorer', 2).version == 2
+    assert registry.versions('scorer') == [1, 2]
+    assert registry.models() == ['scorer']
+
+    # Publishing without activating leaves the current version alone
+    assert registry.publish('scorer', {'weights': np.array([3.0, 3.0])}, activate=False) == 3
+    assert registry.get('scorer').version == 1
+
+def test_lru_residency_bounded_by_bytes(tmp_path):
+    registry = ModelRegistry(str(tmp_path), max_bytes=2 * 800)
+    for name in ('a', 'b', 'c'):
+        registry.publish(name, {'weights': np.zeros(100)})  # 800 bytes each
+    registry.get('a')
+    registry.get('b')
+    registry.get('a')  # b is now the least recently used
+    registry.get('c')
+    stats = registry.stats()
+    assert stats['resident'] == ['a/1', 'c/1']
+    assert stats['bytes'] == 1600
+    assert stats['evictions'] == 1
+
+    # A model larger than the limit is still served, alone
+    registry.publish('big', {'weights': np.zeros(1000)})
+    registry.get('big')
+    assert registry.stats()['resident'] == ['big/1']
+
+def test_unknown_models(registry):
+    with pytest.raises(ModelNotFound):
+        registry.get('missing')
+    registry.publish('scorer', {'weights': np.ones(2)})
+    for version in (7, 'latest'):
+        with pytest.raises(ModelNotFound):
+            registry.get('scorer', version)
+    with pytest.raises(ModelNotFound):
+        registry.get('../scorer')
+    with pytest.raises(ValueError):
+        registry.publish('scorer', {'bias': np.ones(2)})
@@ -0,0 +1,93 @@
+# tests/test_query_budget.py
+
+import logging
+from datetime import date
+import pytest
+from sqlalchemy.orm import selectinload
+from modules.models.account import Account
+from modules.models.transaction import Transaction
+from modules.services.query_budget import (QueryBudgetExceeded, query_budget as declare_budget,
+                                           statement_shape)
+
+@pytest.fixture
+def ledger(db):
+    accounts = [Account(name=f'Account {n}', type='Asset') for n in range(12)]
+    db.session.add_all(accounts)
+    db.session.commit()
+    db.session.add_all([
+        Transaction(date=date(2024, 1, n + 1), amount=10.0, description=f'Entry {n}',
+                    debit_account_id=accounts[2 * n].id, credit_account_id=accounts[2 * n + 1].id)
+        for n in range(6)
+    ])
+    db.session.commit()
+
+def login(client, test_user):
+    client.post('/api/auth/login', json={
+        'username': test_user.username,
+        'password': 'testpass'
+    })
+
+def test_statement_shape():
+    assert statement_shape('SELECT * FROM accounts\n WHERE id = ?') == 'SELECT * FROM accounts WHERE id = ?'
+    assert statement_shape("SELECT 1 FROM t WHERE name = 'x' AND id IN (?, ?, ?)") == \
+        'SELECT ? FROM t WHERE name = ? AND id IN (?)'
+
+def test_lazy_relationships_are_caught(db, ledger, query_budget):
+    # Start from an empty identity map so relationships have to be loaded
+    db.session.expunge_all()
+    transactions = db.session.execute(db.select(Transaction)).scalars().all()
+    with pytest.raises(QueryBudgetExceeded, match='executions of the same statement'):
+        with query_budget(max_repeats=3):
+            [(t.debit_account.name, t.credit_account.name) for t in transactions]
+
+def test_eager_loading_fits_the_budget(db, ledger, query_budget):
+    db.session.expunge_all()
+    # One IN query per relationship, whatever the number of transactions
+    with query_budget(max_queries=3, max_repeats=2) as recorder:
+        transactions = db.session.execute(db.select(Transaction).options(
+            selectinload(Transaction.debit_account), selectinload(Transaction.credit_account))).scalars().all()
+        names = [(t.debit_account.name, t.credit_account.name) for t in transactions]
+    assert len(names) == 6
+    assert recorder.count == 3
+
+def test_request_over_its_budget_fails(app, client, test_user):
+    @app.route('/test/over-budget')
+    @declare_budget(max_queries=2)
+    def over_budget():
+        for n in range(3):
+            Account.query.filter_by(name=f'Missing {n}').first()
+        return 'ok'
+
+    with pytest.raises(QueryBudgetExceeded, match=r'3 queries, budget 2'):
+        client.get('/test/over-budget')
+
+def test_declared_budgets_hold(client, test_user, ledger, query_budget):
+    login(client, test_user)
+    with query_budget(max_queries=3):
+        assert client.get('/api/transactions/').status_code == 200
+    with query_budget(max_queries=3):
+        assert client.get('/api/accounts/').status_code == 200
+
+def test_warn_mode_logs(tmp_path, caplog):
+    from app import create_app
+    from config import TestingConfig
+
+    class StagingConfig(TestingConfig):
+        QUERY_BUDGET_MODE = 'warn'
+        QUERY_BUDGET_MAX_REPEATS = 1
+
+    app = create_app(StagingConfig)
+
+    @app.route('/test/repeats')
+    def repeats():
+        for n in range(2):
+            Account.query.filter_by(name=f'Missing {n}').first()
+        return 'ok'
+
+    with app.app_context():
+        from modules.database.db import db
+        db.create_all()
+        with caplog.at_level(logging.WARNING):
+            assert app.test_client().get('/test/repeats').status_code == 200
+        db.drop_all()
+    assert 'Query budget exceeded: GET /test/repeats (repeats): 2 executions' in caplog.text
@@ -0,0 +1,120 @@
+# tests/test_query_plans.py
+
+import re
+from contextlib import contextmanager
+from datetime import date
+import pytest
+from sqlalchemy import event
+from modules.models.account import Account
+from modules.models.transaction import Transaction
+from modules.services.pagination import encode_cursor
+
+# A plan step that walks the whole transactions table or one of its indexes;
+# SQLite before 3.36 writes "SCAN TABLE transactions"
+FULL_SCAN = re.compile(r'^SCAN (TABLE )?transactions\b')
+
+# Reading every row is the point of a whole-ledger aggregate: its GROUP BY
+# statements may walk a covering index, but not the table
+COVERING_SCAN = re.compile(r'^SCAN (TABLE )?transactions USING COVERING INDEX ')
+
+# The first page of the unfiltered list walks the keyset index in order and
+# stops after LIMIT rows
+FIRST_PAGE_SCAN = 'SCAN transactions USING INDEX ix_transactions_date_id'
+
+@pytest.fixture
+def ledger(db, test_user):
+    cash = Account(name='Cash_Plan', type='Asset')
+    sales = Account(name='Sales_Plan', type='Revenue')
+    db.session.add_all([cash, sales])
+    db.session.commit()
+    db.session.add_all([
+        Transaction(date=date(2024, 1, day), amount=float(day), description=f'Plan {day}',
+                    debit_account_id=cash.id, credit_account_id=sales.id)
+        for day in range(1, 6)
+    ])
+    db.session.commit()
+    return cash, sales
+
+def login(client, test_user):
+    client.post('/api/auth/login', json={
+        'username': test_user.username,
+        'password': 'testpass'
+    })
+
+@contextmanager
+def captured_selects(db):
+    """Collect every SELECT statement, with its parameters, sent to the database."""
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith(('SELECT', 'WITH')) and not executemany:
+            statements.append((statement, parameters))
+
+    event.listen(db.engine, 'before_cursor_execute', capture)
+    try:
+        yield statements
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', capture)
+
+def query_plan(db, statement, parameters):
+    rows = db.session.connection().exec_driver_sql(f'EXPLAIN QUERY PLAN {statement}', parameters)
+    return [row[3] for row in rows]
+
+def allowed_scan(step, statement, aggregate):
+    if aggregate and 'GROUP BY' in statement:
+        return bool(COVERING_SCAN.match(step))
+    return step == FIRST_PAGE_SCAN and ' WHERE ' not in statement and ' LIMIT ' in statement
+
+def assert_no_full_scans(client, db, method, url, aggregate=False, **kwargs):
+    with captured_selects(db) as statements:
+        response = client.open(url, method=method, **kwargs)
+    assert response.status_code < 400, response.data
+    assert statements, f'{method} {url} issued no queries'
+    for statement, parameters in statements:
+        plan = query_plan(db, statement, parameters)
+        scans = [step for step in plan if FULL_SCAN.match(step) and not allowed_scan(step, statement, aggregate)]
+        assert not scans, f'{method} {url} scans transactions:\n{statement}\n{plan}'
+        # An amount range is searched on its own index and only its matches are sorted
+        if 'FROM transactions' in statement and 'ORDER BY transactions.date, transactions.id' in statement \
+                and 'transactions.amount >=' not in statement:
+            assert not any('TEMP B-TREE FOR ORDER BY' in step for step in plan), \
+                f'{method} {url} sorts the transaction list:\n{statement}\n{plan}'
+    return response
+
+@pytest.mark.parametrize('query', [
+    '',
+    '?limit=2',
+    f'?after={encode_cursor(date(2024, 1, 2), 2)}',
+    '?date_from=2024-01-02&date_to=2024-01-04',
+    '?amount_min=2&amount_max=4',
+])
+def test_transaction_list_plans(client, db, test_user, ledger, query):
+    login(client, test_user)
+    assert_no_full_scans(client, db, 'GET', f'/api/transactions/{query}')
+
+def test_transaction_list_by_account_plans(client, db, test_user, ledger):
+    cash, sales = ledger
+    login(client, test_user)
+    assert_no_full_scans(client, db, 'GET', f'/api/transactions/?debit_account_id={cash.id}')
+    assert_no_full_scans(client, db, 'GET', f'/api/transactions/?credit_account_id={sales.id}&date_from=2024-01-03')
+    cursor = encode_cursor(date(2024, 1, 2), 2)
+    assert_no_full_scans(client, db, 'GET', f'/api/transactions/?debit_account_id={cash.id}&after={cursor}')
+
+def test_transaction_resource_plans(client, db, test_user, ledger):
+    login(client, test_user)
+    assert_no_full_scans(client, db, 'GET', '/api/transactions/1')
+    assert_no_full_scans(client, db, 'PUT', '/api/transactions/1', json={'amount': 9.0})
+    assert_no_full_scans(client, db, 'DELETE', '/api/transactions/1')
+
+def test_account_and_report_plans(app, client, db, test_user, ledger):
+    cash, _ = ledger
+    login(client, test_user)
+    assert_no_full_scans(client, db, 'GET', f'/api/accounts/{cash.id}/balance')
+    # The plans of the SQL fallback; building the ledger cache reads every row by design
+    app.extensions['ledger_cache'].enabled = False
+    assert_no_full_scans(client, db, 'GET', '/api/reports/trial-balance', aggregate=True)
+    # Every account's balance up to a date is still an aggregate over the ledger
+    assert_no_full_scans(client, db, 'GET', '/api/reports/trial-balance?as_of=2024-01-03', aggregate=True)
+    # Opening balances sum every earlier transaction; the lines themselves are searched
+    assert_no_full_scans(client, db, 'GET', '/api/reports/general-ledger?date_from=2024-01-02&date_to=2024-01-04',
+                         aggregate=True)
@@ -0,0 +1,122 @@
+# tests/test_read_routing.py
+
+import threading
+import time
+from datetime import date
+import pytest
+from sqlalchemy import event
+from sqlalchemy.exc import OperationalError
+from werkzeug.security import generate_password_hash
+from modules.database.db import db as _db
+from modules.database.routing import read_only
+from modules.models.account import Account
+from modules.models.transaction import Transaction
+from modules.models.user import User
+from modules.services import balances
+
+@pytest.fixture
+def routed_app(tmp_path):
+    from app import create_app
+    from config import ProductionConfig
+
+    class RoutedConfig(ProductionConfig):
+        TESTING = True
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'app.db'}"
+        LEDGER_CACHE_ENABLED = False
+
+    app = create_app(RoutedConfig)
+    with app.app_context():
+        _db.create_all()
+        _db.session.add_all([
+            User(username='reader', password_hash=generate_password_hash('testpass'), role='User'),
+            Account(name='Cash', type='Asset'),
+            Account(name='Sales', type='Revenue')
+        ])
+        _db.session.commit()
+        yield app
+        _db.session.remove()
+        _db.engine.dispose()
+        app.extensions['read_engine'].dispose()
+
+def count_statements(engine):
+    statements = []
+    event.listen(engine, 'before_cursor_execute',
+                 lambda conn, cursor, statement, *args: statements.append(statement))
+    return statements
+
+def bulk_insert(app, rows, inserted, release, done):
+    with app.app_context():
+        entries = [{
+            'date': date(2024, 1, 1),
+            'amount': 1.0,
+            'description': f'Bulk {n}',
+            'debit_account_id': 1,
+            'credit_account_id': 2
+        } for n in range(rows)]
+        _db.session.execute(_db.insert(Transaction), entries)
+        balances.post_entries([(e['debit_account_id'], e['credit_account_id'], e['amount']) for e in entries])
+        inserted.set()
+        release.wait(10)
+        _db.session.commit()
+        _db.session.remove()
+        done.set()
+
+def test_read_engine_opens_primary_read_only(routed_app):
+    engine = routed_app.extensions['read_engine']
+    assert engine is not None
+    assert 'mode=ro' in str(engine.url)
+
+def test_memory_database_has_no_read_engine(app):
+    assert app.extensions['read_engine'] is None
+
+def test_report_runs_while_bulk_insert_in_flight(routed_app):
+    client = routed_app.test_client()
+    client.post('/api/auth/login', json={'username': 'reader', 'password': 'testpass'})
+    read_statements = count_statements(routed_app.extensions['read_engine'])
+    primary_statements = count_statements(_db.engine)
+
+    inserted, release, done = threading.Event(), threading.Event(), threading.Event()
+    writer = threading.Thread(target=bulk_insert, args=(routed_app, 20000, inserted, release, done))
+    writer.start()
+    try:
+        assert inserted.wait(30)
+        writer_statements = len(primary_statements)
+        start = time.perf_counter()
+        response = client.get('/api/reports/trial-balance')
+        elapsed = time.perf_counter() - start
+        assert response.status_code == 200
+        # The report neither waited for the writer nor saw its uncommitted rows
+        assert elapsed < 2
+        assert not done.is_set()
+        assert response.json['debit_total'] == 0.0
+        assert read_statements
+        assert len(primary_statements) == writer_statements
+
+        listing = client.get('/api/transactions/')
+        assert listing.status_code == 200
+        assert listing.json == []
+    finally:
+        release.set()
+        writer.join()
+
+    response = client.get('/api/reports/trial-balance')
+    assert response.json['debit_total'] == 20000.0
+    assert len(client.get('/api/transactions/?limit=5').json) == 5
+
+def test_writes_stay_on_primary(routed_app):
+    client = routed_app.test_client()
+    client.post('/api/auth/login', json={'username': 'reader', 'password': 'testpass'})
+    read_statements = count_statements(routed_app.extensions['read_engine'])
+    response = client.post('/api/accounts/', json={'name': 'Rent', 'type': 'Expense'})
+    assert response.status_code == 201
+    assert not any(statement.startswith('INSERT') for statement in read_statements)
+    assert client.get('/api/accounts/').status_code == 200
+    assert 'Rent' in [account['name'] for account in client.get('/api/accounts/').json]
+
+def test_read_only_session_rejects_writes(routed_app):
+    with read_only(_db.session):
+        _db.session.add(Account(name='Rejected', type='Asset'))
+        with pytest.raises(OperationalError, match='readonly'):
+            _db.session.flush()
+    _db.session.rollback()
+    assert 'read_only' not in _db.session.info
@@ -0,0 +1,38 @@
+# tests/test_serializers.py
+
+from datetime import date, datetime, timezone
+from flask_restx import Model, fields, marshal
+from modules.services.serializers import RowSerializer
+
+model = Model('Sample', {
+    'id': fields.Integer,
+    'when': fields.DateTime(),
+    'stamp': fields.DateTime(),
+    'amount': fields.Float(),
+    'label': fields.String(),
+    'flag': fields.Boolean(),
+    'rfc': fields.DateTime(dt_format='rfc822'),
+    'fallback': fields.Integer(default=7)
+})
+
+class Row:
+    def __init__(self, values):
+        self.__dict__.update(zip(model.keys(), values))
+
+ROWS = [
+    (1, date(2024, 1, 5), datetime(2024, 1, 5, 13, 30, tzinfo=timezone.utc), 12, 'Rent', 1,
+     datetime(2024, 1, 5, 13, 30), None),
+    (None, None, None, None, None, None, None, 3),
+    (3, '2024-02-01', datetime(2024, 2, 1), 0.1, 42, 0, date(2024, 2, 1), 0)
+]
+
+def test_serialize_matches_marshal(app):
+    serializer = RowSerializer(model)
+    with app.test_request_context():
+        assert serializer.serialize(ROWS) == marshal([Row(row) for row in ROWS], model)
+        assert list(serializer.serialize(ROWS)[0]) == list(model.keys())
+
+def test_serialize_applies_mask(app):
+    serializer = RowSerializer(model)
+    with app.test_request_context(headers={'X-Fields': 'id,label'}):
+        assert serializer.serialize(ROWS[:1]) == [{'id': 1, 'label': 'Rent'}]
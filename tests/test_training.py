@@ -0,0 +1,116 @@
+# tests/test_training.py
+
+import os
+import subprocess
+import sys
+import tracemalloc
+from datetime import date, timedelta
+import numpy as np
+import pytest
+from modules.models.account import Account
+from modules.models.transaction import Transaction
+from modules.ml.models.registry import ModelRegistry
+from modules.ml.training.features import featurize, feature_count, hashed_tokens
+from modules.ml.training.categorizer import train_categorizer
+
+@pytest.fixture
+def registry(app, tmp_path):
+    registry = ModelRegistry(str(tmp_path))
+    app.extensions['model_registry'] = registry
+    return registry
+
+@pytest.fixture
+def accounts(db):
+    accounts = {name: Account(name=name, type=kind) for name, kind in
+                (('Cash', 'Asset'), ('Rent', 'Expense'), ('Sales', 'Revenue'), ('Loan', 'Liability'))}
+    db.session.add_all(accounts.values())
+    db.session.commit()
+    return {name: account.id for name, account in accounts.items()}
+
+# (description, debit, credit) patterns the categorizer should learn
+PATTERNS = [('Office rent March', 'Rent', 'Cash'), ('Invoice paid by customer', 'Cash', 'Sales'),
+            ('Bank loan drawdown', 'Cash', 'Loan')]
+
+def add_transactions(db, accounts, count):
+    start = date(2024, 1, 1)
+    rows = []
+    for n in range(count):
+        description, debit, credit = PATTERNS[n % len(PATTERNS)]
+        rows.append({'date': start + timedelta(days=n % 365), 'amount': 10.0 + n % 100,
+                     'description': f'{description} #{n}', 'debit_account_id': accounts[debit],
+                     'credit_account_id': accounts[credit]})
+    db.session.execute(db.insert(Transaction), rows)
+    db.session.commit()
+
+def test_features():
+    assert np.array_equal(hashed_tokens(['Rent rent'])[0], hashed_tokens(['RENT'])[0])
+    assert np.isclose(np.linalg.norm(hashed_tokens(['office rent'])[0]), 1.0)
+    # 2024-03-04 was a Monday; -1 is an unknown account type
+    features = featurize(['Office rent', ''], [120.0, -5.0], [date(2024, 3, 4).toordinal()] * 2,
+                         [4, -1], [0, -1], hash_width=16)
+    assert features.shape == (2, feature_count(16)) and features.dtype == np.float32
+    weekday = features[:, 17:24]
+    assert weekday[:, 0].tolist() == [1.0, 1.0] and weekday.sum() == 2
+    assert features[0, 24:].tolist() == [0, 0, 0, 0, 1, 1, 0, 0, 0, 0]
+    assert features[1, 24:].sum() == 0
+    assert not features[1, :16].any()
+
+def test_train_and_publish(db, accounts, registry):
+    add_transactions(db, accounts, 300)
+    version = train_categorizer(registry, chunk_size=64, workers=0)
+    assert version == 1
+    model = registry.get('categorizer')
+    assert model.metadata['trained_rows'] == 300
+    assert model.metadata['classes'] == 3
+    assert model.arrays['support'].sum() == 300
+
+    features = featurize(['rent for march', 'customer invoice paid'], [50.0, 80.0],
+                         [date(2024, 5, 1).toordinal()] * 2, [-1, -1], [-1, -1])
+    best = model.predict(features).argmax(axis=1)
+    assert model.arrays['labels'][best].tolist() == [[accounts['Rent'], accounts['Cash']],
+                                                     [accounts['Cash'], accounts['Sales']]]
+
+def test_process_pool_matches_in_process(db, accounts, registry):
+    add_transactions(db, accounts, 600)
+    local = registry.get('categorizer', train_categorizer(registry, chunk_size=100, workers=0))
+    pooled = registry.get('categorizer', train_categorizer(registry, chunk_size=100, workers=2))
+    for key in ('weights', 'bias', 'labels', 'support'):
+        assert np.allclose(local.arrays[key], pooled.arrays[key])
+
+def test_empty_ledger(db, registry):
+    assert train_categorizer(registry, workers=0) is None
+    assert registry.models() == []
+
+def training_peak(db, accounts, registry, count):
+    db.session.execute(db.delete(Transaction))
+    add_transactions(db, accounts, count)
+    db.session.expunge_all()
+    tracemalloc.start()
+    try:
+        train_categorizer(registry, chunk_size=500, workers=0)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+def test_peak_memory_is_flat(db, accounts, registry, record_property):
+    small = training_peak(db, accounts, registry, 2000)
+    large = training_peak(db, accounts, registry, 16000)
+    record_property('training_peak_2k_kb', small // 1024)
+    record_property('training_peak_16k_kb', large // 1024)
+    # Eight times the ledger, (almost) the same peak: memory follows the chunk size
+    assert large < small * 1.5
+
+def test_train_command(app, db, accounts, registry):
+    add_transactions(db, accounts, 90)
+    result = app.test_cli_runner().invoke(args=['models', 'train', '--workers', '0', '--chunk-size', '40'])
+    assert result.exit_code == 0, result.output
+    assert 'Published categorizer version 1: 90 transaction(s), 3 account pair(s)' in result.output
+    assert registry.current_version('categorizer') == 1
+
+def test_feature_code_leaves_out_the_database():
+    # What a spawned training worker imports to run chunk_statistics
+    probe = ('import sys, modules.ml.training.features; '
+             'print(sorted(m for m in ("flask", "flask_sqlalchemy", "modules.database.db") if m in sys.modules))')
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    result = subprocess.run([sys.executable, '-c', probe], cwd=root, check=True, stdout=subprocess.PIPE, text=True)
+    assert result.stdout.strip() == '[]'
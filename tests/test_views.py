@@ -76,3 +76,35 @@ def test_delete_nonexistent_account(client, test_user):
     login(client, test_user)
     response = client.post('/accounts/99999/delete', follow_redirects=True)
     assert response.status_code == 404
+
+def test_new_transaction_form_lists_accounts(client, db, test_user):
+    login(client, test_user)
+    client.post('/accounts/new', data={'name': 'Form_Cash', 'type': 'Asset', 'submit': 'Submit'})
+    response = client.get('/transactions/new')
+    assert response.status_code == 200
+    assert b'Form_Cash' in response.data
+
+def test_edit_account_duplicate_name(client, db, test_user):
+    login(client, test_user)
+    client.post('/accounts/new', data={'name': 'First_Name', 'type': 'Asset', 'submit': 'Submit'})
+    client.post('/accounts/new', data={'name': 'Second_Name', 'type': 'Asset', 'submit': 'Submit'})
+    second = Account.query.filter_by(name='Second_Name').first()
+    response = client.post(f'/accounts/{second.id}/edit', data={
+        'name': 'First_Name',
+        'type': 'Asset',
+        'submit': 'Submit'
+    }, follow_redirects=True)
+    assert b'Account name already exists.' in response.data
+    assert db.session.get(Account, second.id).name == 'Second_Name'
+
+def test_view_writes_bump_ledger_version(client, db, test_user):
+    from modules.services import ledger_version
+    login(client, test_user)
+    before = ledger_version.current()
+    client.post('/accounts/new', data={'name': 'Versioned', 'type': 'Asset', 'submit': 'Submit'})
+    account = db.session.execute(db.select(Account).filter_by(name='Versioned')).scalar_one()
+    assert account.version == 1
+    client.post(f'/accounts/{account.id}/edit', data={'name': 'Versioned 2', 'type': 'Asset', 'submit': 'Submit'})
+    db.session.refresh(account)
+    assert account.version == 2
+    assert ledger_version.current() == before + 2